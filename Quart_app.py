@@ -34,9 +34,13 @@
 import logging
 from dotenv import find_dotenv, load_dotenv
 import os
-from quart import Quart, request, jsonify
+from quart import Quart, Response, request, jsonify
 from slack_bot_handler import SlackBotHandler
+from event_store import create_event_store
+from job_queue import JobQueue
+from metrics import REGISTRY, set_gauges
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 
 
@@ -55,25 +59,87 @@ logger = (
 # - The instance name can be anything - here we used `stark`
 stark = Quart(__name__)
 
+# Bounded worker pool for app mentions:
+# - `SlackBotHandler.handle_app_mention` keeps all per-event state on a request context, so several
+#   mentions can run in parallel on the shared handler without overwriting each other.
+# - The pool size caps how many dataset loads / fast path queries / agent builds run at the same time
+#   (set SLACK_BOT_MAX_WORKERS to tune it). Mentions waiting on OpenAI do not hold a thread of the pool,
+#   so the job queue can run many more mentions at once (JOB_QUEUE_WORKERS).
+MAX_WORKERS = int(os.environ.get("SLACK_BOT_MAX_WORKERS", "4"))
+worker_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="app-mention")
+
+# Startup mode (STARTUP_MODE):
+# - "background" (default): the server answers `/health` right away; heavy modules (pandas, boto3, langchain)
+#   are imported, the S3 / OpenAI clients built, the sandbox started and the datasets marked `preload`
+#   loaded on a worker thread once it is serving (see `SlackBotHandler.warm_up`).
+# - "lazy": nothing is warmed up; everything happens on the first mention that needs it.
+# - "eager": the warm-up completes before the server starts serving.
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "background")
+
 # Create an instance of the SlackBotHandler class:
 # - `SlackBotHandler` is a custom class defined in the `slack_bot_handler.py` module.
 # - It contains logic to process various Slack events, like app mentions, messages, and responses.
 # - This instance (`handler`) is used throughout the application to handle Slack interactions.
-handler = SlackBotHandler()
+# - Slack and OpenAI calls are awaited on the event loop; blocking data work runs on `worker_pool`.
+handler = SlackBotHandler(executor=worker_pool)
+
+# Idempotency store for Slack events:
+# - Slack re-sends events it did not get an ack for in time. Every re-delivery would otherwise start
+#   another agent run and LLM call, so event IDs already accepted are remembered and duplicates dropped.
+# - Backend is configurable (SLACK_EVENT_STORE=memory|sqlite); sqlite is shared between hypercorn workers.
+event_store = create_event_store()
 
 
 async def handle_app_mention(slack_body):
     """
     Asynchronously handles app mentions from Slack.
 
-    - This function offloads heavy processing to a background thread using `asyncio.to_thread`.
+    - Slack messages are sent asynchronously; heavy processing is offloaded to a thread of the bounded `worker_pool`.
     - Slack needs a success message within 3 seconds, so this function will push event details 
     - to background task and we can send success message within 3 seconds to slack
 
     Args:
         slack_body (dict): The JSON payload received from Slack containing details of the event.
     """
-    await asyncio.to_thread(handler.handle_app_mention, slack_body)
+    await handler.handle_app_mention(slack_body)
+
+
+def notify_queued(slack_body, position):
+    """
+    Tells the user their mention is waiting for a free worker. The message is updated in place once the
+    mention is processed, so a queued mention leaves one bot message, not two.
+
+    Args:
+        slack_body (dict): The JSON payload of the queued mention.
+        position (int): Position of the mention in the job queue.
+
+    Returns:
+        Coroutine: Posts the message (the job queue runs it in the background).
+    """
+    return handler.notify_queued(slack_body, position)
+
+
+async def notify_rejected(slack_body):
+    """
+    Tells the user their mention was dropped because the job queue is full.
+
+    Args:
+        slack_body (dict): The JSON payload of the rejected mention.
+    """
+    await handler.send_processing_message(
+        body=slack_body, msg="I'm at capacity right now, please ask again in a few minutes."
+    )
+
+
+# Background warm-up of the handler (kept so it is not garbage collected).
+warm_up_future = None
+
+
+# Bounded job queue for app mentions:
+# - Mentions wait on a queue with a maximum depth (JOB_QUEUE_MAX_DEPTH) and are processed by a fixed
+#   number of worker tasks (JOB_QUEUE_WORKERS), instead of one untracked task per mention.
+# - When all workers are busy the user is told their position; when the queue is full the mention is rejected.
+job_queue = JobQueue(handle_app_mention, on_queued=notify_queued, on_rejected=notify_rejected)
 
 
 @stark.route("/slack/events", methods=["POST"])
@@ -84,6 +150,7 @@ async def slack_events():
     This route listens for incoming POST requests from Slack's Events API. It handles:
     - `url_verification`: The initial handshake request from Slack to verify the endpoint.
     - `app_mention`: When the bot is mentioned in a Slack channel.
+      Retries (`X-Slack-Retry-Num`) and events already seen are acknowledged without being processed again.
 
     Returns:
         - A 200 response if the request is successfully processed.
@@ -100,8 +167,24 @@ async def slack_events():
 
     # Check if the event is an 'app_mention' (triggered when the bot is mentioned)
     if slack_body.get("event", {}).get("type") == "app_mention":
-        # Offload the processing of the mention event to a background task
-        asyncio.create_task(handle_app_mention(slack_body))
+        # Drop Slack retries and already seen events before any work is started.
+        # They are still acknowledged with a 200 so Slack stops re-sending them.
+        retry_num = request.headers.get("X-Slack-Retry-Num")
+        if retry_num is not None:
+            logging.info(
+                f"Slack retry #{retry_num} ignored ({request.headers.get('X-Slack-Retry-Reason')})."
+            )
+            return jsonify({"statusCode": 200})
+
+        event_id = slack_body.get("event_id") or slack_body["event"].get("client_msg_id")
+        # The SQLite store may wait on another worker's write lock: it runs off the event loop.
+        if event_id and not await asyncio.get_running_loop().run_in_executor(None, event_store.mark_seen, event_id):
+            logging.info(f"Duplicate Slack event {event_id} ignored.")
+            return jsonify({"statusCode": 200})
+
+        # Offload the processing of the mention event to the job queue.
+        # The user is notified from the queue if the mention has to wait or is rejected.
+        job_queue.submit(slack_body)
         logging.info("Slack request completed.")
         return jsonify({"statusCode": 200})
 
@@ -116,10 +199,63 @@ async def health_endpoint():
     Health check endpoint to confirm the server is running.
 
     Returns:
-        - A JSON response with status 200 and a message indicating that the API is live.
+        - A JSON response with status 200, a message indicating that the API is live, the job queue metrics
+      and whether the warm-up is done (`warm_up_seconds` stays null until it is).
+    """
+    return jsonify({
+        "statusCode": 200,
+        "message": "API is live.",
+        "queue": job_queue.stats(),
+        "startup": {"mode": STARTUP_MODE, "warm_up_seconds": handler.warm_up_seconds},
+    })
+
+
+@stark.route("/metrics", methods=["GET"])
+async def metrics_endpoint():
+    """
+    Metrics endpoint in the Prometheus text format.
+
+    Returns:
+        - Per-stage latency histograms, request / token / cache counters (see `metrics.py`)
+          and the current job queue and cache statistics.
     """
-    return jsonify({"statusCode": 200, "message": "API is live."})
+    set_gauges("stark_job_queue", job_queue.stats())
+    set_gauges("stark_datasets", handler.datasets.stats())
+    set_gauges("stark_cache_stats", handler.answer_cache.stats(), labels={"cache": "answer_cache"})
+    set_gauges("stark_cache_stats", handler.agent_pool.stats(), labels={"cache": "agent_pool"})
+    set_gauges("stark_llm_limiter", handler.llm_limiter.stats())
+    if handler.sandbox is not None:
+        set_gauges("stark_sandbox", handler.sandbox.stats())
+    for name, cache in list(handler.dataset_caches.items()):
+        set_gauges("stark_cache_stats", cache.stats(), labels={"cache": "dataset", "source": name})
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 
+@stark.before_serving
+async def startup():
+    """
+    Starts the job queue workers on the server's event loop, then warms the handler up according to
+    STARTUP_MODE: in the background, before serving, or not at all.
+    """
+    global warm_up_future
+    job_queue.start()
+    if STARTUP_MODE == "eager":
+        await asyncio.get_running_loop().run_in_executor(worker_pool, handler.warm_up)
+    elif STARTUP_MODE == "background":
+        warm_up_future = asyncio.get_running_loop().run_in_executor(worker_pool, handler.warm_up)
+
+
+@stark.after_serving
+async def shutdown():
+    """
+    Releases shared resources when the server stops: drains the job queue, then closes the
+    pooled Slack connection, the worker pool and the agent code sandbox.
+    """
+    await job_queue.drain()
+    await handler.slack.aclose()
+    worker_pool.shutdown(wait=False)
+    if handler.sandbox is not None:
+        handler.sandbox.shutdown()
 
 
 if __name__ == "__main__":
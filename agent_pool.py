@@ -0,0 +1,177 @@
+"""
+    Pool of reusable DataFrame agents, keyed by dataset version.
+
+    `create_pandas_dataframe_agent` rebuilds the prompt (including the `df.head()` preview), the tool
+    schema and the executor on every call, although all of it only depends on the dataset version.
+    `AgentPool` builds agents once per dataset fingerprint and hands them out again to later requests.
+
+    An agent is checked out by exactly one request at a time, so concurrent requests never share an
+    executor or its Python tool. When an agent is returned, the tool's interpreter state (variables left
+    by agent-generated code, changes made to `df`) is reset so the next request starts clean.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable
+
+
+# Agent pool configuration:
+# 1. AGENT_POOL_MAX_IDLE:
+#    - Maximum number of idle agents kept per dataset version. Defaults to SLACK_BOT_MAX_WORKERS,
+#      enough for every worker to get a prebuilt agent.
+AGENT_POOL_MAX_IDLE = int(os.environ.get("AGENT_POOL_MAX_IDLE", os.environ.get("SLACK_BOT_MAX_WORKERS", "4")))
+
+
+class AgentPool:
+    def __init__(self, build_agent: Callable[[Any], Any], max_idle: int = AGENT_POOL_MAX_IDLE) -> None:
+        """
+            Initializes the AgentPool.
+
+            Arguments:
+                build_agent (callable): Builds a new agent executor for a Dataset.
+                max_idle (int): Maximum number of idle agents kept per dataset version.
+        """
+        self.logger = logging.getLogger()
+        self.build_agent = build_agent
+        self.max_idle = max_idle
+        self._idle = defaultdict(list)  # dataset fingerprint -> idle agents
+        self._build_seconds = {}  # dataset fingerprint -> time it took to build the first agent
+        self._lock = threading.Lock()
+
+        self.builds = 0
+        self.reuses = 0
+        self.discarded = 0
+
+    @contextmanager
+    def checkout(self, dataset, timings: dict = None):
+        """
+            Lends an agent for a dataset version to the caller, building one only if none is idle.
+
+            Arguments:
+                dataset (Dataset): The dataset snapshot the agent works on.
+                timings (dict): Optional request timings; "agent_build" and "agent_build_saved" (seconds) are recorded in it.
+
+            Yields:
+                AgentExecutor: An agent used by nobody else until the block exits.
+        """
+        agent = self._take(dataset, timings)
+        try:
+            yield agent
+        finally:
+            self._give_back(agent, dataset)
+
+    @asynccontextmanager
+    async def acheckout(self, dataset, timings: dict = None, executor=None):
+        """
+            Async version of `checkout`, for agents run with `ainvoke` on the event loop.
+            A missing agent is built on the executor. If the block is cancelled or fails, the agent is
+            discarded instead of returned: its tool may still be running code on another thread.
+
+            Arguments:
+                dataset (Dataset): The dataset snapshot the agent works on.
+                timings (dict): Optional request timings, as for `checkout`.
+                executor (Executor): Where to build the agent. Defaults to asyncio's default executor.
+
+            Yields:
+                AgentExecutor: An agent used by nobody else until the block exits.
+        """
+        agent = await asyncio.get_running_loop().run_in_executor(executor, self._take, dataset, timings)
+        try:
+            yield agent
+        except BaseException:
+            self._discard(agent)
+            raise
+        self._give_back(agent, dataset)
+
+    def _take(self, dataset, timings: dict = None):
+        """
+            Takes an idle agent for a dataset version, or builds one.
+        """
+        fingerprint = dataset.fingerprint
+        with self._lock:
+            idle = self._idle.get(fingerprint)
+            agent = idle.pop() if idle else None
+            if agent is not None:
+                self.reuses += 1
+
+        if agent is None:
+            started = time.perf_counter()
+            agent = self.build_agent(dataset)
+            build_seconds = time.perf_counter() - started
+            with self._lock:
+                self.builds += 1
+                self._build_seconds.setdefault(fingerprint, build_seconds)
+            if timings is not None:
+                timings["agent_build"] = build_seconds
+                timings["agent_build_saved"] = 0.0
+        elif timings is not None:
+            timings["agent_build"] = 0.0
+            timings["agent_build_saved"] = self._build_seconds.get(fingerprint, 0.0)
+        return agent
+
+    def _give_back(self, agent, dataset):
+        """
+            Resets an agent and returns it to the idle agents of its dataset version.
+        """
+        fingerprint = dataset.fingerprint
+        self._reset(agent, dataset)
+        with self._lock:
+            # Agents of a version invalidated meanwhile are dropped rather than returned.
+            if fingerprint in self._build_seconds and len(self._idle[fingerprint]) < self.max_idle:
+                self._idle[fingerprint].append(agent)
+
+    def invalidate(self, fingerprint: str):
+        """
+            Drops the agents built for a dataset version that is no longer current.
+
+            Arguments:
+                fingerprint (str): Fingerprint of the old dataset version.
+        """
+        with self._lock:
+            dropped = len(self._idle.pop(fingerprint, []))
+            self._build_seconds.pop(fingerprint, None)
+        self.logger.info(f"Agent pool dropped {dropped} idle agents for dataset {fingerprint}")
+
+    def stats(self) -> dict:
+        """
+            Returns the pool counters.
+
+            Returns:
+                dict: Number of agents built, reused and discarded, and of idle agents.
+        """
+        with self._lock:
+            idle = sum(len(agents) for agents in self._idle.values())
+        return {"builds": self.builds, "reuses": self.reuses, "discarded": self.discarded, "idle": idle}
+
+    @staticmethod
+    def _reset(agent, dataset):
+        """
+            Resets the Python tool of an agent: forgets variables defined by agent-generated code and
+            gives it a fresh copy-on-write view of the dataset frame.
+            A sandboxed tool returns its worker process to the sandbox pool instead.
+        """
+        # Agents only exist once langchain is loaded: importing it here keeps the pool cheap to create at startup.
+        from langchain_experimental.tools.python.tool import PythonAstREPLTool
+        from sandbox_tool import SandboxedPythonTool
+
+        for tool in getattr(agent, "tools", []):
+            if isinstance(tool, SandboxedPythonTool):
+                tool.end_session()
+            elif isinstance(tool, PythonAstREPLTool):
+                tool.locals = {"df": dataset.frame.copy(deep=False)}
+                tool.globals = {}
+
+    def _discard(self, agent):
+        """
+            Drops an agent whose run was interrupted; a sandboxed tool's worker is killed and replaced.
+        """
+        from sandbox_tool import SandboxedPythonTool
+
+        self.discarded += 1
+        for tool in getattr(agent, "tools", []):
+            if isinstance(tool, SandboxedPythonTool):
+                tool.abort()
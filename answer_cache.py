@@ -0,0 +1,221 @@
+"""
+    Cache of generated answers for repeated questions.
+
+    Users ask the same questions over and over ("pass rate by platform for AY24"), and every one of
+    them used to cost two GPT-4o round trips. `AnswerCache` stores the agent's relevant data and the
+    LLM insight keyed by (normalized question, dataset fingerprint), so a repeated question against the
+    same dataset version is answered immediately.
+
+    Entries are evicted LRU once the cache is full and expire after a TTL. Optionally they are also
+    persisted to a local SQLite file so they survive restarts and are shared between workers.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+
+# Answer cache configuration:
+# 1. ANSWER_CACHE_MAX_ENTRIES:
+#    - Maximum number of answers kept (in memory and in the SQLite file).
+# 2. ANSWER_CACHE_TTL_SECONDS:
+#    - How long an answer stays valid, even if the dataset did not change.
+# 3. ANSWER_CACHE_PATH:
+#    - Location of the SQLite file used to persist answers. Leave empty to keep answers in memory only.
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "256"))
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", "86400"))
+ANSWER_CACHE_PATH = os.environ.get("ANSWER_CACHE_PATH", "")
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    """
+        A previously generated answer.
+
+        Attributes:
+            relevant_data (str): The data (pivot table) returned by the DataFrame agent.
+            insight (str): The insight text generated by the LLM.
+            created_at (float): Unix timestamp of when the answer was generated.
+    """
+
+    relevant_data: str
+    insight: str
+    created_at: float
+
+
+def normalize_question(text: str) -> str:
+    """
+        Normalizes a question so trivially different phrasings share a cache entry:
+        lower case, punctuation removed and whitespace collapsed.
+
+        Arguments:
+            text (str): The user's question.
+
+        Returns:
+            str: The normalized question.
+    """
+    text = re.sub(r"[^\w\s%.-]", " ", text.lower())
+    return " ".join(text.strip(" .").split())
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        path: str = ANSWER_CACHE_PATH,
+    ) -> None:
+        """
+            Initializes the AnswerCache.
+
+            Arguments:
+                max_entries (int): Maximum number of cached answers.
+                ttl_seconds (float): How long an answer stays valid.
+                path (str): Optional SQLite file to persist answers to. Empty keeps answers in memory only.
+        """
+        self.logger = logging.getLogger()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (fingerprint, CachedAnswer), least recently used first
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, relevant_data TEXT NOT NULL, "
+                "insight TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS answers_fingerprint ON answers (fingerprint)")
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(question: str, fingerprint: str) -> str:
+        """
+            Builds the cache key of a question asked against a dataset version.
+
+            Arguments:
+                question (str): The user's question.
+                fingerprint (str): Fingerprint of the dataset version the question is answered from.
+
+            Returns:
+                str: The cache key.
+        """
+        digest = hashlib.sha1(normalize_question(question).encode("utf-8")).hexdigest()
+        return f"{fingerprint}:{digest}"
+
+    def get(self, question: str, fingerprint: str) -> Optional[CachedAnswer]:
+        """
+            Looks up the answer to a question for a dataset version.
+
+            Arguments:
+                question (str): The user's question.
+                fingerprint (str): Fingerprint of the dataset version.
+
+            Returns:
+                CachedAnswer: The cached answer, or None if there is no valid entry.
+        """
+        key = self.key(question, fingerprint)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1].created_at < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+
+            answer = self._load(key, now)
+            if answer is None:
+                self.misses += 1
+                return None
+            self._remember(key, fingerprint, answer)
+            self.hits += 1
+            return answer
+
+    def put(self, question: str, fingerprint: str, relevant_data: str, insight: str):
+        """
+            Stores the answer to a question for a dataset version.
+
+            Arguments:
+                question (str): The user's question.
+                fingerprint (str): Fingerprint of the dataset version.
+                relevant_data (str): The data returned by the DataFrame agent.
+                insight (str): The insight generated by the LLM.
+        """
+        key = self.key(question, fingerprint)
+        answer = CachedAnswer(relevant_data=relevant_data, insight=insight, created_at=time.time())
+        with self._lock:
+            self._remember(key, fingerprint, answer)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, fingerprint, relevant_data, insight, answer.created_at, answer.created_at),
+                )
+                # Keep the file bounded as well: drop the least recently used rows.
+                self._conn.execute(
+                    "DELETE FROM answers WHERE key NOT IN "
+                    "(SELECT key FROM answers ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+
+    def invalidate(self, fingerprint: str):
+        """
+            Drops every answer computed from a dataset version. Called when the dataset cache
+            reports that the source was reloaded with a new version.
+
+            Arguments:
+                fingerprint (str): Fingerprint of the dataset version that is no longer current.
+        """
+        with self._lock:
+            stale = [key for key, (fp, _) in self._entries.items() if fp == fingerprint]
+            for key in stale:
+                del self._entries[key]
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM answers WHERE fingerprint = ?", (fingerprint,))
+        self.logger.info(f"Answer cache invalidated {len(stale)} entries for dataset {fingerprint}")
+
+    def stats(self) -> dict:
+        """
+            Returns the cache counters.
+
+            Returns:
+                dict: hits, misses and the number of answers held in memory.
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _remember(self, key, fingerprint, answer):
+        """
+            Adds an answer to the in-memory LRU, evicting the least recently used one when full.
+            Must be called with the lock held.
+        """
+        self._entries[key] = (fingerprint, answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key, now):
+        """
+            Reads a still valid answer from the SQLite file, if persistence is enabled.
+            Must be called with the lock held.
+        """
+        if self._conn is None:
+            return None
+        row = self._conn.execute(
+            "SELECT relevant_data, insight, created_at FROM answers WHERE key = ? AND created_at > ?",
+            (key, now - self.ttl_seconds),
+        ).fetchone()
+        if row is None:
+            return None
+        self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+        return CachedAnswer(relevant_data=row[0], insight=row[1], created_at=row[2])
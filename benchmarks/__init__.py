@@ -0,0 +1,5 @@
+"""
+    Offline benchmarks for the Slack data analyst. Run them from the repository root, e.g.
+
+        python -m benchmarks.loader_report --rows 1000000
+"""
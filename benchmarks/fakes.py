@@ -0,0 +1,126 @@
+"""
+    Local stand-ins for Slack's Web API and OpenAI, used by the offline benchmarks.
+
+    `FakeSlackServer` is a real HTTP server (aiohttp) answering `chat.postMessage` / `chat.update`,
+    so the bot's pooled Slack client is exercised end to end. `FakeChatModel` is a deterministic chat
+    model with a configurable latency, plugged into `SlackBotHandler` in place of `ChatOpenAI`.
+"""
+import asyncio
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from aiohttp import web
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+DEFAULT_RESPONSE = (
+    "**Key insights**\n"
+    "- Pass rates are stable across platforms, with the highest share of passes on the largest platform.\n"
+    "- Average grades rise slightly from one academic year to the next.\n"
+    "- Verified learners convert to credit far more often than audit learners."
+)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+        Deterministic chat model: always answers `response`, after `latency` seconds.
+        Streams the response word by word, `chunk_delay` seconds apart, and reports token usage
+        (one token per word) like OpenAI does.
+
+        Without a function call in its answer, the DataFrame agent treats the response as its final output,
+        so agent questions cost one model call.
+    """
+
+    response: str = DEFAULT_RESPONSE
+    latency: float = 0.5
+    chunk_delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _usage(self, messages: List[BaseMessage]) -> dict:
+        input_tokens = sum(len(str(message.content).split()) for message in messages)
+        output_tokens = len(self.response.split())
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        message = AIMessage(content=self.response, usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        message = AIMessage(content=self.response, usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for word in self.response.split(" "):
+            time.sleep(self.chunk_delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages)))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for word in self.response.split(" "):
+            await asyncio.sleep(self.chunk_delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages)))
+
+
+class FakeSlackServer:
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1") -> None:
+        """
+            Initializes the FakeSlackServer. Call `start()` from a running event loop.
+
+            Arguments:
+                latency (float): Seconds every API call takes.
+                host (str): Interface to listen on; the port is picked by the OS.
+        """
+        self.latency = latency
+        self.host = host
+        self.calls = Counter()  # API method -> number of calls
+        self._runner = None
+        self._ts = 0
+        self.base_url = ""
+
+    async def start(self) -> str:
+        """
+            Starts serving.
+
+            Returns:
+                str: Base URL of the fake Web API, to use as SLACK_API_BASE_URL.
+        """
+        app = web.Application()
+        app.router.add_post("/api/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{self.host}:{port}/api"
+        return self.base_url
+
+    async def stop(self):
+        """
+            Stops serving.
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        """
+            Answers any Web API method with `ok`, and a message timestamp for the chat methods.
+        """
+        method = request.match_info["method"]
+        payload = await request.json()
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._ts += 1
+        return web.json_response({"ok": True, "channel": payload.get("channel"), "ts": payload.get("ts") or f"{self._ts}.000100"})
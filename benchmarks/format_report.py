@@ -0,0 +1,90 @@
+"""
+    Micro-benchmark of the Slack formatting of large agent outputs.
+
+    Compares the previous `format_for_slack` (six chained `str.replace` passes plus `splitlines` / join
+    passes, which also stripped every `|` out of tables) with the single-pass `markdown_to_mrkdwn`,
+    and measures splitting the result into Slack-sized messages:
+
+        python -m benchmarks.format_report --rows 50 500 5000
+"""
+import argparse
+import random
+import timeit
+
+from slack_format import format_data, markdown_to_mrkdwn, to_messages
+
+
+def legacy_format_for_slack(text):
+    """
+        The previous implementation of `SlackBotHandler.format_for_slack`, kept as the baseline.
+    """
+    formatted_text = text.replace("**", "*")
+    formatted_text = formatted_text.replace("__", "_")
+    formatted_text = formatted_text.replace("### ", "*")
+    formatted_text = formatted_text.replace("|", "")
+    formatted_text = formatted_text.replace("---", "—")
+    lines = formatted_text.splitlines()
+    for i, line in enumerate(lines):
+        if line.strip().startswith("1. "):
+            lines[i] = line.replace("1. ", "• ", 1)
+        elif line.strip().startswith("- "):
+            lines[i] = line.replace("- ", "• ", 1)
+    formatted_text = "\n".join(lines)
+    return "\n".join([line for line in formatted_text.splitlines() if line.strip()])
+
+
+def agent_output(table_rows: int, seed: int = 0) -> str:
+    """
+        Builds an agent-like markdown response: a header, a pivot table with `table_rows` rows and bullet insights.
+
+        Arguments:
+            table_rows (int): Number of table rows.
+            seed (int): Random seed.
+
+        Returns:
+            str: The markdown text.
+    """
+    rng = random.Random(seed)
+    platforms = ["Online", "Inclass", "Hybrid"]
+    lines = ["### **Pass rate by course and platform**", "", "| Course | Platform | AY | Pass Rate (%) | Avg Grade |", "|:--|:--|:--|--:|--:|"]
+    for i in range(table_rows):
+        lines.append(
+            f"| COURSE-{i % 97:03d} | {rng.choice(platforms)} | 20{rng.randint(18, 24)} "
+            f"| {rng.uniform(0, 100):.2f} | {rng.uniform(40, 100):.1f} |"
+        )
+    lines.append("")
+    for i in range(max(3, table_rows // 20)):
+        lines.append(f"- **Insight {i + 1}**: courses on __{rng.choice(platforms)}__ pass *more often* than the average.")
+    lines.append("1. Focus on the lowest courses first.")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--number", type=int, default=0, help="calls per measurement (0: picked per size)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'KB':>7} {'legacy ms':>10} {'mrkdwn ms':>10} {'split ms':>9} {'messages':>9} {'MB/s':>7}")
+    for rows in args.rows:
+        text = agent_output(rows)
+        number = args.number or max(3, 20_000 // max(rows, 1))
+        legacy = min(timeit.repeat(lambda: legacy_format_for_slack(text), number=number, repeat=3)) / number
+        mrkdwn = min(timeit.repeat(lambda: markdown_to_mrkdwn(text), number=number, repeat=3)) / number
+        formatted = markdown_to_mrkdwn(text)
+        split = min(timeit.repeat(lambda: to_messages(formatted), number=number, repeat=3)) / number
+        print(
+            f"{rows:>7} {len(text) / 1024:>7.1f} {legacy * 1000:>10.3f} {mrkdwn * 1000:>10.3f} "
+            f"{split * 1000:>9.3f} {len(to_messages(formatted)):>9} {len(text) / mrkdwn / 1024 ** 2:>7.1f}"
+        )
+
+    # A streamed response re-renders the same data with every update: it is only formatted once.
+    data = agent_output(500)
+    format_data.cache_clear()
+    first = timeit.timeit(lambda: format_data(data), number=1)
+    cached = timeit.timeit(lambda: format_data(data), number=100) / 100
+    print(f"format_data (500 rows): first call {first * 1000:.3f} ms, cached {cached * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
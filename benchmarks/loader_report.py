@@ -0,0 +1,74 @@
+"""
+    Memory / latency report of the learner data loading modes.
+
+    Compares the standard loader (str objects + int64 flags) with the compact one
+    (categoricals + narrow ints), with both the C and pyarrow CSV engines, on synthetic
+    data generated from the `data.csv` schema:
+
+        python -m benchmarks.loader_report --rows 100000 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import write_learner_csv
+from learner_data import read_learner_csv, resolve_engine
+
+
+def measure(path: str, mode: str, engine: str, repeat: int) -> dict:
+    """
+        Loads a CSV with one loading mode / engine and measures it.
+
+        Arguments:
+            path (str): The CSV file.
+            mode (str): "standard" or "compact".
+            engine (str): "c" or "pyarrow".
+            repeat (int): Number of loads; the best time is reported.
+
+        Returns:
+            dict: Load time, memory footprint and the time of a typical group-by.
+    """
+    load_seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        frame = read_learner_csv(path, mode=mode, engine=engine)
+        load_seconds.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    frame.groupby(["Platform", "AY"], observed=True)[["Passed", "Grade"]].mean()
+    groupby_seconds = time.perf_counter() - started
+
+    return {
+        "load_s": min(load_seconds),
+        "memory_mb": frame.memory_usage(deep=True).sum() / 1024 ** 2,
+        "groupby_ms": groupby_seconds * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engines = ["c"] + (["pyarrow"] if resolve_engine("pyarrow") == "pyarrow" else [])
+    print(f"{'rows':>10} {'mode':>9} {'engine':>8} {'load s':>8} {'memory MB':>10} {'groupby ms':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = write_learner_csv(os.path.join(tmp, f"learners_{rows}.csv"), rows)
+            baseline = None
+            for mode in ["standard", "compact"]:
+                for engine in engines:
+                    result = measure(path, mode, engine, args.repeat)
+                    baseline = baseline or result
+                    print(
+                        f"{rows:>10} {mode:>9} {engine:>8} {result['load_s']:>8.3f} "
+                        f"{result['memory_mb']:>10.1f} {result['groupby_ms']:>11.1f}"
+                        f"   ({result['memory_mb'] / baseline['memory_mb']:.0%} memory, "
+                        f"{result['load_s'] / baseline['load_s']:.0%} load time vs standard/c)"
+                    )
+
+
+if __name__ == "__main__":
+    main()
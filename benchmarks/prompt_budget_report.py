@@ -0,0 +1,34 @@
+"""
+    Report of the insight prompt compaction: tokens of the relevant data before / after `compact_data`
+    for agent-like pivots of growing size, and the time the compaction takes:
+
+        python -m benchmarks.prompt_budget_report --rows 20 200 2000 20000
+"""
+import argparse
+import time
+
+from benchmarks.format_report import agent_output
+from prompt_budget import INSIGHT_DATA_MAX_TOKENS, _encoding, compact_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20, 200, 2000, 20000])
+    parser.add_argument("--max-tokens", type=int, default=INSIGHT_DATA_MAX_TOKENS, help="token budget of the data")
+    args = parser.parse_args()
+
+    print(f"tokenizer: {'tiktoken' if _encoding() is not None else 'length estimate'}, budget: {args.max_tokens} tokens")
+    print(f"{'rows':>7} {'tokens':>8} {'compacted':>10} {'saved %':>8} {'omitted':>8} {'ms':>8}")
+    for rows in args.rows:
+        data = agent_output(rows)
+        started = time.perf_counter()
+        compacted = compact_data(data, max_tokens=args.max_tokens)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{rows:>7} {compacted.original_tokens:>8} {compacted.tokens:>10} "
+            f"{100 * compacted.tokens_saved / compacted.original_tokens:>8.1f} {compacted.rows_omitted:>8} {elapsed * 1000:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
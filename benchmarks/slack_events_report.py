@@ -0,0 +1,231 @@
+"""
+    End-to-end throughput / latency report of the `/slack/events` route, fully offline.
+
+    Synthetic `app_mention` payloads are posted to the real Quart route at a configurable concurrency.
+    Slack's Web API is replaced by a local `FakeSlackServer` and OpenAI by a deterministic `FakeChatModel`
+    with a configurable latency, so the run costs nothing and is repeatable. For every dataset size
+    (generated from the `data.csv` schema) it reports p50 / p95 / p99 latency, requests per second,
+    how the mentions were served and the memory growth of the process:
+
+        python -m benchmarks.slack_events_report --rows 10000 100000 --requests 200 --concurrency 8
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.fakes import FakeChatModel, FakeSlackServer
+from benchmarks.synthetic import write_learner_csv
+
+
+# Mix of fast path (aggregate) and agent questions, asked in turn.
+QUESTIONS = [
+    "What is the pass rate by platform?",
+    "Average grade by course",
+    "How many verified learners per term?",
+    "Which courses improved the most between academic years?",
+    "Is there a relationship between grades and credit conversion?",
+]
+
+
+def rss_mb() -> float:
+    """
+        Returns:
+            float: Resident memory of the process in MB (peak RSS where /proc is not available).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def mention(i: int) -> dict:
+    """
+        Builds the Slack event payload of the i-th synthetic app mention.
+
+        The question text is kept as is (a suffix would stop the fast path from recognising it); every
+        mention comes from its own user, so a repeated question never cancels one still being answered.
+
+        Arguments:
+            i (int): Request number, used for the event and user IDs and to pick the question.
+
+        Returns:
+            dict: The `event_callback` body Slack would post.
+    """
+    question = QUESTIONS[i % len(QUESTIONS)]
+    return {
+        "type": "event_callback",
+        "event_id": f"Ev{i:08d}",
+        "event": {
+            "type": "app_mention",
+            "client_msg_id": f"msg-{i}",
+            "channel": f"CBENCH{i % 16}",
+            "user": f"UBENCH{i:08d}",
+            "text": f"<@{os.environ['SLACK_BOT_USER_ID']}> {question}",
+        },
+    }
+
+
+async def run_size(app_module, model, rows: int, args) -> dict:
+    """
+        Runs the benchmark against one dataset size, with a fresh handler (empty caches and agent pool).
+
+        Arguments:
+            app_module (module): The imported `Quart_app` module.
+            model (FakeChatModel): The chat model plugged into the handler.
+            rows (int): Number of synthetic learner rows.
+            args (argparse.Namespace): Benchmark settings.
+
+        Returns:
+            dict: Latency percentiles, throughput, serving paths and memory growth.
+    """
+    from answer_cache import AnswerCache
+    from slack_bot_handler import SlackBotHandler
+
+    pending = {}  # event ID -> future resolved with how the mention was served
+
+    class BenchmarkHandler(SlackBotHandler):
+        async def _handle_app_mention(self, ctx):
+            try:
+                await super()._handle_app_mention(ctx)
+            finally:
+                future = pending.get(ctx.event_id)
+                if future is not None and not future.done():
+                    future.set_result(ctx.served_by or "error")
+
+    async def notify_rejected(slack_body):
+        future = pending.get(slack_body["event_id"])
+        if future is not None and not future.done():
+            future.set_result("rejected")
+
+    # The app shuts its worker pool down when it stops serving, so every run gets a new one.
+    app_module.worker_pool = ThreadPoolExecutor(max_workers=app_module.MAX_WORKERS, thread_name_prefix="app-mention")
+    app_module.handler = BenchmarkHandler(executor=app_module.worker_pool, llm=model)
+    if not args.repeat_questions:
+        # No answer is kept, so every mention goes through the fast path or the agent.
+        app_module.handler.answer_cache = AnswerCache(max_entries=0, path="")
+    app_module.job_queue.on_rejected = notify_rejected
+    client = app_module.stark.test_client()
+    counter = itertools.count(args.offset)
+
+    async def one_request(record: bool):
+        i = next(counter)
+        body = mention(i)
+        pending[body["event_id"]] = asyncio.get_running_loop().create_future()
+        started = time.perf_counter()
+        await client.post("/slack/events", json=body)
+        acked = time.perf_counter()
+        served_by = await pending[body["event_id"]]
+        del pending[body["event_id"]]
+        if record:
+            latencies.append(time.perf_counter() - started)
+            ack_latencies.append(acked - started)
+            served[served_by] = served.get(served_by, 0) + 1
+
+    async def client_loop(requests: int):
+        for _ in range(requests):
+            await one_request(record=True)
+
+    latencies, ack_latencies, served = [], [], {}
+    memory_before = rss_mb()
+    async with app_module.stark.test_app():
+        # Warm-up: loads the dataset, builds the rollup cube and the first agents.
+        for _ in range(args.warmup):
+            await one_request(record=False)
+        memory_warm = rss_mb()
+
+        started = time.perf_counter()
+        per_client = [args.requests // args.concurrency + (c < args.requests % args.concurrency) for c in range(args.concurrency)]
+        await asyncio.gather(*(client_loop(n) for n in per_client))
+        elapsed = time.perf_counter() - started
+    args.offset = next(counter)
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (0.0, 0.0, 0.0)
+    return {
+        "rows": rows,
+        "p50_ms": p50 * 1000,
+        "p95_ms": p95 * 1000,
+        "p99_ms": p99 * 1000,
+        "ack_p99_ms": (np.percentile(ack_latencies, 99) if ack_latencies else 0.0) * 1000,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "served": served,
+        "warmup_mb": memory_warm - memory_before,
+        "growth_mb": rss_mb() - memory_warm,
+        "rss_mb": rss_mb(),
+    }
+
+
+async def run(args):
+    slack = FakeSlackServer(latency=args.slack_latency)
+    base_url = await slack.start()
+
+    # The bot reads its configuration at import time: point it at the fake Slack server first.
+    os.environ["SLACK_API_BASE_URL"] = base_url
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-benchmark")
+    os.environ.setdefault("SLACK_BOT_USER_ID", "UBENCHMARK")
+    os.environ.setdefault("OPEN_AI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("SLACK_UPDATE_INTERVAL_SECONDS", str(args.update_interval))
+    # The fake Slack server has no rate limit: the shared chat.update budget would only measure itself.
+    os.environ["SLACK_UPDATE_RATE_PER_MINUTE"] = str(args.update_rate)
+    import Quart_app
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    model = FakeChatModel(latency=args.llm_latency, chunk_delay=args.chunk_delay)
+    repo_dir = os.getcwd()
+    print(
+        f"{'rows':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ack p99':>8} {'req/s':>7} "
+        f"{'warm-up MB':>11} {'growth MB':>10} {'RSS MB':>8}   served"
+    )
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for rows in args.rows:
+                # The handler reads `data.csv` from the working directory.
+                data_dir = os.path.join(tmp, str(rows))
+                os.makedirs(data_dir)
+                write_learner_csv(os.path.join(data_dir, "data.csv"), rows)
+                os.chdir(data_dir)
+                try:
+                    result = await run_size(Quart_app, model, rows, args)
+                finally:
+                    os.chdir(repo_dir)
+                print(
+                    f"{rows:>10} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} "
+                    f"{result['ack_p99_ms']:>8.1f} {result['rps']:>7.1f} {result['warmup_mb']:>11.1f} "
+                    f"{result['growth_mb']:>10.1f} {result['rss_mb']:>8.1f}   {result['served']}"
+                )
+        print(f"Slack API calls: {dict(slack.calls)}")
+    finally:
+        await slack.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--requests", type=int, default=100, help="measured mentions per dataset size")
+    parser.add_argument("--concurrency", type=int, default=8, help="mentions in flight at the same time")
+    parser.add_argument("--warmup", type=int, default=len(QUESTIONS), help="unmeasured mentions sent first")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds before the fake model answers")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="seconds between streamed words")
+    parser.add_argument("--slack-latency", type=float, default=0.05, help="seconds per fake Slack API call")
+    parser.add_argument("--update-interval", type=float, default=0.2, help="SLACK_UPDATE_INTERVAL_SECONDS for the run")
+    parser.add_argument("--update-rate", type=float, default=0, help="SLACK_UPDATE_RATE_PER_MINUTE for the run (0: no budget)")
+    parser.add_argument("--repeat-questions", action="store_true", help="repeat the same questions (served by the answer cache)")
+    parser.add_argument("--verbose", action="store_true", help="keep the bot's INFO logs")
+    args = parser.parse_args()
+    args.offset = 0
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
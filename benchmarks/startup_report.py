@@ -0,0 +1,181 @@
+"""
+    Cold start report of the app served by hypercorn, for each STARTUP_MODE.
+
+    For every mode a fresh `hypercorn -w N Quart_app:stark` is started (with dummy Slack / OpenAI credentials
+    and a synthetic `data.csv`, so nothing leaves the machine). The report shows:
+        - how long it takes until `/health` first answers;
+        - how long until a worker reports its warm-up done;
+        - the resident memory (RSS) of every worker once it has settled, and of all processes together
+          (sandbox workers included).
+
+        python -m benchmarks.startup_report --modes eager background lazy --workers 4
+
+    Linux only (memory is read from /proc).
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.synthetic import write_learner_csv
+
+
+def rss_mb(pid: int) -> float:
+    """
+        Returns:
+            float: Resident memory of a process in MB (0 if it is gone).
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def children(pid: int) -> list:
+    """
+        Returns:
+            list: PIDs of the direct children of a process.
+    """
+    pids = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return pids
+
+
+def descendants(pid: int) -> list:
+    pids = children(pid)
+    return pids + [grandchild for child in pids for grandchild in descendants(child)]
+
+
+def is_worker(pid: int) -> bool:
+    # hypercorn starts its workers with the multiprocessing "spawn" method.
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"spawn_main" in f.read()
+    except OSError:
+        return False
+
+
+def health(port: int):
+    """
+        Returns:
+            dict: The `/health` response, or None if the server does not answer yet.
+    """
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+            return json.loads(response.read())
+    except OSError:
+        return None
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_mode(mode: str, data_dir: str, args) -> dict:
+    """
+        Starts the server in one startup mode, measures it and stops it.
+
+        Arguments:
+            mode (str): The STARTUP_MODE.
+            data_dir (str): Working directory of the server (holds data.csv).
+            args (argparse.Namespace): Benchmark settings.
+
+        Returns:
+            dict: Time to the first health check and to the warm-up, and worker memory.
+    """
+    port = free_port()
+    env = {
+        **os.environ,
+        "STARTUP_MODE": mode,
+        "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])),
+        "SLACK_BOT_TOKEN": os.environ.get("SLACK_BOT_TOKEN", "xoxb-benchmark"),
+        "SLACK_BOT_USER_ID": os.environ.get("SLACK_BOT_USER_ID", "UBENCHMARK"),
+        "OPEN_AI_API_KEY": os.environ.get("OPEN_AI_API_KEY", "sk-benchmark"),
+    }
+    if args.sandbox_workers is not None:
+        env["SANDBOX_WORKERS"] = str(args.sandbox_workers)
+    log_path = os.path.join(data_dir, f"hypercorn-{mode}.log")
+    with open(log_path, "w") as log:
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "hypercorn", "-w", str(args.workers), "-b", f"127.0.0.1:{port}", "Quart_app:stark"],
+            cwd=data_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    try:
+        healthy = warm = warm_up_seconds = None
+        deadline = started + args.timeout
+        while time.perf_counter() < deadline and server.poll() is None:
+            response = health(port)
+            if response is not None:
+                now = time.perf_counter() - started
+                healthy = healthy if healthy is not None else now
+                warm_up_seconds = response.get("startup", {}).get("warm_up_seconds")
+                if warm_up_seconds is not None or mode == "lazy":
+                    warm = now if mode != "lazy" else None
+                    break
+            time.sleep(0.01)
+        if healthy is None:
+            with open(log_path) as f:
+                raise RuntimeError(f"the server did not answer /health in {mode} mode:\n{f.read()[-2000:]}")
+
+        time.sleep(args.settle)
+        workers = [pid for pid in children(server.pid) if is_worker(pid)]
+        return {
+            "mode": mode,
+            "healthy_s": healthy,
+            "warm_s": warm,
+            "warm_up_s": warm_up_seconds,
+            "worker_mb": [rss_mb(pid) for pid in workers],
+            "total_mb": rss_mb(server.pid) + sum(rss_mb(pid) for pid in descendants(server.pid)),
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["eager", "background", "lazy"], choices=["eager", "background", "lazy"])
+    parser.add_argument("--workers", type=int, default=4, help="hypercorn worker processes")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows of the synthetic data.csv")
+    parser.add_argument("--sandbox-workers", type=int, default=None, help="SANDBOX_WORKERS for the run (default: as configured)")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait before reading the memory")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for the server")
+    args = parser.parse_args()
+
+    print(f"{'mode':>10} {'health s':>9} {'warm s':>7} {'warm-up s':>10} {'worker RSS MB':>28} {'total MB':>9}")
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_learner_csv(os.path.join(data_dir, "data.csv"), args.rows)
+        for mode in args.modes:
+            result = run_mode(mode, data_dir, args)
+            warm = "-" if result["warm_s"] is None else f"{result['warm_s']:.2f}"
+            warm_up = "-" if result["warm_up_s"] is None else f"{result['warm_up_s']:.2f}"
+            worker_mb = " ".join(f"{mb:.0f}" for mb in sorted(result["worker_mb"])) or "-"
+            print(
+                f"{mode:>10} {result['healthy_s']:>9.2f} {warm:>7} {warm_up:>10} {worker_mb:>28} {result['total_mb']:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+    Synthetic learner data following the `data.csv` schema, used to benchmark at sizes we do not have real exports for.
+"""
+import numpy as np
+import pandas as pd
+
+
+def generate_learner_data(n_rows: int, seed: int = 0, template_path: str = "data.csv") -> pd.DataFrame:
+    """
+        Generates learner rows by sampling the column values of the template CSV.
+
+        Each column is sampled independently from the template's distribution, so cardinalities and
+        value ranges match the real data while the number of rows can be anything.
+
+        Arguments:
+            n_rows (int): Number of rows to generate.
+            seed (int): Random seed, so runs are reproducible.
+            template_path (str): CSV file providing the schema and value distributions.
+
+        Returns:
+            pd.DataFrame: The synthetic learner data (all columns as read from the template).
+    """
+    rng = np.random.default_rng(seed)
+    template = pd.read_csv(template_path, dtype=str)
+    data = {}
+    for column in template.columns:
+        if column == "Learner ID":
+            # Keep learner IDs high cardinality like in real exports.
+            data[column] = [f"asuLearn{i:07d}" for i in rng.integers(0, max(n_rows // 3, 1), n_rows)]
+        else:
+            data[column] = rng.choice(template[column].to_numpy(), n_rows)
+    return pd.DataFrame(data, columns=template.columns)
+
+
+def write_learner_csv(path: str, n_rows: int, seed: int = 0) -> str:
+    """
+        Writes a synthetic learner CSV.
+
+        Arguments:
+            path (str): Destination file.
+            n_rows (int): Number of rows.
+            seed (int): Random seed.
+
+        Returns:
+            str: The path written.
+    """
+    generate_learner_data(n_rows, seed=seed).to_csv(path, index=False)
+    return path
@@ -0,0 +1,478 @@
+"""
+    Process-isolated, resource-limited execution of agent-generated pandas code.
+
+    The DataFrame agent (`allow_dangerous_code=True`) used to run LLM-written Python with `exec` inside the
+    server's own worker threads, so a pathological `df.apply` or cross join could hold the GIL (and memory)
+    and stall every other request. `SandboxPool` runs that code in a pool of pre-started worker processes:
+        1. The dataset version is published once as an uncompressed Feather (Arrow) file. Workers memory-map
+           it, so every worker shares the same pages and keeps the frame loaded for later calls.
+        2. Every call runs under a CPU-time limit (RLIMIT_CPU) and an address-space limit (RLIMIT_AS),
+           and the server side gives up after a wall-clock timeout.
+        3. A worker that dies or times out is killed and replaced; a runaway query costs one worker, not the service.
+
+    multiprocessing refuses to start children from a daemonic process, which every `hypercorn -w N` worker is.
+    There the workers are started with `subprocess` instead (`python -m code_sandbox`, talking to the pool
+    over an inherited socket), so the sandbox is also used in the production setup.
+
+    `SandboxedPythonTool` (in `sandbox_tool.py`, so neither the server's startup nor the workers import
+    langchain for it) replaces the agent's `python_repl_ast` tool (same name, description and arguments,
+    so the agent prompt is unchanged). It keeps one worker for an agent run, so variables defined by one
+    tool call are still available to the next, like in the in-process REPL.
+"""
+import ast
+import importlib.util
+import logging
+import multiprocessing
+import os
+import queue
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from io import StringIO
+
+
+# Sandbox configuration:
+# 1. SANDBOX_WORKERS:
+#    - Number of worker processes running agent code. Defaults to SLACK_BOT_MAX_WORKERS, so every
+#      concurrent agent run gets a worker. 0 disables the sandbox (agent code runs in-process).
+# 2. SANDBOX_CPU_SECONDS:
+#    - CPU time one tool call may use before its worker is killed.
+# 3. SANDBOX_MEMORY_MB:
+#    - Memory one tool call may allocate on top of what the worker already uses (a MemoryError is returned).
+# 4. SANDBOX_TIMEOUT_SECONDS:
+#    - Wall-clock time one tool call (or waiting for a free worker) may take.
+SANDBOX_WORKERS = int(os.environ.get("SANDBOX_WORKERS", os.environ.get("SLACK_BOT_MAX_WORKERS", "4")))
+SANDBOX_CPU_SECONDS = int(os.environ.get("SANDBOX_CPU_SECONDS", "20"))
+SANDBOX_MEMORY_MB = int(os.environ.get("SANDBOX_MEMORY_MB", "1024"))
+SANDBOX_TIMEOUT_SECONDS = float(os.environ.get("SANDBOX_TIMEOUT_SECONDS", "30"))
+
+
+class SandboxError(Exception):
+    """
+        Raised when a worker could not run a call (it was killed, timed out or none was free).
+    """
+
+
+def sandbox_supported() -> bool:
+    """
+        Returns:
+            bool: True if datasets can be shared with the workers (pyarrow installed) and limits enforced (Unix).
+    """
+    # Only looked up, not imported: pyarrow is loaded by the workers (and by the server on first publish).
+    if importlib.util.find_spec("pyarrow") is None:
+        logging.getLogger().warning("Agent code sandbox disabled: pyarrow is not installed, agent code runs in-process")
+        return False
+    if not hasattr(resource, "RLIMIT_CPU"):
+        logging.getLogger().warning("Agent code sandbox disabled: resource limits are not supported, agent code runs in-process")
+        return False
+    return True
+
+
+# Worker process side: these functions run inside the sandbox processes.
+
+def _read_frame(path: str):
+    """
+        Memory-maps a published dataset. Numeric columns without nulls are used by pandas without a copy.
+    """
+    from pyarrow import feather
+
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+
+
+def _address_space_bytes() -> int:
+    """
+        Returns:
+            int: Current virtual memory size of the process (0 if unknown).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+def _apply_limits(cpu_seconds: int, memory_mb: int):
+    """
+        Limits the next call to `cpu_seconds` more CPU time and `memory_mb` more address space.
+        RLIMIT_CPU counts the whole process lifetime, so the limit is moved forward before every call.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)
+    cpu_soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds + 1
+    if cpu_hard != resource.RLIM_INFINITY:
+        cpu_soft = min(cpu_soft, cpu_hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_soft, cpu_hard))
+
+    address_space = _address_space_bytes()
+    if address_space:
+        _, as_hard = resource.getrlimit(resource.RLIMIT_AS)
+        as_soft = address_space + memory_mb * 1024 ** 2
+        if as_hard != resource.RLIM_INFINITY:
+            as_soft = min(as_soft, as_hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (as_soft, as_hard))
+        except (ValueError, OSError):
+            pass  # Not enforceable on this platform (e.g. macOS); the CPU limit and timeout still apply.
+
+
+def _execute(query: str, namespace: dict) -> str:
+    """
+        Runs agent code like `PythonAstREPLTool._run`: every statement but the last is executed, the last one
+        is evaluated and its value (or the captured stdout) returned.
+    """
+    try:
+        tree = ast.parse(query)
+        exec(ast.unparse(ast.Module(tree.body[:-1], type_ignores=[])), namespace["globals"], namespace["locals"])
+        module_end = ast.unparse(ast.Module(tree.body[-1:], type_ignores=[]))
+        io_buffer = StringIO()
+        try:
+            with redirect_stdout(io_buffer):
+                ret = eval(module_end, namespace["globals"], namespace["locals"])
+            return io_buffer.getvalue() if ret is None else str(ret)
+        except Exception:
+            with redirect_stdout(io_buffer):
+                exec(module_end, namespace["globals"], namespace["locals"])
+            return io_buffer.getvalue()
+    except Exception as e:
+        return "{}: {}".format(type(e).__name__, str(e))
+
+
+def _worker_main(conn, cpu_seconds: int, memory_mb: int):
+    """
+        Main loop of a worker process. Messages are ("session", dataset path), ("run", code) or ("stop",).
+    """
+    import pandas as pd
+
+    # The frame is backed by a read-only memory map: modifications made by agent code are private copies.
+    pd.set_option("mode.copy_on_write", True)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C stops the server, which stops its workers.
+    frames = OrderedDict()  # dataset path -> frame, the most recent versions stay loaded
+    namespace = None
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        kind = message[0]
+        if kind == "stop":
+            return
+        if kind == "session":
+            path = message[1]
+            try:
+                if path not in frames:
+                    frames[path] = _read_frame(path)
+                    while len(frames) > 2:
+                        frames.popitem(last=False)
+                frames.move_to_end(path)
+            except Exception as e:
+                conn.send(("error", f"could not load the dataset --- {e}"))
+                continue
+            namespace = {"globals": {}, "locals": {"df": frames[path].copy(deep=False)}}
+            conn.send(("ok", ""))
+        elif kind == "run":
+            _apply_limits(cpu_seconds, memory_mb)
+            conn.send(("ok", _execute(message[1], namespace)))
+
+
+# Server side: the pool and the agent tool, used by the Slack bot process.
+
+class _WorkerProcess:
+    """
+        A `subprocess.Popen` worker with the part of the `multiprocessing.Process` interface the pool uses.
+    """
+
+    def __init__(self, popen: subprocess.Popen) -> None:
+        self.popen = popen
+
+    @property
+    def exitcode(self):
+        return self.popen.poll()
+
+    def is_alive(self) -> bool:
+        return self.popen.poll() is None
+
+    def kill(self):
+        self.popen.kill()
+
+    def join(self, timeout: float = None):
+        try:
+            self.popen.wait(timeout)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+class SandboxWorker:
+    def __init__(self, context, cpu_seconds: int, memory_mb: int) -> None:
+        """
+            Starts one worker process.
+
+            Arguments:
+                context: The multiprocessing context used to start the process, or None to start it with
+                    `subprocess` (from a daemonic process).
+                cpu_seconds (int): CPU time limit per call.
+                memory_mb (int): Extra memory allowed per call.
+        """
+        if context is None:
+            # The worker inherits its end of the socket pair; it exits when the server's end is closed.
+            self.conn, child_conn = multiprocessing.Pipe()
+            fd = child_conn.fileno()
+            self.process = _WorkerProcess(subprocess.Popen(
+                [sys.executable, "-m", __name__, str(fd), str(cpu_seconds), str(memory_mb)],
+                pass_fds=[fd], stdin=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__)),
+            ))
+        else:
+            self.conn, child_conn = context.Pipe()
+            self.process = context.Process(
+                target=_worker_main, args=(child_conn, cpu_seconds, memory_mb), name="agent-sandbox", daemon=True
+            )
+            self.process.start()
+        child_conn.close()
+        self.session_path = None
+
+    def call(self, message: tuple, timeout: float) -> str:
+        """
+            Sends a message to the worker and waits for its answer.
+
+            Raises:
+                SandboxError: If the worker failed the call, died or did not answer in time (it is then killed).
+        """
+        try:
+            self.conn.send(message)
+            if not self.conn.poll(timeout):
+                self.kill()
+                raise SandboxError(f"the code did not finish within {timeout:.0f}s")
+            status, result = self.conn.recv()
+        except (EOFError, OSError, BrokenPipeError):
+            self.process.join(1)
+            exitcode = self.process.exitcode
+            self.kill()
+            if exitcode == -signal.SIGXCPU:
+                raise SandboxError("the code exceeded its CPU time limit")
+            raise SandboxError(f"the worker stopped unexpectedly (exit code {exitcode})")
+        if status != "ok":
+            raise SandboxError(result)
+        return result
+
+    def kill(self):
+        """
+            Stops the worker process right away.
+        """
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+    def stop(self):
+        """
+            Asks the worker process to exit, killing it if it does not.
+        """
+        try:
+            self.conn.send(("stop",))
+            self.process.join(2)
+        except (OSError, BrokenPipeError):
+            pass
+        self.kill()
+
+
+class SandboxPool:
+    def __init__(
+        self,
+        workers: int = SANDBOX_WORKERS,
+        cpu_seconds: int = SANDBOX_CPU_SECONDS,
+        memory_mb: int = SANDBOX_MEMORY_MB,
+        timeout: float = SANDBOX_TIMEOUT_SECONDS,
+    ) -> None:
+        """
+            Initializes the SandboxPool. Workers are started by `start()` (or on first use).
+
+            Arguments:
+                workers (int): Number of worker processes.
+                cpu_seconds (int): CPU time limit per call.
+                memory_mb (int): Extra memory allowed per call.
+                timeout (float): Wall-clock limit per call and for waiting on a free worker.
+        """
+        self.logger = logging.getLogger()
+        self.worker_count = workers
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+        # forkserver starts workers from a clean process (not a copy of the threaded server) and forks
+        # replacements quickly; spawn is the fallback where it is not available. A daemonic process
+        # (a `hypercorn -w N` worker) may not use either, its workers are started with `subprocess`.
+        if multiprocessing.current_process().daemon:
+            self._context = None
+        else:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._context = multiprocessing.get_context(method)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._data_dir = None
+        self._published = {}  # dataset fingerprint -> path of its Feather file
+
+        self.calls = 0
+        self.failures = 0
+        self.restarts = 0
+
+    def start(self):
+        """
+            Starts the worker processes (once).
+        """
+        with self._lock:
+            if self._started:
+                return
+            if self._context is not None and self._context.get_start_method() == "forkserver":
+                self._context.set_forkserver_preload(["pandas", "pyarrow.feather", __name__])
+            self._data_dir = tempfile.mkdtemp(prefix="stark-sandbox-")
+            for _ in range(self.worker_count):
+                self._idle.put(self._new_worker())
+            self._started = True
+        self.logger.info(
+            f"Sandbox pool started with {self.worker_count} {'subprocess' if self._context is None else 'multiprocessing'} workers "
+            f"(cpu {self.cpu_seconds}s, memory {self.memory_mb} MB, timeout {self.timeout:.0f}s per call)"
+        )
+
+    def shutdown(self):
+        """
+            Stops every idle worker and removes the published datasets.
+        """
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+        shutil.rmtree(self._data_dir, ignore_errors=True)
+
+    def publish(self, dataset) -> str:
+        """
+            Writes a dataset version to a memory-mappable Feather file shared with the workers (once per version).
+
+            Arguments:
+                dataset (Dataset): The dataset snapshot.
+
+            Returns:
+                str: Path of the published file.
+        """
+        self.start()
+        with self._lock:
+            path = self._published.get(dataset.fingerprint)
+            if path is None:
+                path = os.path.join(self._data_dir, f"{dataset.fingerprint}.feather")
+                tmp_path = f"{path}.tmp"
+                dataset.frame.reset_index(drop=True).to_feather(tmp_path, compression="uncompressed")
+                os.replace(tmp_path, path)
+                self._published[dataset.fingerprint] = path
+        return path
+
+    def invalidate(self, fingerprint: str):
+        """
+            Removes the published file of a dataset version that is no longer current.
+            Workers still mapping it keep their pages until they load the next version.
+
+            Arguments:
+                fingerprint (str): Fingerprint of the old dataset version.
+        """
+        with self._lock:
+            path = self._published.pop(fingerprint, None)
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+    def lease(self, dataset_path: str) -> SandboxWorker:
+        """
+            Takes a free worker and starts a new session on a dataset (a fresh `df`, no variables).
+
+            Arguments:
+                dataset_path (str): Path returned by `publish()`.
+
+            Returns:
+                SandboxWorker: The worker, used by the caller only until `release()`.
+
+            Raises:
+                SandboxError: If no worker became free in time, or the session could not be started.
+        """
+        self.start()
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise SandboxError(f"no sandbox worker became free within {self.timeout:.0f}s")
+        try:
+            worker.call(("session", dataset_path), self.timeout)
+        except SandboxError:
+            self.release(worker)
+            raise
+        worker.session_path = dataset_path
+        return worker
+
+    def release(self, worker: SandboxWorker, broken: bool = False):
+        """
+            Gives a worker back to the pool, replacing it if it was killed.
+        """
+        if broken or not worker.process.is_alive():
+            worker.kill()
+            self.restarts += 1
+            if not self._started:
+                return
+            worker = self._new_worker()
+        worker.session_path = None
+        if self._started:
+            self._idle.put(worker)
+        else:
+            worker.stop()
+
+    def run(self, worker: SandboxWorker, code: str) -> str:
+        """
+            Runs agent code in a leased worker.
+
+            Arguments:
+                worker (SandboxWorker): A worker returned by `lease()`.
+                code (str): The Python code.
+
+            Returns:
+                str: The value of the last expression or the printed output (errors included, as text).
+
+            Raises:
+                SandboxError: If the worker was killed (limit exceeded or timeout).
+        """
+        self.calls += 1
+        try:
+            return worker.call(("run", code), self.timeout)
+        except SandboxError:
+            self.failures += 1
+            raise
+
+    def stats(self) -> dict:
+        """
+            Returns the pool counters.
+
+            Returns:
+                dict: Number of workers, idle workers, calls, failed calls and worker restarts.
+        """
+        return {
+            "workers": self.worker_count,
+            "idle": self._idle.qsize(),
+            "calls": self.calls,
+            "failures": self.failures,
+            "restarts": self.restarts,
+        }
+
+    def _new_worker(self) -> SandboxWorker:
+        return SandboxWorker(self._context, self.cpu_seconds, self.memory_mb)
+
+
+if __name__ == "__main__":
+    # Entry point of the workers started with `subprocess`: file descriptor of the socket, CPU and memory limits.
+    from multiprocessing.connection import Connection
+
+    fd, cpu_seconds, memory_mb = (int(argument) for argument in sys.argv[1:4])
+    _worker_main(Connection(fd), cpu_seconds, memory_mb)
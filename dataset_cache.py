@@ -0,0 +1,176 @@
+"""
+    Versioned in-memory cache for the learner dataset.
+
+    Re-parsing the CSV on every Slack mention is wasted work: the source file changes rarely,
+    but every question paid the full `pd.read_csv` cost. `DatasetCache` keeps the last loaded
+    DataFrame in memory together with a cheap "version" of its source (file mtime/size for a
+    local CSV, ETag/LastModified for an S3 object) and only reloads when that version changes.
+
+    Hit / miss / reload counters are kept so the behaviour can be confirmed in production logs.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """
+        An immutable snapshot of one loaded version of a data source.
+
+        Attributes:
+            frame (pd.DataFrame): The loaded learner data. Treat it as read-only, it is shared between requests.
+            version (Hashable): The source version the frame was loaded from (e.g. mtime/size or ETag).
+            fingerprint (str): Short stable hash of source name + version, usable as a cache key.
+            loaded_at (float): Unix timestamp of when this version was loaded.
+            cube (RollupCube): Pre-aggregated rollups of the frame, built at load time (None if not configured).
+    """
+
+    frame: Any
+    version: Hashable
+    fingerprint: str
+    loaded_at: float
+    cube: Any = None
+
+
+def file_version(file_path: str):
+    """
+        Returns a cheap version marker for a local file: its modification time and size.
+
+        Arguments:
+            file_path (str): Path of the file to inspect.
+
+        Returns:
+            tuple: (mtime_ns, size) of the file.
+    """
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def s3_object_version(s3_client, bucket: str, key: str):
+    """
+        Returns a cheap version marker for an S3 object using a HEAD request (no body download).
+
+        Arguments:
+            s3_client: A boto3 S3 client.
+            bucket (str): Name of the S3 bucket.
+            key (str): Key of the object inside the bucket.
+
+        Returns:
+            tuple: (ETag, LastModified) of the object.
+    """
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    return (head.get("ETag"), str(head.get("LastModified")))
+
+
+class DatasetCache:
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], Hashable],
+        loader: Callable[[], Any],
+        cube_builder: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        """
+            Initializes the DatasetCache.
+
+            Arguments:
+                name (str): Human readable name of the source (file path or s3 key), used in logs and fingerprints.
+                probe (callable): Returns the current version of the source without loading it.
+                loader (callable): Loads the source and returns a pandas DataFrame.
+                cube_builder (callable): Optional, builds pre-aggregated rollups from a freshly loaded frame.
+        """
+        self.logger = logging.getLogger()
+        self.name = name
+        self._probe = probe
+        self._loader = loader
+        self._cube_builder = cube_builder
+        self._lock = threading.Lock()  # Only one thread (re)loads at a time, others wait for its result.
+        self._dataset: Optional[Dataset] = None
+        self._listeners = []  # Called with (previous, current) Dataset whenever a new version is loaded.
+
+        # Counters exposed through `stats()`:
+        # - hits: the cached version was still current
+        # - misses: nothing was cached yet, so the source had to be loaded
+        # - reloads: the source changed since the last load and was loaded again
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def get(self) -> Dataset:
+        """
+            Returns the current dataset, loading or reloading it only when the source version changed.
+
+            Returns:
+                Dataset: The cached (or freshly loaded) dataset snapshot.
+        """
+        version = self._probe()
+        dataset = self._dataset
+        if dataset is not None and dataset.version == version:
+            with self._lock:
+                self.hits += 1
+            return dataset
+
+        with self._lock:
+            # Another thread may have loaded the same version while we waited for the lock.
+            dataset = self._dataset
+            if dataset is not None and dataset.version == version:
+                self.hits += 1
+                return dataset
+
+            started = time.perf_counter()
+            frame = self._loader()
+            self._dataset = Dataset(
+                frame=frame,
+                version=version,
+                fingerprint=self.fingerprint(version),
+                loaded_at=time.time(),
+                cube=self._cube_builder(frame) if self._cube_builder else None,
+            )
+            if dataset is None:
+                self.misses += 1
+            else:
+                self.reloads += 1
+            self.logger.info(
+                f"Dataset {self.name} loaded in {time.perf_counter() - started:.3f}s "
+                f"(version={version}) --- {self.stats()}"
+            )
+            if dataset is not None:
+                for listener in self._listeners:
+                    listener(dataset, self._dataset)
+            return self._dataset
+
+    def add_listener(self, listener: Callable[[Dataset, Dataset], None]):
+        """
+            Registers a callback invoked when the source is reloaded with a new version,
+            e.g. to invalidate results computed from the previous version.
+
+            Arguments:
+                listener (callable): Called with (previous, current) Dataset.
+        """
+        self._listeners.append(listener)
+
+    def fingerprint(self, version: Hashable) -> str:
+        """
+            Builds a short, stable fingerprint for a given version of this source.
+
+            Arguments:
+                version (Hashable): The version marker returned by the probe.
+
+            Returns:
+                str: A 16 character hex digest.
+        """
+        return hashlib.sha1(f"{self.name}:{version}".encode("utf-8")).hexdigest()[:16]
+
+    def stats(self) -> dict:
+        """
+            Returns the cache counters.
+
+            Returns:
+                dict: hits, misses and reloads counts.
+        """
+        return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads}
@@ -0,0 +1,235 @@
+"""
+    Registry of the datasets the bot can answer questions about.
+
+    The handler used to be wired to a single source (`data.csv`, or the "Learner Data.csv" S3 object).
+    `DatasetRegistry` knows several sources, picks one per mention (by a keyword in the question, then by
+    channel, then the default) and loads each source lazily on first use. Loaded datasets are kept in memory
+    while they fit a total memory budget, measured with `memory_usage(deep=True)` of every frame; beyond it
+    the least recently used datasets are evicted. Sources marked `preload` are loaded at startup.
+
+    Sources are configured in a JSON file (DATASETS_CONFIG), e.g.:
+
+        {
+            "default": "learners",
+            "datasets": [
+                {"name": "learners", "path": "data.csv", "keywords": ["learner", "learners"], "preload": true},
+                {"name": "learners-s3", "s3_bucket": "starkslackbot", "s3_key": "Learner Data.csv", "channels": ["C0123456789"]},
+                {"name": "surveys", "path": "surveys.csv", "schema": "generic", "keywords": ["survey"]}
+            ]
+        }
+
+    Without a config file, the registry serves `data.csv` only, as before.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Tuple
+
+
+# Dataset registry configuration:
+# 1. DATASETS_CONFIG:
+#    - JSON file listing the datasets (see above). Defaults to datasets.json; if it does not exist, only data.csv is served.
+# 2. DATASET_MEMORY_BUDGET_MB:
+#    - Total memory the loaded datasets may use before the least recently used ones are evicted.
+DATASETS_CONFIG = os.environ.get("DATASETS_CONFIG", "datasets.json")
+DATASET_MEMORY_BUDGET_MB = float(os.environ.get("DATASET_MEMORY_BUDGET_MB", "2048"))
+
+
+@dataclass(frozen=True)
+class DatasetSource:
+    """
+        One configured dataset.
+
+        Attributes:
+            name (str): Unique name of the dataset.
+            path (str): Local CSV file (for local sources).
+            s3_bucket (str): S3 bucket (for S3 sources).
+            s3_key (str): Key of the CSV object (for S3 sources).
+            channels (tuple): Slack channel IDs whose mentions are answered from this dataset.
+            keywords (tuple): Words that select this dataset when they appear in the question.
+            schema (str): "learner" (learner data types, rollup cube and fast path) or "generic" (plain CSV).
+            preload (bool): Load the dataset at startup instead of on first use.
+    """
+
+    name: str
+    path: str = ""
+    s3_bucket: str = ""
+    s3_key: str = ""
+    channels: Tuple[str, ...] = field(default=())
+    keywords: Tuple[str, ...] = field(default=())
+    schema: str = "learner"
+    preload: bool = False
+
+    @property
+    def is_s3(self) -> bool:
+        return bool(self.s3_key)
+
+
+def load_dataset_sources(config_path: str = DATASETS_CONFIG):
+    """
+        Reads the configured datasets.
+
+        Arguments:
+            config_path (str): Path of the JSON configuration file.
+
+        Returns:
+            tuple: (list of DatasetSource, name of the default dataset).
+    """
+    if not config_path or not os.path.exists(config_path):
+        return [DatasetSource(name="learners", path="data.csv", preload=True)], "learners"
+
+    with open(config_path) as f:
+        config = json.load(f)
+    sources = []
+    for entry in config.get("datasets", []):
+        entry = dict(entry)
+        entry["channels"] = tuple(entry.get("channels", ()))
+        entry["keywords"] = tuple(entry.get("keywords", ()))
+        source = DatasetSource(**entry)
+        if not source.path and not source.is_s3:
+            raise ValueError(f"Dataset {source.name} needs a path or an s3_key")
+        if source.is_s3 and source.schema != "learner":
+            raise ValueError(f"Dataset {source.name}: only learner data can be loaded from S3")
+        sources.append(source)
+    if not sources:
+        raise ValueError(f"No datasets configured in {config_path}")
+    return sources, config.get("default", sources[0].name)
+
+
+class DatasetRegistry:
+    def __init__(
+        self,
+        sources: list,
+        load: Callable[[DatasetSource], Any],
+        evict: Callable[[DatasetSource, Any], None],
+        default: Optional[str] = None,
+        memory_budget_mb: float = DATASET_MEMORY_BUDGET_MB,
+    ) -> None:
+        """
+            Initializes the DatasetRegistry.
+
+            Arguments:
+                sources (list): The configured DatasetSource objects.
+                load (callable): Returns the current Dataset of a source (loading it if needed), or None on failure.
+                evict (callable): Drops everything kept in memory for a source, called with (source, Dataset).
+                default (str): Name of the dataset used when no keyword or channel matches. Defaults to the first source.
+                memory_budget_mb (float): Total memory budget of the loaded datasets.
+        """
+        self.logger = logging.getLogger()
+        self.sources = OrderedDict((source.name, source) for source in sources)
+        self.default = default or sources[0].name
+        if self.default not in self.sources:
+            raise ValueError(f"Default dataset {self.default} is not configured")
+        self._load = load
+        self._evict = evict
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 ** 2)
+        self._loaded = OrderedDict()  # dataset name -> (Dataset, memory bytes), least recently used first
+        self._lock = threading.Lock()
+        self._keyword_patterns = [
+            (re.compile(rf"\b{re.escape(keyword)}\b", re.IGNORECASE), source.name)
+            for source in sources
+            for keyword in source.keywords
+        ]
+        self.evictions = 0
+
+    def resolve(self, channel_id: str, text: str) -> DatasetSource:
+        """
+            Picks the dataset a mention is about: a keyword in the question wins, then the channel, then the default.
+
+            Arguments:
+                channel_id (str): The channel of the mention.
+                text (str): The question.
+
+            Returns:
+                DatasetSource: The selected dataset.
+        """
+        for pattern, name in self._keyword_patterns:
+            if pattern.search(text or ""):
+                return self.sources[name]
+        for source in self.sources.values():
+            if channel_id and channel_id in source.channels:
+                return source
+        return self.sources[self.default]
+
+    def get(self, name: str):
+        """
+            Returns the current version of a dataset, loading it on first use, and evicts the least
+            recently used datasets if the loaded ones no longer fit the memory budget.
+
+            Arguments:
+                name (str): Name of the dataset.
+
+            Returns:
+                Dataset: The dataset, or None if it could not be loaded.
+        """
+        source = self.sources[name]
+        dataset = self._load(source)
+        if dataset is None:
+            return None
+
+        with self._lock:
+            loaded = self._loaded.get(name)
+            if loaded is None or loaded[0].fingerprint != dataset.fingerprint:
+                # Deep memory usage scans string columns, so it is only measured once per version.
+                self._loaded[name] = (dataset, int(dataset.frame.memory_usage(deep=True).sum()))
+            self._loaded.move_to_end(name)
+            evicted = self._over_budget(keep=name)
+
+        for evicted_name, (evicted_dataset, memory_bytes) in evicted:
+            self._evict(self.sources[evicted_name], evicted_dataset)
+            self.logger.info(f"Dataset {evicted_name} evicted ({memory_bytes / 1024 ** 2:.1f} MB) --- {self.stats()}")
+        return dataset
+
+    def preload(self):
+        """
+            Loads every dataset marked `preload` (as long as they fit the memory budget).
+        """
+        for source in self.sources.values():
+            if source.preload:
+                if self.get(source.name) is None:
+                    self.logger.info(f"Dataset {source.name} could not be preloaded")
+
+    def stats(self) -> dict:
+        """
+            Returns the registry statistics.
+
+            Returns:
+                dict: Configured and loaded datasets, memory used and budget (MB), and evictions.
+        """
+        with self._lock:
+            used = sum(memory_bytes for _, memory_bytes in self._loaded.values())
+            loaded = len(self._loaded)
+        return {
+            "datasets": len(self.sources),
+            "loaded": loaded,
+            "memory_mb": used / 1024 ** 2,
+            "memory_budget_mb": self.memory_budget_bytes / 1024 ** 2,
+            "evictions": self.evictions,
+        }
+
+    def _over_budget(self, keep: str) -> list:
+        """
+            Removes least recently used datasets until the loaded ones fit the budget. Called with the lock held.
+            The dataset just requested is never evicted, even if it alone exceeds the budget.
+
+            Returns:
+                list: (name, (Dataset, memory bytes)) of the evicted datasets.
+        """
+        evicted = []
+        used = sum(memory_bytes for _, memory_bytes in self._loaded.values())
+        for name in list(self._loaded):
+            if used <= self.memory_budget_bytes:
+                break
+            if name == keep:
+                continue
+            entry = self._loaded.pop(name)
+            used -= entry[1]
+            evicted.append((name, entry))
+            self.evictions += 1
+        if used > self.memory_budget_bytes:
+            self.logger.info(f"Dataset {keep} alone exceeds the memory budget ({used / 1024 ** 2:.1f} MB)")
+        return evicted
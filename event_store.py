@@ -0,0 +1,152 @@
+"""
+    Idempotency store for Slack events.
+
+    Slack re-sends an event when it does not get an acknowledgement quickly enough, and every
+    re-delivery used to trigger another full agent run and LLM call. The stores below remember which
+    event IDs were already accepted, for a bounded amount of time, so duplicates can be dropped
+    before any background work starts.
+
+    Two backends are available:
+        - InMemoryEventStore: a TTL-bounded LRU dict, private to one process.
+        - SQLiteEventStore: a local SQLite file, shared by every hypercorn worker on the same host.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# Event store configuration:
+# 1. SLACK_EVENT_STORE:
+#    - Which backend to use: "memory" (default) or "sqlite".
+# 2. SLACK_EVENT_STORE_PATH:
+#    - Location of the SQLite file when the sqlite backend is used.
+# 3. SLACK_EVENT_TTL_SECONDS:
+#    - How long an event ID is remembered. Slack retries within minutes, so one hour is plenty.
+# 4. SLACK_EVENT_MAX_ENTRIES:
+#    - Upper bound on the number of remembered event IDs for the in-memory backend.
+EVENT_STORE_BACKEND = os.environ.get("SLACK_EVENT_STORE", "memory")
+EVENT_STORE_PATH = os.environ.get("SLACK_EVENT_STORE_PATH", "slack_events.sqlite3")
+EVENT_TTL_SECONDS = float(os.environ.get("SLACK_EVENT_TTL_SECONDS", "3600"))
+EVENT_MAX_ENTRIES = int(os.environ.get("SLACK_EVENT_MAX_ENTRIES", "10000"))
+
+
+class InMemoryEventStore:
+    def __init__(self, ttl_seconds: float = EVENT_TTL_SECONDS, max_entries: int = EVENT_MAX_ENTRIES) -> None:
+        """
+            Initializes the in-process event store.
+
+            Arguments:
+                ttl_seconds (float): How long an event ID is remembered.
+                max_entries (int): Maximum number of event IDs kept; the oldest are evicted first.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._seen = OrderedDict()  # event_id -> time it was first seen, oldest first
+        self._lock = threading.Lock()
+
+    def mark_seen(self, event_id: str) -> bool:
+        """
+            Records an event ID.
+
+            Arguments:
+                event_id (str): The Slack event ID.
+
+            Returns:
+                bool: True if the event is new, False if it was already seen within the TTL.
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Drop expired entries from the old end of the dict.
+            while self._seen:
+                _, seen_at = next(iter(self._seen.items()))
+                if now - seen_at < self.ttl_seconds:
+                    break
+                self._seen.popitem(last=False)
+
+            # A duplicate stays where it is: the dict must stay in first-seen order for the expiry above.
+            if event_id in self._seen:
+                return False
+
+            self._seen[event_id] = now
+            if len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+            return True
+
+
+class SQLiteEventStore:
+    def __init__(self, path: str = EVENT_STORE_PATH, ttl_seconds: float = EVENT_TTL_SECONDS, timeout: float = 1.0) -> None:
+        """
+            Initializes the SQLite backed event store.
+
+            `mark_seen` blocks on the file lock, so it is called from a worker thread, never on the event loop.
+
+            Arguments:
+                path (str): Location of the SQLite file. Processes using the same file share the seen events.
+                ttl_seconds (float): How long an event ID is remembered.
+                timeout (float): Time to wait for another process's write lock; well within Slack's 3s ack window.
+        """
+        self.logger = logging.getLogger()
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        # WAL lets several worker processes read and write the file concurrently.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_events (event_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS seen_events_seen_at ON seen_events (seen_at)")
+
+    def mark_seen(self, event_id: str) -> bool:
+        """
+            Records an event ID.
+
+            Arguments:
+                event_id (str): The Slack event ID.
+
+            Returns:
+                bool: True if the event is new, False if it was already seen within the TTL. If the file stays
+                    locked past the timeout the event is treated as new: answering twice beats not answering.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                # Expired events are swept at most once a minute, so most calls take a single write.
+                if now - self._last_sweep >= 60:
+                    self._conn.execute("DELETE FROM seen_events WHERE seen_at < ?", (now - self.ttl_seconds,))
+                    self._last_sweep = now
+                # The primary key makes the insert atomic across processes: only the first one succeeds.
+                # An expired row not swept yet is replaced, so the event counts as new again.
+                cursor = self._conn.execute(
+                    "INSERT INTO seen_events (event_id, seen_at) VALUES (?, ?) "
+                    "ON CONFLICT (event_id) DO UPDATE SET seen_at = excluded.seen_at WHERE seen_at < ?",
+                    (event_id, now, now - self.ttl_seconds),
+                )
+                return cursor.rowcount == 1
+            except sqlite3.OperationalError as e:
+                self.logger.info(f"Error occured at recording Slack event {event_id} --- {e}")
+                return True
+
+    def close(self):
+        """
+            Closes the SQLite connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+def create_event_store():
+    """
+        Creates the event store configured through the SLACK_EVENT_STORE environment variable.
+
+        Returns:
+            InMemoryEventStore | SQLiteEventStore: The configured event store.
+    """
+    if EVENT_STORE_BACKEND == "sqlite":
+        logging.getLogger().info(f"Using SQLite event store at {EVENT_STORE_PATH}")
+        return SQLiteEventStore()
+    return InMemoryEventStore()
@@ -0,0 +1,308 @@
+"""
+    Deterministic pandas fast path for common aggregate questions.
+
+    Most questions asked to the bot are simple group-by / pivot queries over the fixed learner schema:
+    pass rate, average grade and counts of verified / credit converted learners, broken down by
+    platform, course, term or academic year. Sending those through the LLM DataFrame agent costs
+    several seconds and tokens for an answer pandas can compute in milliseconds.
+
+    `FastPath` recognises these question shapes with a small rule based intent matcher and answers them
+    from the dataset's pre-aggregated rollup cube (or a vectorized `groupby` on the raw rows). Anything it does not fully understand returns None,
+    so the caller falls back to the agent.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import pandas as pd
+
+from rollup_cube import aggregate
+
+
+@dataclass(frozen=True)
+class Metric:
+    """
+        An aggregate the fast path knows how to compute.
+
+        Attributes:
+            label (str): Column header used in the answer table.
+            column (str): Source column in the learner data (None counts rows).
+            aggfunc (str): pandas aggregation ("mean", "sum" or "count").
+            scale (float): Multiplier applied to the result (100 turns a 0/1 mean into a percentage).
+            pattern (str): Regex matching the metric in a (lower cased) question.
+    """
+
+    label: str
+    column: Optional[str]
+    aggfunc: str
+    scale: float
+    pattern: str
+
+
+# Metrics recognised in questions. The order is the order of the columns in multi-metric answers.
+METRICS = {
+    "pass_rate": Metric("Pass Rate (%)", "Passed", "mean", 100.0, r"\bpass(?:ing)?\s*(?:rate|percentage|%)"),
+    "avg_grade": Metric("Average Grade", "Grade", "mean", 1.0, r"\b(?:average|avg|mean)\s+grades?\b"),
+    "verified": Metric("Verified", "Verified", "sum", 1.0, r"\bverified\b"),
+    "credit_converted": Metric("Credit Converted", "Credit Converted", "sum", 1.0, r"\bcredits?\s*conver(?:ts?|ted|sions?)\b"),
+    "learners": Metric(
+        "Learners", None, "count", 1.0,
+        r"\b(?:how many|number of|count of|total)\s+(?:learners|students|enrol+ments)\b|\benrol+ments\b",
+    ),
+}
+
+# Labels of the metrics that are counts: only these may be added up across the rows of a table.
+COUNT_LABELS = frozenset(metric.label for metric in METRICS.values() if metric.aggfunc in ("sum", "count"))
+
+# Dimensions the answers can be broken down by, with the phrases that name them.
+# Longer phrases come first so "course name" is not read as "course".
+DIMENSIONS = [
+    ("Course Prefix", r"course\s+prefix(?:es)?|prefix(?:es)?|course\s+codes?"),
+    ("Course Name", r"course\s+names?|courses?|subjects?"),
+    ("Platform", r"platforms?"),
+    ("Term", r"terms?"),
+    ("AY", r"ay|academic\s+years?|years?"),
+]
+
+# Columns whose values can be used to filter a question, e.g. "for AY24" or "on Online".
+FILTER_COLUMNS = ["AY", "Term", "Platform", "Course Prefix", "Course Name"]
+
+# Phrases introducing the dimensions of a breakdown: "by platform", "per term", "for each AY", "platform wise".
+GROUPING_PATTERN = re.compile(r"\b(?:by|per|across|for\s+(?:each|every)|each|every)\b")
+
+# Questions that need more than a plain aggregate (rankings, comparisons, trends, conditions...)
+# are left to the agent.
+UNSUPPORTED_PATTERN = re.compile(
+    r"\b(?:why|trend|correlat\w*|predict\w*|compare|comparison|distribution|median|top|bottom|highest|"
+    r"lowest|best|worst|most|least|difference|change|growth|increase|decrease|between|more than|"
+    r"less than|greater|above|below|except|excluding|not|without|ratio|std|variance|"
+    # Conditions on the outcome ("learners who passed") and calendar years / seasons ("in 2024",
+    # "Fall term") are not columns of the learner data; answering without them would be wrong.
+    r"passed|failed|failing|fail|fails|dropped|completed|fall|spring|summer|winter|autumn|\d{4})\b|[<>=]"
+)
+
+# Words a simple aggregate question may contain besides its metrics, dimensions and filters.
+# Any other word means the question says something the matcher did not understand.
+STOPWORDS = frozenset(
+    "a all an and are as at be breakdown broken by can count could data dataset display do does down each every "
+    "find for get give has have how i in is it know learner learners list many me my number of on overall per "
+    "please rate s see show split student students table tell the there this to total us want we what whats "
+    "wise with would you".split()
+)
+
+
+@dataclass
+class Intent:
+    """
+        A recognised aggregate question.
+
+        Attributes:
+            metrics (list): Keys of METRICS to compute.
+            dimensions (list): Columns to group by (at most two; the second one becomes the pivot columns).
+            filters (dict): Column -> value equality filters applied before aggregating.
+    """
+
+    metrics: List[str]
+    dimensions: List[str] = field(default_factory=list)
+    filters: dict = field(default_factory=dict)
+
+
+def match_intent(text: str, filter_values: dict) -> Optional[Intent]:
+    """
+        Recognises a simple aggregate question.
+
+        Arguments:
+            text (str): The user's question.
+            filter_values (dict): Column -> known values of that column, used to detect filters.
+
+        Returns:
+            Intent: The recognised intent, or None if the question is not a simple aggregate.
+    """
+    lowered = text.lower()
+    if UNSUPPORTED_PATTERN.search(lowered):
+        return None
+    # Parts of the question that were understood are blanked out here; whatever is left must be stopwords.
+    remaining = list(lowered)
+
+    def consume(match, offset=0):
+        remaining[offset + match.start():offset + match.end()] = " " * (match.end() - match.start())
+
+    metrics = []
+    for key, metric in METRICS.items():
+        for match in re.finditer(metric.pattern, lowered):
+            consume(match)
+            if key not in metrics:
+                metrics.append(key)
+    if not metrics:
+        return None
+
+    # Filters: known column values mentioned in the question ("AY24", "Online", "CHM-300", ...).
+    # Course names are short codes ("ENG", "MAT") so they must appear exactly as written to avoid false matches.
+    filters = {}
+    for column in FILTER_COLUMNS:
+        for value in filter_values.get(column, []):
+            value = str(value)
+            haystack, needle = (text, value) if column == "Course Name" else (lowered, value.lower())
+            match = re.search(rf"(?<![\w-]){re.escape(needle)}(?![\w-])", haystack)
+            if match:
+                if column in filters:
+                    return None  # Several values of one column ("AY23 and AY24") is a comparison.
+                filters[column] = value
+                consume(match)
+
+    # Dimensions: named after a grouping keyword ("by platform and term") or as "<dimension> wise".
+    dimensions = []
+    grouping = GROUPING_PATTERN.search(lowered)
+    segments = [(grouping.end(), lowered[grouping.end():])] if grouping else []
+    segments += [(match.start(1), match.group(1)) for match in re.finditer(r"([\w ]+?)[\s-]wise\b", lowered)]
+    for offset, segment in segments:
+        found = []
+        for column, pattern in DIMENSIONS:
+            for match in re.finditer(rf"\b(?:{pattern})\b", segment):
+                found.append((match.start(), column))
+                consume(match, offset)
+                segment = segment[: match.start()] + " " * (match.end() - match.start()) + segment[match.end():]
+        for _, column in sorted(found):
+            if column not in dimensions and column not in filters:
+                dimensions.append(column)
+    # A column named next to its filter value ("on the Online platform") is understood as well.
+    for column, pattern in DIMENSIONS:
+        if column in filters:
+            for match in re.finditer(rf"\b(?:{pattern})\b", lowered):
+                consume(match)
+
+    if any(word not in STOPWORDS for word in re.findall(r"[a-z0-9]+", "".join(remaining))):
+        return None
+
+    if len(dimensions) > 2 or (len(dimensions) == 2 and len(metrics) > 1):
+        return None
+    if not dimensions and not filters:
+        return None
+    return Intent(metrics=metrics, dimensions=dimensions, filters=filters)
+
+
+class FastPath:
+    def __init__(self) -> None:
+        """
+            Initializes the FastPath answerer.
+
+            Known column values (used to detect filters) are computed once per dataset version.
+        """
+        self._filter_values = {}  # dataset fingerprint -> {column: [values]}
+
+    def answer(self, text: str, dataset) -> Optional[str]:
+        """
+            Answers a simple aggregate question directly with pandas.
+
+            Arguments:
+                text (str): The user's question.
+                dataset (Dataset): The dataset snapshot to answer from.
+
+            Returns:
+                str: The answer as a markdown pivot table, or None if the question should go to the agent.
+        """
+        intent = match_intent(text, self.filter_values(dataset))
+        if intent is None:
+            return None
+        table = self.compute(intent, dataset)
+        if table is None or table.empty:
+            return None
+        if len(intent.dimensions) == 2:
+            # The cells of a two dimensional pivot are one metric, its columns are named after dimension
+            # values: the caption says what the cells are (markdown does not show the columns' name).
+            rows, columns = intent.dimensions
+            caption = f"**{METRICS[intent.metrics[0]].label}** by {rows} (rows) and {columns} (columns)"
+            return f"{caption}\n\n{table.round(2).to_markdown()}"
+        return table.round(2).to_markdown()
+
+    def filter_values(self, dataset) -> dict:
+        """
+            Returns the distinct values of the filterable columns for a dataset version.
+
+            Arguments:
+                dataset (Dataset): The dataset snapshot.
+
+            Returns:
+                dict: Column -> list of distinct values.
+        """
+        values = self._filter_values.get(dataset.fingerprint)
+        if values is None:
+            frame = dataset.frame
+            values = {
+                column: frame[column].dropna().unique().tolist()
+                for column in FILTER_COLUMNS
+                if column in frame.columns
+            }
+            # Only the current version is needed; drop the values of older versions.
+            self._filter_values = {dataset.fingerprint: values}
+        return values
+
+    def compute(self, intent: Intent, dataset):
+        """
+            Computes the aggregate described by an intent.
+
+            Group sums are sliced from the dataset's rollup cube when it has one, otherwise they are
+            aggregated from the raw frame; the metrics are then derived from those sums.
+
+            Arguments:
+                intent (Intent): The recognised question.
+                dataset (Dataset): The dataset snapshot to answer from.
+
+            Returns:
+                pd.DataFrame: The answer table (with a Total row / column), or None if nothing matches the filters.
+        """
+        cube = dataset.cube
+        if cube is not None and cube.covers(list(intent.dimensions) + list(intent.filters)):
+            def rollup(dimensions):
+                return cube.rollup(dimensions, intent.filters)
+        else:
+            frame = dataset.frame
+            for column, value in intent.filters.items():
+                frame = frame[frame[column].astype(str) == value]
+
+            def rollup(dimensions):
+                return aggregate(frame, dimensions)
+
+        total = rollup([])
+        if not total["count"].iloc[0]:
+            return None
+
+        if len(intent.dimensions) == 2:
+            # Two dimensions: first one as rows, second one as columns, with totals on both sides.
+            metric = METRICS[intent.metrics[0]]
+            rows, columns = intent.dimensions
+            table = metric_values(metric, rollup([rows, columns])).unstack(columns)
+            table.columns = table.columns.astype(object)
+            table.index = table.index.astype(object)
+            table["Total"] = metric_values(metric, rollup([rows]))
+            table.loc["Total"] = pd.concat(
+                [metric_values(metric, rollup([columns])), metric_values(metric, total)]
+            ).to_numpy()
+            table.columns.name = f"{metric.label} | {columns}"
+            return table
+
+        sums = pd.concat([rollup(intent.dimensions[:1]), total]) if intent.dimensions else total
+        table = pd.DataFrame({METRICS[key].label: metric_values(METRICS[key], sums) for key in intent.metrics})
+        table.index = table.index.astype(object)
+        table.index.name = intent.dimensions[0] if intent.dimensions else None
+        return table
+
+
+def metric_values(metric: Metric, sums: pd.DataFrame) -> pd.Series:
+    """
+        Derives a metric from group sums ("count" plus one sum column per measure).
+
+        Arguments:
+            metric (Metric): The metric to compute.
+            sums (pd.DataFrame): Group sums, as returned by `aggregate` / `RollupCube.rollup`.
+
+        Returns:
+            pd.Series: The metric value of every group.
+    """
+    if metric.aggfunc == "count":
+        values = sums["count"]
+    elif metric.aggfunc == "mean":
+        values = sums[metric.column] / sums["count"]
+    else:
+        values = sums[metric.column]
+    return values * metric.scale
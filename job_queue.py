@@ -0,0 +1,191 @@
+"""
+    Bounded job queue for Slack app mentions.
+
+    `slack_events` used to fire `asyncio.create_task(...)` for every mention without any limit and without
+    keeping a reference to the task: a burst of mentions spawned an unbounded number of tasks piling up on
+    the thread pool, and a task could be garbage collected or fail silently.
+
+    `JobQueue` puts mentions on an `asyncio.Queue` with a maximum depth, processed by a fixed number of
+    worker tasks. When every worker is busy the user is told where their request is queued; when the
+    queue is full the request is rejected immediately with a "busy" message (load shedding).
+    Queue depth and wait time metrics are kept, and the queue drains cleanly on shutdown.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+
+# Job queue configuration:
+# 1. JOB_QUEUE_MAX_DEPTH:
+#    - Maximum number of mentions waiting for a worker. Further mentions are rejected with a busy message.
+# 2. JOB_QUEUE_WORKERS:
+#    - Number of mentions processed concurrently. Independent of the thread pool (SLACK_BOT_MAX_WORKERS): a mention
+#      waiting on OpenAI holds no thread, so this is sized above OPENAI_MAX_CONCURRENCY (16) to keep OpenAI busy.
+# 3. JOB_QUEUE_DRAIN_SECONDS:
+#    - How long shutdown waits for queued and running mentions to finish.
+JOB_QUEUE_MAX_DEPTH = int(os.environ.get("JOB_QUEUE_MAX_DEPTH", "50"))
+JOB_QUEUE_WORKERS = int(os.environ.get("JOB_QUEUE_WORKERS", "32"))
+JOB_QUEUE_DRAIN_SECONDS = float(os.environ.get("JOB_QUEUE_DRAIN_SECONDS", "30"))
+
+
+class JobQueue:
+    def __init__(
+        self,
+        process: Callable[[dict], Awaitable[None]],
+        on_queued: Optional[Callable[[dict, int], Awaitable[None]]] = None,
+        on_rejected: Optional[Callable[[dict], Awaitable[None]]] = None,
+        max_depth: int = JOB_QUEUE_MAX_DEPTH,
+        workers: int = JOB_QUEUE_WORKERS,
+    ) -> None:
+        """
+            Initializes the JobQueue. Call `start()` from the running event loop before submitting jobs.
+
+            Arguments:
+                process (callable): Coroutine function processing one job (the Slack event body).
+                on_queued (callable): Coroutine called with (job, position) when a job has to wait for a worker.
+                on_rejected (callable): Coroutine called with the job when the queue is full.
+                max_depth (int): Maximum number of waiting jobs.
+                workers (int): Number of worker tasks.
+        """
+        self.logger = logging.getLogger()
+        self.process = process
+        self.on_queued = on_queued
+        self.on_rejected = on_rejected
+        self.max_depth = max_depth
+        self.worker_count = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._notifications = set()  # References to notification tasks, so they are not garbage collected.
+        self._accepting = False
+        self._busy = 0
+
+        # Metrics exposed through `stats()`.
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def start(self):
+        """
+            Creates the queue and its worker tasks on the running event loop.
+        """
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-queue-worker-{i}") for i in range(self.worker_count)
+        ]
+        self._accepting = True
+        self.logger.info(f"Job queue started with {self.worker_count} workers, max depth {self.max_depth}")
+
+    def submit(self, job: dict) -> Optional[int]:
+        """
+            Adds a job to the queue without waiting.
+
+            Arguments:
+                job (dict): The Slack event body.
+
+            Returns:
+                int: 0 if a worker picks the job up right away, its position in the queue if it has to wait,
+                     or None if it was rejected because the queue is full (or shutting down).
+        """
+        if not self._accepting:
+            self._reject(job)
+            return None
+
+        try:
+            self._queue.put_nowait((time.monotonic(), job))
+        except asyncio.QueueFull:
+            self._reject(job)
+            return None
+
+        self.submitted += 1
+        # Queued jobs are picked up by idle workers first; only the rest actually wait.
+        position = self._queue.qsize() - (self.worker_count - self._busy)
+        if position <= 0:
+            return 0
+        if self.on_queued is not None:
+            self._notify(self.on_queued(job, position))
+        return position
+
+    async def drain(self, timeout: float = JOB_QUEUE_DRAIN_SECONDS):
+        """
+            Stops accepting jobs, waits for the queued and running ones to finish (up to `timeout`)
+            and stops the workers.
+
+            Arguments:
+                timeout (float): Maximum number of seconds to wait.
+        """
+        self._accepting = False
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.logger.info(f"Job queue drain timed out with {self._queue.qsize()} jobs left")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, *self._notifications, return_exceptions=True)
+        self.logger.info(f"Job queue drained --- {self.stats()}")
+
+    def stats(self) -> dict:
+        """
+            Returns the queue metrics.
+
+            Returns:
+                dict: Current depth and busy workers, job counters and wait times.
+        """
+        started = self.completed + self.failed + self._busy
+        return {
+            "depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_depth": self.max_depth,
+            "workers": self.worker_count,
+            "busy_workers": self._busy,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "wait_seconds_avg": self.wait_seconds_total / started if started else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+    async def _worker(self):
+        """
+            Processes jobs one at a time until cancelled.
+        """
+        while True:
+            enqueued_at, job = await self._queue.get()
+            waited = time.monotonic() - enqueued_at
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self._busy += 1
+            try:
+                await self.process(job)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                self.logger.info(f"Error occured at processing queued job --- {e}")
+            finally:
+                self._busy -= 1
+                self._queue.task_done()
+
+    def _reject(self, job: dict):
+        """
+            Counts a rejected job and notifies the user.
+        """
+        self.rejected += 1
+        self.logger.info(f"Job queue full, rejecting job --- {self.stats()}")
+        if self.on_rejected is not None:
+            self._notify(self.on_rejected(job))
+
+    def _notify(self, coroutine):
+        """
+            Runs a notification coroutine in the background, keeping a reference until it is done.
+        """
+        task = asyncio.create_task(coroutine)
+        self._notifications.add(task)
+        task.add_done_callback(self._notifications.discard)
@@ -0,0 +1,100 @@
+"""
+    Learner data schema and CSV parsing.
+
+    Two loading modes are supported:
+        - "standard": text columns as Python `str` objects and the 0/1 flags as 64-bit ints (the original loader).
+        - "compact": low cardinality text columns as `category`, 0/1 flags as `uint8` and Grade as `int16`.
+          On multi-million row exports this uses a fraction of the memory and speeds up every group-by.
+
+    Parsing can optionally use the pyarrow CSV engine (multi-threaded) when pyarrow is installed.
+    `python -m benchmarks.loader_report` compares the modes on synthetic data.
+"""
+import logging
+import os
+
+import pandas as pd
+
+
+# Learner data loading configuration:
+# 1. LEARNER_DATA_LOAD_MODE:
+#    - "standard" (default) or "compact" (categoricals + narrow ints).
+# 2. LEARNER_DATA_CSV_ENGINE:
+#    - pandas CSV engine: "c" (default) or "pyarrow". Falls back to "c" when pyarrow is not installed.
+LEARNER_DATA_LOAD_MODE = os.environ.get("LEARNER_DATA_LOAD_MODE", "standard")
+LEARNER_DATA_CSV_ENGINE = os.environ.get("LEARNER_DATA_CSV_ENGINE", "c")
+
+
+# Learner data schema:
+# Data types for specific columns to optimize memory usage and ensure data consistency.
+# Shared by the local CSV and S3 loaders.
+LEARNER_DATA_DTYPE = {
+    "Learner ID": str,             # Learner ID as a string to preserve leading zeros
+    "Course Prefix": str,          # Course prefix as string
+    "Platform": str,               # Platform name as string
+    "Course Name": str,            # Course name as string
+    "Term": str,                   # Academic term as string
+    "AY": str,                     # Academic Year as string
+    "Verified": int,               # Binary indicator (0 or 1) for verification
+    "Passed": int,                 # Binary indicator (0 or 1) for course completion
+    "Credit Converted": int,       # Indicates if credit was converted (0 or 1)
+    "Grade": int                   # Numerical grade
+}
+
+# Compact learner data schema:
+# Same columns, stored in the narrowest type that holds their values.
+LEARNER_DATA_COMPACT_DTYPE = {
+    "Learner ID": str,             # High cardinality, stays a string
+    "Course Prefix": "category",   # A few dozen distinct values
+    "Platform": "category",        # Online / Inclass
+    "Course Name": "category",     # A handful of subjects
+    "Term": "category",            # A few terms per academic year
+    "AY": "category",              # A few academic years
+    "Verified": "uint8",           # 0 or 1
+    "Passed": "uint8",             # 0 or 1
+    "Credit Converted": "uint8",   # 0 or 1
+    "Grade": "int16"               # 0 - 100, int16 leaves room for out of range values
+}
+
+LOAD_MODES = {
+    "standard": LEARNER_DATA_DTYPE,
+    "compact": LEARNER_DATA_COMPACT_DTYPE,
+}
+
+
+def resolve_engine(engine: str) -> str:
+    """
+        Returns the CSV engine to use, falling back to the C engine when pyarrow is requested but missing.
+
+        Arguments:
+            engine (str): The requested engine ("c" or "pyarrow").
+
+        Returns:
+            str: The engine pandas should use.
+    """
+    if engine != "pyarrow":
+        return engine
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        logging.getLogger().warning("pyarrow is not installed, using the C CSV engine instead")
+        return "c"
+    return engine
+
+
+def read_learner_csv(source, mode: str = None, engine: str = None, **kwargs) -> pd.DataFrame:
+    """
+        Parses learner data from a CSV path or file-like object.
+
+        Arguments:
+            source (str | file-like): Path of the CSV file or an open (text or binary) file object.
+            mode (str): "standard" or "compact". Defaults to LEARNER_DATA_LOAD_MODE.
+            engine (str): "c" or "pyarrow". Defaults to LEARNER_DATA_CSV_ENGINE.
+            **kwargs: Any other `pd.read_csv` arguments.
+
+        Returns:
+            pd.DataFrame: The learner data.
+    """
+    mode = mode or LEARNER_DATA_LOAD_MODE
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown learner data load mode {mode!r}, expected one of {list(LOAD_MODES)}")
+    return pd.read_csv(source, dtype=LOAD_MODES[mode], engine=resolve_engine(engine or LEARNER_DATA_CSV_ENGINE), **kwargs)
@@ -0,0 +1,120 @@
+"""
+    Concurrency limit and timeouts of the OpenAI calls made while answering a mention.
+
+    The DataFrame agent used to run with `df_agent.invoke` on a worker thread, which stayed blocked for the
+    whole OpenAI round trip, and nothing bounded a slow response. The agent and the insight call are now
+    awaited on the event loop (`ainvoke` / `astream`), so a mention waiting on OpenAI holds no thread, and
+    `LLMLimiter` wraps every OpenAI stage:
+        - at most OPENAI_MAX_CONCURRENCY stages call OpenAI at the same time; further mentions wait for a
+          slot (timed as the "llm_queue" stage);
+        - each stage has a timeout (waiting for a slot included). A stage running past it is cancelled and
+          raises `StageTimeout`.
+
+    An agent run makes its OpenAI calls one after another, so holding one slot for the whole run bounds
+    the number of outstanding calls exactly.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from metrics import span
+
+
+# OpenAI call limits:
+# 1. OPENAI_MAX_CONCURRENCY:
+#    - Maximum number of OpenAI calls (agent runs and insight generations) in flight at the same time.
+# 2. AGENT_TIMEOUT_SECONDS:
+#    - Time the DataFrame agent may take to answer (all of its OpenAI calls and tool runs). 0 disables the timeout.
+# 3. INSIGHT_TIMEOUT_SECONDS:
+#    - Time the insight generation may take, streaming included. 0 disables the timeout.
+OPENAI_MAX_CONCURRENCY = int(os.environ.get("OPENAI_MAX_CONCURRENCY", "16"))
+AGENT_TIMEOUT_SECONDS = float(os.environ.get("AGENT_TIMEOUT_SECONDS", "120"))
+INSIGHT_TIMEOUT_SECONDS = float(os.environ.get("INSIGHT_TIMEOUT_SECONDS", "60"))
+
+
+class StageTimeout(Exception):
+    """
+        Raised when a stage of a mention did not finish within its timeout.
+    """
+
+    def __init__(self, stage: str, seconds: float) -> None:
+        super().__init__(f"{stage} did not finish within {seconds:.0f}s")
+        self.stage = stage
+        self.seconds = seconds
+
+
+class LLMLimiter:
+    def __init__(self, max_concurrency: int = OPENAI_MAX_CONCURRENCY, timeouts: dict = None) -> None:
+        """
+            Initializes the LLMLimiter.
+
+            Arguments:
+                max_concurrency (int): Maximum number of stages calling OpenAI at the same time.
+                timeouts (dict): Timeout in seconds per stage name, overriding the defaults
+                    ("agent_invoke": AGENT_TIMEOUT_SECONDS, "llm_invoke": INSIGHT_TIMEOUT_SECONDS).
+        """
+        self.max_concurrency = max_concurrency
+        self.timeouts = {"agent_invoke": AGENT_TIMEOUT_SECONDS, "llm_invoke": INSIGHT_TIMEOUT_SECONDS, **(timeouts or {})}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.calls = 0
+        self.timed_out = 0
+        self.cancelled = 0
+
+    @asynccontextmanager
+    async def limit(self, ctx, stage: str):
+        """
+            Runs the block as an OpenAI stage: waits for a free slot, then enforces the stage's timeout.
+
+            Arguments:
+                ctx (RequestContext): The context of the mention being processed (the slot wait is timed on it).
+                stage (str): Name of the stage, e.g. "agent_invoke".
+
+            Raises:
+                StageTimeout: If waiting for a slot and running the block took longer than the stage's timeout.
+        """
+        seconds = self.timeouts.get(stage) or None
+        deadline = asyncio.timeout(seconds)
+        acquired = False
+        try:
+            async with deadline:
+                self.waiting += 1
+                try:
+                    with span(ctx, "llm_queue"):
+                        await self._semaphore.acquire()
+                    acquired = True
+                finally:
+                    self.waiting -= 1
+                self.in_flight += 1
+                self.calls += 1
+                yield
+        except TimeoutError:
+            if not deadline.expired():
+                raise
+            self.timed_out += 1
+            raise StageTimeout(stage, seconds) from None
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            if acquired:
+                self.in_flight -= 1
+                self._semaphore.release()
+
+    def stats(self) -> dict:
+        """
+            Returns the limiter counters.
+
+            Returns:
+                dict: Slots, calls in flight and waiting, and calls made, timed out and cancelled.
+        """
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+        }
@@ -0,0 +1,219 @@
+"""
+    Per-stage latency instrumentation and Prometheus-style metrics.
+
+    Every app mention is broken into timed stages (processing message, data load, fast path, agent build,
+    agent invoke, LLM invoke, Slack formatting and Slack post). `span()` measures a stage and records it on
+    the request context together with token counts and cache hit / miss flags. When the request finishes,
+    `record_request()` aggregates it into histograms and counters and logs one structured line per request.
+
+    `REGISTRY.render()` returns the metrics in the Prometheus text exposition format, served on `/metrics`.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+# Histogram buckets (seconds): Slack / pandas stages take milliseconds, OpenAI calls take seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key: tuple, extra: dict = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in items)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        """
+            Initializes an empty MetricsRegistry holding counters, gauges and histograms.
+        """
+        self._lock = threading.Lock()
+        self._help = {}  # metric name -> (type, help text)
+        self._counters = defaultdict(float)  # (name, labels) -> value
+        self._gauges = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> bucket bounds and counts, sum and count
+
+    def describe(self, name: str, metric_type: str, help_text: str):
+        """
+            Registers the type and help text of a metric (shown in the exposition output).
+
+            Arguments:
+                name (str): Metric name.
+                metric_type (str): "counter", "gauge" or "histogram".
+                help_text (str): Description of the metric.
+        """
+        self._help[name] = (metric_type, help_text)
+
+    def inc(self, name: str, value: float = 1.0, labels: dict = None):
+        """
+            Increments a counter.
+        """
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += value
+
+    def set_gauge(self, name: str, value: float, labels: dict = None):
+        """
+            Sets a gauge to its current value.
+        """
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name: str, value: float, labels: dict = None, buckets: tuple = LATENCY_BUCKETS):
+        """
+            Records a value in a histogram.
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(histogram["buckets"]):
+                if value <= bound:
+                    histogram["counts"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def render(self) -> str:
+        """
+            Renders every metric in the Prometheus text exposition format.
+
+            Returns:
+                str: The exposition text.
+        """
+        with self._lock:
+            series = defaultdict(list)
+            for (name, key), value in sorted(self._counters.items()):
+                series[name].append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for (name, key), value in sorted(self._gauges.items()):
+                series[name].append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for (name, key), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                for bound, count in zip(histogram["buckets"], histogram["counts"]):
+                    series[name].append(f"{name}_bucket{_format_labels(key, {'le': _format_value(bound)})} {count}")
+                series[name].append(f"{name}_sum{_format_labels(key)} {_format_value(histogram['sum'])}")
+                series[name].append(f"{name}_count{_format_labels(key)} {histogram['count']}")
+
+        lines = []
+        for name in sorted(series):
+            if name in self._help:
+                metric_type, help_text = self._help[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(series[name])
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry, rendered by the `/metrics` route.
+REGISTRY = MetricsRegistry()
+REGISTRY.describe("stark_stage_seconds", "histogram", "Time spent in each stage of an app mention.")
+REGISTRY.describe("stark_request_seconds", "histogram", "End-to-end time of an app mention, by serving path.")
+REGISTRY.describe("stark_requests_total", "counter", "App mentions processed, by serving path.")
+REGISTRY.describe("stark_llm_tokens_total", "counter", "OpenAI tokens used, by stage and kind (input / output).")
+REGISTRY.describe("stark_llm_tokens_saved_total", "counter", "Prompt tokens saved by compacting the data inlined in prompts, by stage.")
+REGISTRY.describe("stark_cache_lookups_total", "counter", "Cache lookups made while serving app mentions, by cache and result.")
+REGISTRY.describe("stark_job_queue", "gauge", "Job queue statistics at scrape time.")
+REGISTRY.describe("stark_datasets", "gauge", "Dataset registry statistics (loaded datasets, memory) at scrape time.")
+REGISTRY.describe("stark_llm_limiter", "gauge", "OpenAI calls in flight, waiting for a slot, timed out and cancelled, at scrape time.")
+REGISTRY.describe("stark_sandbox", "gauge", "Agent code sandbox statistics at scrape time.")
+REGISTRY.describe("stark_cache_stats", "gauge", "Answer, dataset and agent cache statistics at scrape time.")
+
+
+@contextmanager
+def span(ctx, stage: str):
+    """
+        Times a stage of a request and adds its duration to `ctx.timings[stage]`.
+        A stage entered several times (e.g. Slack updates while streaming) accumulates.
+
+        Arguments:
+            ctx (RequestContext): The context of the request being processed. None disables the span.
+            stage (str): Name of the stage.
+    """
+    if ctx is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ctx.timings[stage] = ctx.timings.get(stage, 0.0) + time.perf_counter() - started
+
+
+def add_tokens(ctx, stage: str, input_tokens: int, output_tokens: int):
+    """
+        Adds the OpenAI token usage of a stage to the request context.
+
+        Arguments:
+            ctx (RequestContext): The context of the request being processed.
+            stage (str): Name of the stage that called the model.
+            input_tokens (int): Prompt tokens.
+            output_tokens (int): Completion tokens.
+    """
+    tokens = ctx.tokens.setdefault(stage, {"input": 0, "output": 0})
+    tokens["input"] += input_tokens or 0
+    tokens["output"] += output_tokens or 0
+
+
+def set_gauges(name: str, stats: dict, labels: dict = None, registry: MetricsRegistry = REGISTRY):
+    """
+        Publishes a `stats()` dictionary as one gauge per numeric entry, labelled by `stat`.
+
+        Arguments:
+            name (str): Gauge name.
+            stats (dict): The statistics, e.g. `JobQueue.stats()`.
+            labels (dict): Extra labels for every entry.
+            registry (MetricsRegistry): Where to record the gauges.
+    """
+    for stat, value in stats.items():
+        if isinstance(value, (int, float)):
+            registry.set_gauge(name, value, labels={**(labels or {}), "stat": stat})
+
+
+def record_request(ctx, total_seconds: float, registry: MetricsRegistry = REGISTRY):
+    """
+        Aggregates a finished request into the metrics and logs it as one structured line.
+
+        Arguments:
+            ctx (RequestContext): The context of the finished request.
+            total_seconds (float): End-to-end time of the request.
+            registry (MetricsRegistry): Where to record the metrics.
+    """
+    served_by = ctx.served_by or "error"
+    registry.inc("stark_requests_total", labels={"served_by": served_by})
+    registry.observe("stark_request_seconds", total_seconds, labels={"served_by": served_by})
+    for stage, seconds in ctx.timings.items():
+        if not stage.endswith("_saved"):
+            registry.observe("stark_stage_seconds", seconds, labels={"stage": stage})
+    for stage, tokens in ctx.tokens.items():
+        for kind, count in tokens.items():
+            registry.inc("stark_llm_tokens_total", count, labels={"stage": stage, "kind": kind})
+    for stage, count in ctx.tokens_saved.items():
+        registry.inc("stark_llm_tokens_saved_total", count, labels={"stage": stage})
+    for cache, result in ctx.cache.items():
+        registry.inc("stark_cache_lookups_total", labels={"cache": cache, "result": result})
+
+    logging.getLogger().info(json.dumps({
+        "event": "app_mention",
+        "event_id": ctx.event_id,
+        "served_by": served_by,
+        "total_seconds": round(total_seconds, 4),
+        "timings": {stage: round(seconds, 4) for stage, seconds in ctx.timings.items()},
+        "tokens": ctx.tokens,
+        "tokens_saved": ctx.tokens_saved,
+        "cache": ctx.cache,
+    }))
@@ -0,0 +1,216 @@
+"""
+    Token budget of the data inlined into the insight prompt.
+
+    The second LLM call (the insights) used to receive the fast path / agent output verbatim. A large pivot
+    made that GPT-4o call slow and expensive, and could overflow the context window. `compact_data` measures
+    the data with `tiktoken` and, above INSIGHT_DATA_MAX_TOKENS, shrinks it before it goes into the prompt:
+        - every markdown table longer than INSIGHT_DATA_TOP_ROWS keeps its header and first rows (in the order
+          the agent sorted them), followed by a mean row computed over all of its rows, and a total row for the
+          columns the caller knows to be counts (`additive_columns`, e.g. the fast path's count metrics). A total
+          row already in the table is kept instead and left out of the mean;
+        - if the text is still over budget (e.g. a printed DataFrame), it is cut on a line boundary.
+
+    Only the prompt is compacted: the Slack response still shows the full data.
+"""
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import tiktoken
+
+
+# Insight prompt configuration:
+# 1. INSIGHT_DATA_MAX_TOKENS:
+#    - Tokens the relevant data may use in the insight prompt before it is compacted (0 disables compaction).
+# 2. INSIGHT_DATA_TOP_ROWS:
+#    - Rows of each table kept in a compacted prompt (totals and means still cover every row).
+# 3. INSIGHT_TOKENIZER_MODEL:
+#    - Model whose tokenizer measures the data.
+INSIGHT_DATA_MAX_TOKENS = int(os.environ.get("INSIGHT_DATA_MAX_TOKENS", "2000"))
+INSIGHT_DATA_TOP_ROWS = int(os.environ.get("INSIGHT_DATA_TOP_ROWS", "25"))
+INSIGHT_TOKENIZER_MODEL = os.environ.get("INSIGHT_TOKENIZER_MODEL", "gpt-4o")
+
+# Without the tokenizer files (first run on a host with no internet access), tokens are estimated from
+# the length. Tables of numbers average about 3 characters per token, so the estimate errs on the high side.
+CHARS_PER_TOKEN = 3
+
+_NUMBER = re.compile(r"[-+]?[\d,]*\.?\d+(?:e[-+]?\d+)?%?", re.IGNORECASE)
+# First cell of a total row the agent already added to its table.
+_TOTAL_LABEL = re.compile(r"\W*(?:total|all|grand total|overall)\W*", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class CompactedData:
+    """
+        The relevant data as inlined in the insight prompt.
+
+        Attributes:
+            text (str): The (possibly compacted) data.
+            original_tokens (int): Tokens of the data as returned by the fast path / agent.
+            tokens (int): Tokens of `text`.
+            rows_omitted (int): Table rows left out of `text`.
+    """
+
+    text: str
+    original_tokens: int
+    tokens: int
+    rows_omitted: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # Loading the encoding reads (and on first use downloads) the tokenizer files: done once per process.
+    try:
+        return tiktoken.encoding_for_model(INSIGHT_TOKENIZER_MODEL)
+    except Exception as e:
+        logging.getLogger().info(f"Error occured at loading the {INSIGHT_TOKENIZER_MODEL} tokenizer, token counts are estimated --- {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+        Counts the tokens of a text for the insight model.
+
+        Arguments:
+            text (str): The text to measure.
+
+        Returns:
+            int: The number of tokens (estimated from the length if the tokenizer is unavailable).
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _to_number(cell: str):
+    if not _NUMBER.fullmatch(cell):
+        return None
+    return float(cell.replace(",", "").rstrip("%"))
+
+
+def _format_number(value: float) -> str:
+    return f"{value:,.0f}" if value.is_integer() else f"{value:,.2f}"
+
+
+def compact_table(lines: list, top_rows: int, additive_columns=()) -> tuple:
+    """
+        Shortens a markdown table to its header, its first rows and a mean row over all rows, plus a total row
+        over the additive columns. An existing total row is kept (and no total computed) but not counted.
+
+        Arguments:
+            lines (list): The lines of the table (header, separator, rows).
+            top_rows (int): Rows to keep.
+            additive_columns (iterable): Headers of the columns that may be added up (counts). Rates, averages,
+                IDs and pivot columns named after dimension values are never totalled.
+
+        Returns:
+            tuple: (lines of the compacted table, number of rows omitted).
+    """
+    has_separator = len(lines) > 1 and not lines[1].strip().strip("|:- ")
+    head = lines[:2] if has_separator else lines[:1]
+    body = lines[len(head):]
+    if len(body) <= top_rows:
+        return lines, 0
+
+    def split(line):
+        return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+    header = split(head[0])
+    existing_totals = [line for line in body if _TOTAL_LABEL.fullmatch(split(line)[0])]
+    body = [line for line in body if line not in existing_totals]
+    if len(body) <= top_rows:
+        return lines, 0
+
+    rows = [split(line) for line in body]
+    width = max(len(row) for row in rows)
+    totals, means = ["**Total**"] + [""] * (width - 1), ["**Mean**"] + [""] * (width - 1)
+    for column in range(1, width):
+        values = [_to_number(row[column]) if column < len(row) else None for row in rows]
+        present = [value for value in values if value is not None]
+        # Only columns that are numeric in every non-empty cell get a total (not e.g. a course code column).
+        if present and len(present) == sum(1 for row in rows if column < len(row) and row[column]):
+            if not existing_totals and column < len(header) and header[column] in additive_columns:
+                totals[column] = _format_number(sum(present))
+            means[column] = _format_number(sum(present) / len(present))
+
+    omitted = len(body) - top_rows
+    summary = [totals] if any(totals[1:]) else []
+    summary.append(means)
+    compacted = head + body[:top_rows] + existing_totals + [f"| {' | '.join(row)} |" for row in summary]
+    compacted.append(
+        f"({omitted} of {len(body)} rows omitted; the computed {'total and mean rows cover' if len(summary) == 2 else 'mean row covers'} "
+        f"all {len(body)} rows, the mean is unweighted)"
+    )
+    return compacted, omitted
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """
+        Cuts a text to at most `max_tokens` tokens, on a line boundary where possible.
+
+        Arguments:
+            text (str): The text.
+            max_tokens (int): Token budget.
+
+        Returns:
+            str: The text, with a note if it was cut.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        head = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        head = encoding.decode(tokens[:max_tokens])
+    if len(head) == len(text):
+        return text
+    if "\n" in head:
+        head = head[:head.rindex("\n")]
+    return f"{head}\n(truncated: {len(text) - len(head)} more characters)"
+
+
+def compact_data(data: str, max_tokens: int = None, top_rows: int = None, additive_columns=()) -> CompactedData:
+    """
+        Fits the relevant data into the insight prompt's token budget.
+
+        Arguments:
+            data (str): The fast path or agent output.
+            max_tokens (int): Token budget of the data. Defaults to INSIGHT_DATA_MAX_TOKENS; 0 disables compaction.
+            top_rows (int): Rows kept per table. Defaults to INSIGHT_DATA_TOP_ROWS.
+            additive_columns (iterable): Column headers that get a total row (see `compact_table`).
+
+        Returns:
+            CompactedData: The data to inline, with its token counts before and after.
+    """
+    max_tokens = INSIGHT_DATA_MAX_TOKENS if max_tokens is None else max_tokens
+    top_rows = INSIGHT_DATA_TOP_ROWS if top_rows is None else top_rows
+    data = str(data)
+    original_tokens = count_tokens(data)
+    if not max_tokens or original_tokens <= max_tokens:
+        return CompactedData(text=data, original_tokens=original_tokens, tokens=original_tokens)
+
+    # Shorten every markdown table (a run of lines starting with "|").
+    out, table, omitted = [], [], 0
+    for line in data.split("\n") + [""]:
+        if line.lstrip().startswith("|"):
+            table.append(line)
+            continue
+        if table:
+            compacted, rows = compact_table(table, top_rows, additive_columns)
+            out.extend(compacted)
+            omitted += rows
+            table = []
+        out.append(line)
+    text = "\n".join(out[:-1])
+
+    text = truncate(text, max_tokens)
+    return CompactedData(text=text, original_tokens=original_tokens, tokens=count_tokens(text), rows_omitted=omitted)
@@ -0,0 +1,76 @@
+"""
+    Request-scoped state for a single Slack 'app_mention' event.
+
+    The Quart app shares one `SlackBotHandler` between every request and runs several mentions
+    in parallel on a worker pool. Anything that belongs to one mention (event ids, channel, question,
+    the dataset snapshot it is answered from) therefore lives on a `RequestContext` that is created
+    per event and passed explicitly, never on the shared handler instance.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+
+@dataclass
+class RequestContext:
+    """
+        Everything one app mention needs while it is being processed.
+
+        Attributes:
+            body (dict): The raw JSON payload received from Slack.
+            event_id (str): Slack event ID, unique per event delivery.
+            client_msg_id (str): ID of the client message that triggered the event.
+            channel_id (str): The Slack channel to reply to.
+            user_id (str): The user who mentioned the bot.
+            text (str): The user's question with the bot mention stripped.
+            processing_ts (str): Timestamp of the "processing" message updated with the answer, once posted.
+            dataset_name (str): Name of the registered dataset the question is about, set once resolved.
+            dataset (Dataset): The dataset snapshot this request is answered from, set once loaded.
+            served_by (str): Which path produced the answer: "answer_cache", "fast_path" or "agent"
+                ("superseded" or "timeout" if the mention was stopped).
+            timings (dict): Seconds spent (or saved) per processing stage, e.g. "agent_build".
+            tokens (dict): OpenAI token usage per stage, e.g. {"llm_invoke": {"input": 512, "output": 96}}.
+            cache (dict): Hit / miss result per cache consulted, e.g. {"answer_cache": "miss"}.
+            tokens_saved (dict): Prompt tokens saved per stage by compacting the data, e.g. {"llm_invoke": 5400}.
+    """
+
+    body: dict
+    event_id: str
+    client_msg_id: str
+    channel_id: str
+    text: str
+    user_id: str = field(default="")
+    processing_ts: Optional[str] = field(default=None)
+    dataset_name: str = field(default="")
+    dataset: Optional[Any] = field(default=None)
+    served_by: str = field(default="")
+    timings: dict = field(default_factory=dict)
+    tokens: dict = field(default_factory=dict)
+    cache: dict = field(default_factory=dict)
+    tokens_saved: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_body(cls, body: dict, bot_user_id: str) -> "RequestContext":
+        """
+            Builds a RequestContext from a Slack event payload.
+
+            Arguments:
+                body (dict): The JSON payload received from Slack containing event details.
+                bot_user_id (str): The bot's Slack user ID, stripped from the question text.
+
+            Returns:
+                RequestContext: The context for this event.
+        """
+        event = body.get("event", {})
+
+        # The bot was mentioned, so we strip the mention from the message.
+        mention = f"<@{bot_user_id}>"
+        text = event.get("text", "").replace(mention, "").strip()
+
+        return cls(
+            body=body,
+            event_id=body.get("event_id", ""),
+            client_msg_id=event.get("client_msg_id", ""),
+            channel_id=event.get("channel", ""),
+            user_id=event.get("user", ""),
+            text=text,
+        )
@@ -0,0 +1,121 @@
+"""
+    Pre-aggregated OLAP style cube over the learner data.
+
+    Aggregate answers only ever need per-group counts and sums, so once a dataset version is loaded
+    the rows are rolled up over the categorical dimensions (Platform, Course Name, Course Prefix, Term, AY).
+    Every cell of the cube holds the number of learners and the sums of Grade, Passed, Verified and
+    Credit Converted for one combination of dimension values. Pivot answers are then computed by
+    re-aggregating these few cells instead of rescanning the raw frame, which keeps them fast when the
+    learner file grows from thousands to millions of rows.
+"""
+import logging
+import time
+
+import pandas as pd
+
+
+# Categorical dimensions of the cube (the low cardinality string columns of the learner data).
+CUBE_DIMENSIONS = ["Platform", "Course Name", "Course Prefix", "Term", "AY"]
+
+# Numeric measures summed in every cell. "count" (number of learners) is added to them.
+CUBE_MEASURES = ["Grade", "Passed", "Verified", "Credit Converted"]
+
+
+def aggregate(frame: pd.DataFrame, dimensions: list, count_column: str = None) -> pd.DataFrame:
+    """
+        Sums the measures of a frame per combination of dimension values.
+
+        Works on raw learner rows (every row counts as one learner) and on cube cells
+        (the existing "count" column is summed).
+
+        Arguments:
+            frame (pd.DataFrame): Raw learner rows or cube cells.
+            dimensions (list): Columns to group by. Empty returns a single "Total" row.
+            count_column (str): Column holding per-row counts, None for raw rows.
+
+        Returns:
+            pd.DataFrame: "count" plus one column per measure, indexed by the dimensions.
+    """
+    measures = [column for column in CUBE_MEASURES if column in frame.columns]
+    if not dimensions:
+        sums = frame[measures].sum()
+        sums["count"] = frame[count_column].sum() if count_column else len(frame)
+        return sums.to_frame("Total").T
+
+    # Rows with a missing dimension value form their own (NaN) group: dropping them would make the cube's
+    # answers disagree with a scan of the raw frame on every other dimension.
+    grouped = frame.groupby(dimensions, observed=True, sort=True, dropna=False)
+    sums = grouped[measures].sum()
+    sums.insert(0, "count", grouped[count_column].sum() if count_column else grouped.size())
+    return sums
+
+
+class RollupCube:
+    def __init__(self, cells: pd.DataFrame, build_seconds: float) -> None:
+        """
+            Initializes the RollupCube. Use `RollupCube.build` to create one from learner data.
+
+            Arguments:
+                cells (pd.DataFrame): One row per observed combination of dimension values.
+                build_seconds (float): Time it took to build the cube.
+        """
+        self.cells = cells
+        self.dimensions = [column for column in CUBE_DIMENSIONS if column in cells.columns]
+        self.build_seconds = build_seconds
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame) -> "RollupCube":
+        """
+            Builds the cube from the raw learner data and logs its build time and memory footprint.
+
+            Arguments:
+                frame (pd.DataFrame): The learner data.
+
+            Returns:
+                RollupCube: The cube of the given frame.
+        """
+        started = time.perf_counter()
+        dimensions = [column for column in CUBE_DIMENSIONS if column in frame.columns]
+        cells = aggregate(frame, dimensions).reset_index()
+        cube = cls(cells, build_seconds=time.perf_counter() - started)
+        logging.getLogger().info(
+            f"Rollup cube built in {cube.build_seconds:.3f}s: {len(frame)} rows -> {len(cells)} cells, "
+            f"{cube.memory_bytes / 1024:.1f} KiB (raw frame {frame.memory_usage(deep=True).sum() / 1024:.1f} KiB)"
+        )
+        return cube
+
+    @property
+    def memory_bytes(self) -> int:
+        """
+            Returns:
+                int: Memory used by the cube cells, in bytes.
+        """
+        return int(self.cells.memory_usage(deep=True).sum())
+
+    def rollup(self, dimensions: list, filters: dict = None) -> pd.DataFrame:
+        """
+            Slices the cube: applies equality filters and re-aggregates the cells over the requested dimensions.
+
+            Arguments:
+                dimensions (list): Cube dimensions to group by (may be empty for a grand total).
+                filters (dict): Dimension -> value equality filters.
+
+            Returns:
+                pd.DataFrame: "count" plus one sum column per measure, indexed by the dimensions.
+        """
+        cells = self.cells
+        for column, value in (filters or {}).items():
+            cells = cells[cells[column].astype(str) == str(value)]
+        return aggregate(cells, dimensions, count_column="count")
+
+    def covers(self, columns) -> bool:
+        """
+            Checks whether questions over these columns can be answered from the cube.
+
+            Arguments:
+                columns (iterable): Dimension / filter columns of a question.
+
+            Returns:
+                bool: True if all of them are cube dimensions.
+        """
+        return all(column in self.dimensions for column in columns)
@@ -0,0 +1,221 @@
+"""
+    Streaming S3 loader for the learner data with a local columnar snapshot.
+
+    The original S3 loader read the whole object into memory, decoded it into one big string, wrapped that
+    in a StringIO and parsed it, so the raw bytes, the decoded text and the DataFrame were all alive at once.
+    `S3DatasetLoader` instead:
+        1. Parses the S3 response body in chunks straight from the HTTP stream (no full-string copy).
+        2. Writes a local Feather (Arrow) snapshot of the parsed frame, keyed by the object's ETag.
+        3. On later loads / process starts, sends a conditional GET (`IfNoneMatch=<snapshot ETag>`).
+           If S3 answers 304 Not Modified, the snapshot is memory-mapped instead of downloading the CSV again.
+
+    The S3 client is injected, so the loader can be exercised against a local S3 stand-in such as moto.
+"""
+import glob
+import hashlib
+import logging
+import os
+import re
+
+import pandas as pd
+from botocore.exceptions import ClientError
+from pandas.api.types import union_categoricals
+
+from learner_data import LEARNER_DATA_LOAD_MODE, read_learner_csv
+
+
+# S3 loader configuration:
+# 1. S3_SNAPSHOT_DIR:
+#    - Directory where the Feather snapshots of downloaded S3 objects are stored. Empty disables snapshots.
+# 2. S3_CSV_CHUNK_ROWS:
+#    - Number of CSV rows parsed per chunk while streaming the S3 body.
+S3_SNAPSHOT_DIR = os.environ.get("S3_SNAPSHOT_DIR", ".snapshots")
+S3_CSV_CHUNK_ROWS = int(os.environ.get("S3_CSV_CHUNK_ROWS", "100000"))
+
+
+def snapshots_supported() -> bool:
+    """
+        Returns:
+            bool: True if pyarrow (needed to read / write Feather files) is installed.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def concat_chunks(chunks: list) -> pd.DataFrame:
+    """
+        Concatenates parsed CSV chunks, keeping categorical columns categorical.
+
+        Chunks parsed separately have different category sets, and `pd.concat` would turn those columns
+        back into (large) object columns. The categories of every chunk are unified first.
+
+        Arguments:
+            chunks (list): DataFrames parsed from consecutive parts of the same CSV.
+
+        Returns:
+            pd.DataFrame: The whole frame.
+    """
+    if not chunks:
+        return pd.DataFrame()
+    for column in chunks[0].columns:
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype):
+            categories = union_categoricals([chunk[column] for chunk in chunks]).categories
+            for chunk in chunks:
+                chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+class S3DatasetLoader:
+    def __init__(
+        self,
+        s3_client,
+        bucket: str,
+        key: str,
+        snapshot_dir: str = S3_SNAPSHOT_DIR,
+        chunk_rows: int = S3_CSV_CHUNK_ROWS,
+        mode: str = None,
+    ) -> None:
+        """
+            Initializes the S3DatasetLoader.
+
+            Arguments:
+                s3_client: A boto3 S3 client (or any compatible stand-in).
+                bucket (str): Name of the S3 bucket.
+                key (str): Key of the CSV object.
+                snapshot_dir (str): Directory for local Feather snapshots. Empty disables snapshots.
+                chunk_rows (int): Number of CSV rows parsed per chunk.
+                mode (str): Learner data loading mode ("standard" or "compact"). Defaults to LEARNER_DATA_LOAD_MODE.
+        """
+        self.logger = logging.getLogger()
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.chunk_rows = chunk_rows
+        self.mode = mode or LEARNER_DATA_LOAD_MODE
+        self.snapshot_dir = snapshot_dir if snapshot_dir and snapshots_supported() else ""
+        if self.snapshot_dir:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+
+        # Snapshot files are named "<bucket/key hash>.<mode>.<etag>.feather".
+        # The mode is part of the name because compact and standard frames have different column types.
+        self._prefix = f"{hashlib.sha1(f'{bucket}/{key}'.encode('utf-8')).hexdigest()[:12]}.{self.mode}."
+
+    def load(self) -> pd.DataFrame:
+        """
+            Loads the learner data, from the local snapshot if S3 reports the object unchanged,
+            otherwise by streaming and parsing the object body.
+
+            Returns:
+                pd.DataFrame: The learner data.
+        """
+        snapshot_etag = self.latest_snapshot_etag()
+        request = {"Bucket": self.bucket, "Key": self.key}
+        if snapshot_etag:
+            request["IfNoneMatch"] = f'"{snapshot_etag}"'
+
+        try:
+            obj = self.s3.get_object(**request)
+        except ClientError as e:
+            if snapshot_etag and self._is_not_modified(e):
+                self.logger.info(f"s3://{self.bucket}/{self.key} not modified, using local snapshot")
+                return self.read_snapshot(snapshot_etag)
+            raise
+
+        etag = obj.get("ETag", "").strip('"')
+        frame = self.parse_body(obj["Body"])
+        self.logger.info(f"Streamed {len(frame)} rows from s3://{self.bucket}/{self.key} (ETag {etag})")
+        if self.snapshot_dir and etag:
+            self.write_snapshot(frame, etag)
+        return frame
+
+    def parse_body(self, body) -> pd.DataFrame:
+        """
+            Parses the S3 response body chunk by chunk, reading straight from the HTTP stream.
+
+            Arguments:
+                body: The (binary, file-like) `StreamingBody` of the S3 response.
+
+            Returns:
+                pd.DataFrame: The parsed learner data.
+        """
+        try:
+            # Chunked parsing is only supported by the C engine.
+            reader = read_learner_csv(body, mode=self.mode, engine="c", chunksize=self.chunk_rows)
+            with reader:
+                return concat_chunks(list(reader))
+        finally:
+            body.close()
+
+    def snapshot_path(self, etag: str) -> str:
+        """
+            Arguments:
+                etag (str): ETag of the S3 object (without quotes).
+
+            Returns:
+                str: Path of the snapshot of that object version.
+        """
+        return os.path.join(self.snapshot_dir, f"{self._prefix}{re.sub(r'[^0-9A-Za-z-]', '_', etag)}.feather")
+
+    def latest_snapshot_etag(self) -> str:
+        """
+            Returns:
+                str: ETag of the most recent local snapshot of the object, or "" if there is none.
+        """
+        if not self.snapshot_dir:
+            return ""
+        paths = glob.glob(os.path.join(self.snapshot_dir, f"{glob.escape(self._prefix)}*.feather"))
+        if not paths:
+            return ""
+        latest = max(paths, key=os.path.getmtime)
+        return os.path.basename(latest)[len(self._prefix):-len(".feather")]
+
+    def read_snapshot(self, etag: str) -> pd.DataFrame:
+        """
+            Reads a local snapshot, memory-mapping the Arrow file.
+
+            Arguments:
+                etag (str): ETag of the snapshot to read.
+
+            Returns:
+                pd.DataFrame: The learner data.
+        """
+        from pyarrow import feather
+
+        table = feather.read_table(self.snapshot_path(etag), memory_map=True)
+        return table.to_pandas()
+
+    def write_snapshot(self, frame: pd.DataFrame, etag: str):
+        """
+            Writes the snapshot of an object version and removes the snapshots of older versions.
+            Failures are logged only, a missing snapshot just means the next start downloads again.
+
+            Arguments:
+                frame (pd.DataFrame): The parsed learner data.
+                etag (str): ETag of the object version it was parsed from.
+        """
+        path = self.snapshot_path(etag)
+        try:
+            # Write to a temporary file first so a concurrent reader never sees a partial snapshot.
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            # Uncompressed, so the file can be memory-mapped on read.
+            frame.to_feather(tmp_path, compression="uncompressed")
+            os.replace(tmp_path, path)
+            for old in glob.glob(os.path.join(self.snapshot_dir, f"{glob.escape(self._prefix)}*.feather")):
+                if old != path:
+                    os.remove(old)
+        except Exception as e:
+            self.logger.info(f"Error writing S3 snapshot {path} --- {e}")
+
+    @staticmethod
+    def _is_not_modified(error: ClientError) -> bool:
+        """
+            Returns:
+                bool: True if a conditional GET failed because the object was not modified (HTTP 304).
+        """
+        response = error.response or {}
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        code = str(response.get("Error", {}).get("Code", ""))
+        return status == 304 or code in ("304", "NotModified")
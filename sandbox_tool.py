@@ -0,0 +1,59 @@
+"""
+    The agent tool running generated code in the `code_sandbox` worker processes.
+
+    Kept apart from `code_sandbox.py`: the sandbox workers preload that module, and neither they nor the
+    server's startup should have to import langchain for it.
+"""
+from typing import Any, Optional
+
+from langchain_experimental.tools.python.tool import PythonAstREPLTool, sanitize_input
+from pydantic import PrivateAttr
+
+from code_sandbox import SandboxError, SandboxWorker
+
+
+class SandboxedPythonTool(PythonAstREPLTool):
+    """
+        Drop-in replacement for the agent's `python_repl_ast` tool that runs the code in a `SandboxPool`.
+        A worker is leased on the first call of an agent run and kept until `end_session()`.
+    """
+
+    pool: Any = None
+    dataset_path: str = ""
+    _worker: Optional[SandboxWorker] = PrivateAttr(default=None)
+
+    def _run(self, query: str, run_manager=None) -> str:
+        if self.sanitize_input:
+            query = sanitize_input(query)
+        try:
+            if self._worker is None:
+                self._worker = self.pool.lease(self.dataset_path)
+            return self.pool.run(self._worker, query)
+        except SandboxError as e:
+            # The worker was killed: the next call starts over in a new session.
+            if self._worker is not None:
+                self.pool.release(self._worker, broken=True)
+                self._worker = None
+            return f"SandboxError: {e}. The worker was restarted, variables defined so far are lost."
+
+    def end_session(self, dataset_path: str = None):
+        """
+            Returns the leased worker to the pool (its variables are dropped with the session).
+
+            Arguments:
+                dataset_path (str): Dataset the next session runs on, if it changed.
+        """
+        if self._worker is not None:
+            self.pool.release(self._worker)
+            self._worker = None
+        if dataset_path:
+            self.dataset_path = dataset_path
+
+    def abort(self):
+        """
+            Kills the leased worker (it is replaced in the pool), e.g. when the agent run was cancelled while
+            its code may still be running. A call still waiting on the worker returns a SandboxError.
+        """
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            self.pool.release(worker, broken=True)
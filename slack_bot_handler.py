@@ -1,22 +1,59 @@
+import asyncio
+import functools
 import logging
 import os
 from dotenv import find_dotenv, load_dotenv
-import requests
-from langchain.agents.agent_types import AgentType
-
-# from langchain_experimental.agents.agent_toolkits import create_csv_agent
-from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
-from langchain_openai import ChatOpenAI
-import boto3
-from io import StringIO
-import pandas as pd
-from boto3.dynamodb.conditions import Key
+import importlib
 import time
+import threading
+from dataset_cache import DatasetCache, file_version, s3_object_version
+from dataset_registry import DatasetRegistry, load_dataset_sources
+from request_context import RequestContext
+from slack_client import AsyncSlackClient, ThrottledMessageUpdater
+from answer_cache import AnswerCache, normalize_question
+from agent_pool import AgentPool
+from code_sandbox import SANDBOX_WORKERS, SandboxPool, sandbox_supported
+from metrics import add_tokens, record_request, span
+from llm_limiter import LLMLimiter, StageTimeout
+from prompt_budget import compact_data
+from slack_format import format_data, markdown_to_mrkdwn, to_messages
 
 # Load environment variables from a .env file (if it exists)
 # .env files holds the below variables and secret keys
 load_dotenv(find_dotenv(), override=True)
 
+# Heavy modules (pandas, boto3, langchain and the modules built on them) are imported on first use
+# or by `SlackBotHandler.warm_up`, not when this module is imported: importing them takes seconds,
+# and `/health` should answer as soon as a (re)started worker is up. `warm_up` imports these.
+HEAVY_MODULES = (
+    "pandas",
+    "boto3",
+    "learner_data",
+    "rollup_cube",
+    "fast_path",
+    "s3_loader",
+    "langchain_openai",
+    "langchain_community.callbacks",
+    "langchain_experimental.agents.agent_toolkits",
+    "sandbox_tool",
+)
+
+
+def import_pandas():
+    """
+        Imports pandas, configured for the shared learner DataFrame.
+
+        The DataFrame is read by several requests at once. Copy-on-write makes `frame.copy(deep=False)`
+        cheap while keeping each request's modifications private.
+
+        Returns:
+            module: The pandas module.
+    """
+    import pandas as pd
+
+    pd.set_option("mode.copy_on_write", True)
+    return pd
+
 # Fetch required environment variables for authentication and configuration
 # These environment variables are essential for secure communication with Slack's API and OpenAI services.
 
@@ -40,10 +77,15 @@ SLACK_BOT_USER_ID = os.environ["SLACK_BOT_USER_ID"]
 #    - Enables the bot to generate responses, answer questions, or handle complex queries based on AI processing.
 OPEN_AI_API_KEY = os.environ["OPEN_AI_API_KEY"]
 
-# 5. SLACK_BASE_URL:
-#    - The base URL for sending messages to Slack via their Web API.
-#    - Specifically used for posting messages to channels, threads, or direct messages.
-SLACK_BASE_URL = "https://slack.com/api/chat.postMessage"
+# 5. SLACK_API_BASE_URL:
+#    - The base URL for sending messages to Slack via their Web API (defaults to https://slack.com/api).
+#    - Configured in `slack_client.py`, which owns the pooled HTTP connection to Slack.
+
+# 6. SUPERSEDE_MENTIONS:
+#    - Which earlier mention of the same user in the same channel a new mention cancels while it is still answered:
+#      "same" (default) only the same question again (an edited or re-sent message), "any" every earlier question,
+#      "off" none.
+SUPERSEDE_MENTIONS = os.environ.get("SUPERSEDE_MENTIONS", "same")
 
 
 # AWS S3 Configuration:
@@ -56,39 +98,164 @@ S3_BUCKET_NAME = "starkslackbot"
 #    - The specific file within the S3 bucket where data (like learner information) is stored.
 S3_FILE_NAME = "Learner Data.csv"
 
+# Text of the message posted (or the "queued" message updated) while a mention is being answered.
+PROCESSING_MESSAGE = "Working on your data request..."
+
+# Datasets:
+# The datasets the bot answers from (local CSVs and S3 objects, chosen per channel or keyword)
+# are configured in a JSON file, see `dataset_registry.py`. Without it, `data.csv` is used.
+
+
+# Learner data schema:
+# The column data types (standard and compact loading modes) live in `learner_data.py`,
+# shared by the local CSV and S3 loaders. Set LEARNER_DATA_LOAD_MODE=compact to load
+# text columns as categoricals and the 0/1 flags as narrow ints.
+
 
 class SlackBotHandler:
-    def __init__(self) -> None:
+    def __init__(self, executor=None, llm=None) -> None:
         """
             Initializes the SlackBotHandler class.
 
             This method sets up various components required for interacting with Slack,
             OpenAI, and AWS services. It also initializes variables to store data for handling
             incoming Slack events and processing learner data.
+
+            Arguments:
+                executor (Executor): Worker pool running the blocking data work. Defaults to asyncio's default executor.
+                llm (BaseChatModel): Chat model used by the agents and for the insights. Defaults to OpenAI's GPT-4o
+                    (benchmarks plug in a fake model here).
         """
         self.logger = logging.getLogger()     # Set up a logger instance for logging messages throughout the class.
-        self.slack_url = SLACK_BASE_URL # Slack API URL for sending messages to channels or users.
-        self.s3 = boto3.client("s3", region_name="us-east-1") # The S3 client is used to upload, download, and manage files in the specified S3 bucket.
-        self.learner_data = pd.DataFrame() # Initialize an empty pandas DataFrame to store learner data.
+        self.executor = executor
+        self.slack = AsyncSlackClient(token=SLACK_BOT_TOKEN) # Async Slack Web API client with a pooled keep-alive connection.
+        # The S3 client (`self.s3`), the OpenAI client (`self.llm`) and the fast path (`self.fast_path`) are built on first use.
+        self._s3 = None
+        self._llm = llm
+        self._fast_path = None
+        self._lazy_lock = threading.Lock()
+        self.s3_loaders = {}  # (bucket, key) -> S3DatasetLoader streaming the CSV from S3, with a local snapshot keyed by ETag.
+        self.dataset_caches = {}  # Versioned in-memory caches, one per data source, so data is only re-read when it changes.
+        self._dataset_caches_lock = threading.Lock()
+        # The configured datasets, loaded on first use and evicted (least recently used first) above a memory budget.
+        sources, default_dataset = load_dataset_sources()
+        self.datasets = DatasetRegistry(sources, load=self.load_source, evict=self.evict_source, default=default_dataset)
+        self.answer_cache = AnswerCache()  # Answers to repeated questions, keyed by (question, dataset version).
+        self.agent_pool = AgentPool(self.build_agent)  # DataFrame agents built once per dataset version and reused.
+        # Agent-generated code runs in separate, resource-limited worker processes (None: in-process).
+        self.sandbox = SandboxPool() if SANDBOX_WORKERS > 0 and sandbox_supported() else None
+        self.llm_limiter = LLMLimiter()  # Caps the OpenAI calls in flight and bounds each OpenAI stage with a timeout.
+        self._in_flight = {}  # (channel, user) -> {task: context} of the mentions being answered, see SUPERSEDE_MENTIONS.
+        self._queued_messages = {}  # event ID -> future of the "queued" message's timestamp, reused as processing message.
+        self.warm_up_seconds = None  # Duration of `warm_up`, once it has run.
+
+        # Note: no per-request state (event ids, learner data, agents) is kept on the handler.
+        # A single handler serves several mentions in parallel, so that state lives on a `RequestContext`.
+
+    def _lazy(self, attribute, build):
+        """
+            Returns a shared component, building it on first use (once, even if several threads ask at once).
 
-        # Set up the OpenAI LLM (Language Learning Model) for generating responses.
-        # Using the ChatOpenAI class from the OpenAI library to interact with the GPT-4 model.
-        # `temperature=0` ensures that the responses are deterministic (i.e., less random).
-        self.llm = ChatOpenAI(temperature=0, model="gpt-4o", api_key=OPEN_AI_API_KEY)
-        self.df_agent = ""
-        self.client_msg_id = ""  # Stores the ID of the client message to track and prevent duplicate processing
-        self.event_id = ""  # Stores the Slack event ID to ensure that each event is processed only once.
+            Arguments:
+                attribute (str): Name of the attribute holding the component.
+                build (callable): Builds the component.
+        """
+        value = getattr(self, attribute)
+        if value is None:
+            with self._lazy_lock:
+                value = getattr(self, attribute)
+                if value is None:
+                    value = build()
+                    setattr(self, attribute, value)
+        return value
+
+    @property
+    def s3(self):
+        """
+            The S3 client used to upload, download, and manage files in the specified S3 bucket.
+        """
+        def build():
+            import boto3
+
+            return boto3.client("s3", region_name="us-east-1")
+
+        return self._lazy("_s3", build)
+
+    @property
+    def llm(self):
+        """
+            The chat model generating the responses (OpenAI's GPT-4o unless one was passed in).
+        """
+        def build():
+            from langchain_openai import ChatOpenAI
+
+            # `temperature=0` ensures that the responses are deterministic (i.e., less random).
+            # The client is shared by every request and never mutated after construction.
+            # `stream_usage=True` makes streamed responses report their token usage as well.
+            return ChatOpenAI(temperature=0, model="gpt-4o", api_key=OPEN_AI_API_KEY, stream_usage=True)
 
-    def handle_app_mention(self, body):
+        return self._lazy("_llm", build)
+
+    @property
+    def fast_path(self):
+        """
+            Answers simple aggregate questions with pandas, without the LLM agent.
+        """
+        def build():
+            import_pandas()
+            from fast_path import FastPath
+
+            return FastPath()
+
+        return self._lazy("_fast_path", build)
+
+    def warm_up(self):
+        """
+            Does ahead of the first mention what would otherwise happen on first use: imports the heavy
+            modules, builds the S3 and OpenAI clients and the fast path, starts the sandbox workers and
+            loads the datasets marked `preload`. Blocking: run it on a worker thread.
+        """
+        def import_modules():
+            import_pandas()
+            for module in HEAVY_MODULES:
+                importlib.import_module(module)
+
+        def build_clients():
+            # Reading the lazy attributes builds them.
+            self.s3, self.llm, self.fast_path
+
+        def start_sandbox():
+            if self.sandbox is not None:
+                self.sandbox.start()
+
+        started = time.perf_counter()
+        # A failing step (e.g. S3 unreachable) must not keep the others from running.
+        for step in (import_modules, build_clients, start_sandbox, self.datasets.preload):
+            try:
+                step()
+            except Exception as e:
+                self.logger.info(f"Error occured at warming up ({step.__name__}) --- {e}")
+        self.warm_up_seconds = time.perf_counter() - started
+        self.logger.info(f"Warm-up done in {self.warm_up_seconds:.2f}s")
+
+    async def handle_app_mention(self, body):
         """
             Handles Slack 'app_mention' events.
 
             This method is triggered when a user mentions the bot in a Slack channel. It processes the event by:
             1. Sending a confirmation message to Slack indicating that the bot is working on the request.
             2. Loading data from an S3 bucket into a pandas DataFrame.
-            3. Creating a Pandas DataFrame Agent using OpenAI's GPT model to generate insights.
-            4. Extracting the user's question from the Slack message, generating a relevant response,
-            and posting the results back to Slack.
+            3. Computing the data relevant to the user's question (pandas fast path or a DataFrame Agent).
+            4. Updating the confirmation message with that data as soon as it is ready, then streaming
+            the insights generated by OpenAI's GPT model into the same message.
+
+            All state for the event is kept on a request-scoped `RequestContext`, so this method
+            is safe to run for several mentions at once. Slack and OpenAI calls are awaited on the event loop
+            (with a limit on the OpenAI calls in flight and a timeout per stage, see `llm_limiter.py`);
+            only the blocking data work (dataset loads, fast path, agent builds) runs on the worker pool.
+            Asking the same question again (or any newer question, see SUPERSEDE_MENTIONS) cancels the earlier
+            mention of that user in that channel if it is still being answered.
+            Every stage is timed (see `metrics.py`) and the request is recorded in the metrics once it finishes.
 
             Arguments:
                 body (dict): The JSON payload received from Slack containing event details.
@@ -96,111 +263,407 @@ class SlackBotHandler:
             Returns:
                 None: Sends a response directly to Slack with the generated insights.
         """
+        # Step 1: Build the request context holding the identifiers for the current Slack message and event
+        # and the user's question (with the bot mention stripped).
+        ctx = RequestContext.from_body(body, bot_user_id=SLACK_BOT_USER_ID)
+        started = time.perf_counter()
+        # The mention runs as its own task so a newer mention from the same user in the same channel
+        # can cancel it (without cancelling the job queue worker awaiting it).
+        task = asyncio.create_task(self._handle_app_mention(ctx))
+        key = (ctx.channel_id, ctx.user_id)
+        in_flight = self._in_flight.setdefault(key, {}) if ctx.user_id else {}
+        for previous, previous_ctx in in_flight.items():
+            if not previous.done() and self.supersedes(ctx, previous_ctx):
+                previous.cancel()
+        in_flight[task] = ctx
+        try:
+            await task
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise  # The job queue itself is being stopped.
+            ctx.served_by = "superseded"
+            self.logger.info(f"Event {ctx.event_id} superseded by a newer question")
+            await self._notify_stopped(ctx, "_Stopped: you asked this question again._")
+        except StageTimeout as e:
+            ctx.served_by = "timeout"
+            self.logger.info(f"Error occured at event {ctx.event_id} --- {e}")
+            await self._notify_stopped(ctx, "Sorry, this request took too long to answer. Please try again or narrow the question.")
+        finally:
+            self._queued_messages.pop(body.get("event_id"), None)
+            in_flight.pop(task, None)
+            if not in_flight and self._in_flight.get(key) is in_flight:
+                del self._in_flight[key]
+            record_request(ctx, time.perf_counter() - started)
+
+    @staticmethod
+    def supersedes(ctx, previous_ctx) -> bool:
+        """
+            Tells whether a new mention cancels an earlier one of the same user in the same channel.
 
-        # Send an initial "processing" message to Slack to inform the user
-        self.send_processing_message(body=body)
+            Arguments:
+                ctx (RequestContext): The new mention.
+                previous_ctx (RequestContext): The mention still being answered.
 
-        # Load data from the specified S3 bucket into a pandas DataFrame.
-        # self.load_data_from_s3()
-        self.load_data_from_csv('data.csv')
+            Returns:
+                bool: True if the earlier mention should be stopped, see SUPERSEDE_MENTIONS.
+        """
+        if SUPERSEDE_MENTIONS == "any":
+            return True
+        if SUPERSEDE_MENTIONS != "same":
+            return False
+        # An edited message keeps its client_msg_id; a re-sent one asks the same question.
+        same_message = bool(ctx.client_msg_id) and ctx.client_msg_id == previous_ctx.client_msg_id
+        return same_message or normalize_question(ctx.text) == normalize_question(previous_ctx.text)
+
+    async def _notify_stopped(self, ctx, msg):
+        """
+            Tells the user a mention was stopped, in its processing message if one was posted.
 
-        #  # Step 3: Create a DataFrame agent using OpenAI's GPT-4 model.
-        # The agent will analyze the data and generate responses based on user questions.
-        df_agent = create_pandas_dataframe_agent(
-            llm=self.llm,
-            df=self.learner_data,
-            # verbose=True,
-            agent_type=AgentType.OPENAI_FUNCTIONS,
-            allow_dangerous_code=True,
-        )
+            Arguments:
+                ctx (RequestContext): The context of the stopped mention.
+                msg (str): The message shown to the user.
+        """
+        try:
+            if ctx.processing_ts:
+                await self.slack.update_message(channel=ctx.channel_id, ts=ctx.processing_ts, text=msg)
+            else:
+                await self.slack.post_message(channel=ctx.channel_id, text=msg)
+        except Exception as e:
+            self.logger.info(f"Error occured at sending slack response --- {e}")
 
-        # Step 4: Store identifiers for the current Slack message and event
-        # to ensure each event is processed uniquely.
-        self.client_msg_id = body["event"]["client_msg_id"]
-        self.event_id = body["event_id"]
+    async def _handle_app_mention(self, ctx):
+        """
+            Runs the steps of `handle_app_mention` for a request context.
 
-        try:
-            # Step 5: Extract the user's question from the Slack message text.
-            # The bot was mentioned, so we strip the mention from the message.
-            text = body["event"]["text"]
-            mention = f"<@{SLACK_BOT_USER_ID}>"
-            text = text.replace(mention, "").strip()
-
-            # Step 6: Construct a prompt for the DataFrame agent to generate relevant data.
-            user_question = f"""
-                Question : {text}
-                Instruction : output should be well formatted pivot table. Consider complete dataset and result should be accurate
-            """
-            relevant_data = df_agent.invoke(user_question)["output"]
-
-            # Step 7: Create a detailed prompt for the GPT model to generate insights.
-            # It uses the extracted data to generate a meaningful and concise response.
-            prompt = f"""
-                Question: {text}
-                Data: {relevant_data}
-                Provide brief and impactful insights 
-                that can be drawn from above question and data
-            """
+            Arguments:
+                ctx (RequestContext): The context of the mention being processed.
+        """
+        # Step 2: Answer straight from the cache if the same question was already asked
+        # against the current dataset version (no processing message, no LLM calls).
+        loop = asyncio.get_running_loop()
+        # A mention that had to wait in the job queue already has a "queued" message: it is updated in place
+        # instead of posting a second message.
+        queued = self._queued_messages.pop(ctx.body.get("event_id"), None)
+        queued_ts = await queued if queued is not None else None
+
+        cached = await loop.run_in_executor(self.executor, self.get_cached_answer, ctx)
+        if cached is not None:
+            if queued_ts:
+                updater = ThrottledMessageUpdater(self.slack, channel=ctx.channel_id, ts=queued_ts)
+                await self._update_message(ctx, updater, cached.relevant_data, cached.insight, final=True)
+            else:
+                await self.send_slack_response(body=ctx.body, msg=cached.insight, rel_data=cached.relevant_data, ctx=ctx)
+            return
+
+        # Send an initial "processing" message to Slack to inform the user.
+        # It is later updated in place with the results, so keep its timestamp.
+        with span(ctx, "processing_message"):
+            if queued_ts:
+                await self.slack.update_message(channel=ctx.channel_id, ts=queued_ts, text=PROCESSING_MESSAGE)
+                ctx.processing_ts = queued_ts
+            else:
+                ctx.processing_ts = await self.send_processing_message(body=ctx.body)
+
+        # Step 3: Get the relevant data: the fast path runs on the worker pool, the DataFrame agent on the event loop.
+        relevant_data = await self.get_relevant_data(ctx)
+        if relevant_data is None:
+            return
+
+        # Step 4: Show the data right away and stream the insights into the same message.
+        await self.stream_insight(ctx, relevant_data, ts=ctx.processing_ts)
+
+    def load_dataset(self, ctx):
+        """
+            Loads the current dataset version into the request context (if not loaded yet).
+
+            Arguments:
+                ctx (RequestContext): The context of the mention being processed.
+
+            Returns:
+                Dataset: The dataset the request is answered from, or None if it could not be loaded.
+        """
+        if ctx.dataset is None:
+            # Load the dataset the question is about (chosen by a keyword in the question, the channel, or the default one).
+            with span(ctx, "data_load"):
+                source = self.datasets.resolve(ctx.channel_id, ctx.text)
+                ctx.dataset_name = source.name
+                ctx.dataset = self.datasets.get(source.name)
+        return ctx.dataset
+
+    def get_cached_answer(self, ctx):
+        """
+            Looks up a previously generated answer for the request's question and dataset version.
+
+            Arguments:
+                ctx (RequestContext): The context of the mention being processed.
+
+            Returns:
+                CachedAnswer: The cached answer, or None on a cache miss.
+        """
+        if self.load_dataset(ctx) is None:
+            return None
+        cached = self.answer_cache.get(ctx.text, ctx.dataset.fingerprint)
+        ctx.cache["answer_cache"] = "miss" if cached is None else "hit"
+        if cached is not None:
+            ctx.served_by = "answer_cache"
+            self.logger.info(f"Answer cache hit for event {ctx.event_id} --- {self.answer_cache.stats()}")
+        return cached
+
+    async def get_relevant_data(self, ctx):
+        """
+            Computes the data relevant to the question, with the pandas fast path (on the worker pool)
+            or the DataFrame agent (awaited on the event loop).
+
+            Arguments:
+                ctx (RequestContext): The context of the mention being processed.
+
+            Returns:
+                str: The relevant data (usually a pivot table), or None if it could not be generated.
 
-            # Generate the final response using the OpenAI model.
-            response = self.llm.invoke(prompt)
+            Raises:
+                StageTimeout: If the agent did not answer in time.
+        """
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(self.executor, self.load_dataset, ctx) is None:
+            return None
 
-            # Send the generated response and relevant data back to Slack.
-            self.send_slack_response(body=body, msg=response, rel_data=relevant_data)
+        try:
+            relevant_data = await loop.run_in_executor(self.executor, self.answer_fast_path, ctx)
+            if relevant_data is not None:
+                ctx.served_by = "fast_path"
+            else:
+                ctx.served_by = "agent"
+                relevant_data = await self.ask_agent(ctx)
+            return relevant_data
+        except StageTimeout:
+            raise
         except Exception as e:
             self.logger.info(f"Error occured at generating response --- {e}")
+            return None
 
-    def format_for_slack(self, text):
+    def answer_fast_path(self, ctx):
+        """
+            Tries the deterministic pandas fast path. Simple aggregate questions (pass rate, average grade,
+            counts by platform / course / term / AY) are answered in milliseconds.
+            It only knows the learner data schema; questions about other datasets always go to the agent.
 
+            Arguments:
+                ctx (RequestContext): The context of the mention being processed (with its dataset loaded).
+
+            Returns:
+                str: The answer as a markdown pivot table, or None if the question should go to the agent.
         """
-            Converts markdown-like text into a Slack-compatible format.
+        if self.datasets.sources[ctx.dataset_name].schema != "learner":
+            return None
+        with span(ctx, "fast_path"):
+            return self.fast_path.answer(ctx.text, ctx.dataset)
+
+    async def stream_insight(self, ctx, relevant_data, ts=None):
+        """
+            Generates the insights on the relevant data and delivers them progressively.
 
-            This function performs several transformations to make text compatible with Slack's formatting,
-            such as converting bold, italics, headers, and lists into Slack's Markdown-like syntax.
+            The processing message (`ts`) is first updated with the relevant data, then with the insight
+            text as its tokens stream in from the model, at a rate throttled to stay within Slack's limits.
+            Without a processing message to update, the full response is posted once it is complete.
 
             Arguments:
-                text (str): The text that needs to be formatted for Slack.
+                ctx (RequestContext): The context of the mention being processed.
+                relevant_data (str): The data returned by the fast path or the DataFrame agent.
+                ts (str): Timestamp of the processing message to update, or None.
 
             Returns:
-                str: The formatted text, ready to be sent to Slack.
+                None: Sends the response directly to Slack.
+
+            Raises:
+                StageTimeout: If the insights were not generated in time.
         """
-        # Convert bold (**text**) to Slack-compatible (*text*)
-        formatted_text = text.replace("**", "*")
+        try:
+            # Large tables are shortened to the prompt's token budget (top rows plus totals);
+            # the Slack response still shows the full data.
+            # Only the fast path's count metrics are totalled; rates, averages and unknown columns are not.
+            from fast_path import COUNT_LABELS
+
+            with span(ctx, "prompt_compaction"):
+                data = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, functools.partial(compact_data, relevant_data, additive_columns=COUNT_LABELS)
+                )
+            if data.tokens_saved:
+                ctx.tokens_saved["llm_invoke"] = data.tokens_saved
+                self.logger.info(
+                    f"Insight data compacted from {data.original_tokens} to {data.tokens} tokens ({data.rows_omitted} rows omitted)"
+                )
+
+            # Create a detailed prompt for the GPT model to generate insights.
+            # It uses the extracted data to generate a meaningful and concise response.
+            prompt = f"""
+            Question: {ctx.text}
+            Data: {data.text}
+            Provide brief and impactful insights 
+            that can be drawn from above question and data
+        """
+            if ts is None:
+                # Generate the final response using the OpenAI model and send it with the data in one message.
+                async with self.llm_limiter.limit(ctx, "llm_invoke"):
+                    with span(ctx, "llm_invoke"):
+                        response = await self.llm.ainvoke(prompt)
+                self._add_usage(ctx, response)
+                insight = response.content
+                await self.send_slack_response(body=ctx.body, msg=insight, rel_data=relevant_data, ctx=ctx)
+            else:
+                updater = ThrottledMessageUpdater(self.slack, channel=ctx.channel_id, ts=ts)
+                await self._update_message(ctx, updater, relevant_data, "_Generating insights..._", force=True)
+                insight = ""
+                # The OpenAI call stays open while the response streams in, so the slot is held until the end.
+                async with self.llm_limiter.limit(ctx, "llm_invoke"):
+                    stream = self.llm.astream(prompt)
+                    try:
+                        while True:
+                            # Only the wait for the next chunk is counted as model time; the Slack updates
+                            # made in between are timed as their own stages.
+                            with span(ctx, "llm_invoke"):
+                                chunk = await anext(stream, None)
+                            if chunk is None:
+                                break
+                            self._add_usage(ctx, chunk)
+                            insight += chunk.content
+                            await self._update_message(ctx, updater, relevant_data, insight)
+                    finally:
+                        # Closes the OpenAI connection right away if the stream is cancelled or times out.
+                        await stream.aclose()
+                await self._update_message(ctx, updater, relevant_data, insight, final=True)
+
+            # Remember the answer for the next time this question is asked against this dataset version.
+            self.answer_cache.put(ctx.text, ctx.dataset.fingerprint, relevant_data, insight)
+        except StageTimeout:
+            raise
+        except Exception as e:
+            self.logger.info(f"Error occured at generating response --- {e}")
 
-        # Convert italics (__text__) to Slack-compatible (_text_)
-        formatted_text = formatted_text.replace("__", "_")
+    async def ask_agent(self, ctx):
+        """
+            Asks the LLM DataFrame agent for the data relevant to the user's question.
+            Used for every question the fast path cannot answer.
 
-        # Convert headers (### Header) to Slack-compatible (*Header*) for emphasis
-        formatted_text = formatted_text.replace("### ", "*")
+            The agent runs with `ainvoke` on the event loop: while it waits on OpenAI it holds no thread.
+            Its generated code still runs off the loop (in the sandbox, or on asyncio's default executor).
 
-        # Format tables by replacing pipes and hyphens with plain text (Slack doesn't support tables directly)
-        formatted_text = formatted_text.replace("|", "")
-        formatted_text = formatted_text.replace(
-            "---", "—"
-        )  # Replace table dividers with em dashes
+            Arguments:
+                ctx (RequestContext): The context of the mention being processed.
 
-        # Convert ordered lists (1. item) and unordered lists (- item) to Slack-style lists
-        lines = formatted_text.splitlines()
-        for i, line in enumerate(lines):
-            # Ordered list items
-            if line.strip().startswith("1. "):
-                lines[i] = line.replace("1. ", "• ", 1)  # Use bullet points instead
+            Returns:
+                str: The agent's answer (usually a pivot table).
+
+            Raises:
+                StageTimeout: If the agent did not answer within AGENT_TIMEOUT_SECONDS.
+        """
+        # Construct a prompt for the DataFrame agent to generate relevant data.
+        user_question = f"""
+            Question : {ctx.text}
+            Instruction : output should be well formatted pivot table. Consider complete dataset and result should be accurate
+        """
+        # Borrow an agent built for this dataset version; it is used by this request only until returned.
+        from langchain_community.callbacks import get_openai_callback
+
+        # If the run is cancelled or times out, the agent is discarded rather than returned to the pool.
+        async with self.agent_pool.acheckout(ctx.dataset, timings=ctx.timings, executor=self.executor) as df_agent:
+            ctx.cache["agent_pool"] = "hit" if ctx.timings.get("agent_build") == 0.0 else "miss"
+            # The callback counts the tokens of every OpenAI call the agent makes while answering.
+            async with self.llm_limiter.limit(ctx, "agent_invoke"):
+                with span(ctx, "agent_invoke"), get_openai_callback() as usage:
+                    try:
+                        output = (await df_agent.ainvoke(user_question))["output"]
+                    finally:
+                        add_tokens(ctx, "agent_invoke", usage.prompt_tokens, usage.completion_tokens)
+            return output
+
+    def build_agent(self, dataset):
+        """
+            Creates a DataFrame agent using OpenAI's GPT-4 model for a dataset version.
+            Called by the agent pool only when no idle agent exists for that version.
 
-            # Unordered list items
-            elif line.strip().startswith("- "):
-                lines[i] = line.replace("- ", "• ", 1)
+            Arguments:
+                dataset (Dataset): The dataset snapshot the agent works on.
 
-        # Join lines back together
-        formatted_text = "\n".join(lines)
+            Returns:
+                AgentExecutor: The DataFrame agent.
+        """
+        from langchain.agents.agent_types import AgentType
+        from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
+        from langchain_experimental.tools.python.tool import PythonAstREPLTool
+        from sandbox_tool import SandboxedPythonTool
 
-        # Optional: Replace multiple newlines with a single newline for cleaner formatting
-        formatted_text = "\n".join(
-            [line for line in formatted_text.splitlines() if line.strip()]
+        # The agent will analyze the data and generate responses based on user questions.
+        # The agent gets a lazy copy of the shared frame: with copy-on-write enabled, any change
+        # made by agent-generated code is private to the agent (and reset when it returns to the pool).
+        agent = create_pandas_dataframe_agent(
+            llm=self.llm,
+            df=dataset.frame.copy(deep=False),
+            # verbose=True,
+            agent_type=AgentType.OPENAI_FUNCTIONS,
+            allow_dangerous_code=True,
         )
 
-        return formatted_text
+        # With the sandbox enabled, the agent's Python tool is swapped for one with the same name that
+        # runs the generated code in the sandbox pool, on a shared memory-mapped copy of the dataset.
+        if self.sandbox is not None:
+            dataset_path = self.sandbox.publish(dataset)
+            agent.tools = [
+                SandboxedPythonTool(pool=self.sandbox, dataset_path=dataset_path) if isinstance(tool, PythonAstREPLTool) else tool
+                for tool in agent.tools
+            ]
+        return agent
+
+    def format_for_slack(self, text):
+
+        """
+            Converts markdown-like text into a Slack-compatible format.
+
+            This function converts bold, italics, headers, links and lists into Slack's Markdown-like syntax
+            (mrkdwn) and renders markdown tables as aligned fixed-width tables, in a single pass over the
+            text (see `slack_format.py`).
+
+            Arguments:
+                text (str): The text that needs to be formatted for Slack.
+
+            Returns:
+                str: The formatted text, ready to be sent to Slack.
+        """
+        return markdown_to_mrkdwn(text)
+
+    async def _update_message(self, ctx, updater, rel_data, msg, final=False, force=False):
+        """
+            Updates the streamed response message, timing the formatting and the Slack call.
+            A response too long for one message shows its first part while streaming; the rest
+            is posted as follow-up messages with the final update (only once, so call it once per stream).
+
+            Arguments:
+                ctx (RequestContext): The context of the mention being processed.
+                updater (ThrottledMessageUpdater): Updates the processing message.
+                rel_data (str): The relevant data included in the message.
+                msg (str): The (partial) insight text.
+                final (bool): The last update of the stream: always sent, with the follow-up messages.
+                force (bool): Always send this update, but it is not the last one (no follow-up messages).
+        """
+        # Most streamed tokens arrive while the updater is throttled: the text is only built for updates it sends.
+        if not updater.due(final or force):
+            return
+        messages = to_messages(self.compose_response(rel_data, msg, ctx=ctx))
+        with span(ctx, "slack_post"):
+            await updater.update(final=final or force, **messages[0])
+            if final:
+                for message in messages[1:]:
+                    await self.slack.post_message(channel=ctx.channel_id, **message)
+
+    @staticmethod
+    def _add_usage(ctx, message):
+        """
+            Adds the token usage reported on an LLM response (or the last chunk of a stream) to the request context.
+        """
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            add_tokens(ctx, "llm_invoke", usage.get("input_tokens", 0), usage.get("output_tokens", 0))
 
-    def send_slack_response(self, body, msg, rel_data):
+    async def send_slack_response(self, body, msg, rel_data, ctx=None):
         """
             Sends a response message to a Slack channel.
 
@@ -211,6 +674,7 @@ class SlackBotHandler:
                 body (dict): The JSON payload from Slack, containing event details such as channel ID.
                 msg (str): The response message generated by GPT, which will be sent to Slack.
                 rel_data (str): The relevant data (e.g., a pivot table or processed dataset) to include in the message.
+                ctx (RequestContext): Optional context of the mention, whose formatting and post are timed.
 
             Returns:
                 None: Sends the message directly to the Slack channel.
@@ -219,30 +683,65 @@ class SlackBotHandler:
             # Step 1: Extract the Slack channel ID from the event body.
             channel_id = body["event"]["channel"]
 
-            # Step 2: Prepare the headers for the Slack API request.
-            headers = {
-                "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-                "Content-Type": "application/json; charset=utf-8",
-            }
-
-            # Step 3: Construct the payload (message) to be sent to the Slack channel.
-            # This includes:
-            # - The channel ID (where the message will be sent)
-            # - The relevant data (formatted as a code block)
-            # - The GPT-generated message (formatted nicely for Slack)
-            payload = {
-                "channel": channel_id,
-                "text": f"```\n{rel_data}\n```"
-                + "\n"
-                + self.format_for_slack(msg.content),
-            }
-
-            # Step 4: Send the request to Slack's API using the chat.postMessage endpoint.
-            response = requests.post(self.slack_url, headers=headers, json=payload)
+            # Step 2: Construct the message to be sent to the Slack channel.
+            text = self.compose_response(rel_data, msg, ctx=ctx)
+
+            # Step 3: Send the request to Slack's API using the chat.postMessage endpoint.
+            # Responses longer than Slack's message limit are sent as several messages.
+            with span(ctx, "slack_post"):
+                for message in to_messages(text):
+                    await self.slack.post_message(channel=channel_id, **message)
         except Exception as e:
             self.logger.info(f"Error occured at sending slack response --- {e}")
 
-    def send_processing_message(self, body, msg="Working on your data request..."):
+    def compose_response(self, rel_data, msg, ctx=None):
+        """
+            Builds the text of a response message.
+
+            This includes:
+            - The relevant data (tables aligned in a code block)
+            - The GPT-generated message (formatted nicely for Slack)
+
+            Arguments:
+                rel_data (str): The relevant data (e.g., a pivot table or processed dataset).
+                msg (str): The response message generated by GPT.
+                ctx (RequestContext): Optional context of the mention, whose formatting time is recorded.
+
+            Returns:
+                str: The message text.
+        """
+        with span(ctx, "format_for_slack"):
+            return format_data(rel_data) + "\n" + self.format_for_slack(msg)
+
+    def notify_queued(self, body, position):
+        """
+            Tells the user their mention is waiting for a free job queue worker. The message is later reused as
+            the mention's processing message; its timestamp is registered right away (before it is posted), so
+            a worker picking the mention up meanwhile waits for it instead of posting a second message.
+
+            Arguments:
+                body (dict): The JSON payload of the queued mention.
+                position (int): Position of the mention in the job queue.
+
+            Returns:
+                Coroutine: Posts the message.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queued_messages[body.get("event_id")] = future
+
+        async def post():
+            ts = None
+            try:
+                ts = await self.send_processing_message(
+                    body=body, msg=f"I'm busy with other requests right now, your request is queued at position {position}."
+                )
+            finally:
+                if not future.done():
+                    future.set_result(ts)
+
+        return post()
+
+    async def send_processing_message(self, body, msg=None):
         """
             Sends a processing message to the Slack channel to notify users
             that their request is being worked on.
@@ -252,93 +751,143 @@ class SlackBotHandler:
 
             Arguments:
                 body (dict): The JSON payload from Slack containing event details.
-                msg (str): The message to send to the Slack channel. Defaults to a standard processing message.
+                msg (str): The message to send to the Slack channel. Defaults to PROCESSING_MESSAGE.
 
             Returns:
-                None: Sends a message directly to the Slack channel.
+                str: Timestamp (ID) of the posted message, used to update it later; None if it was not posted.
         """
         try:
             channel_id = body["event"]["channel"]
-            # url = "https://slack.com/api/chat.postMessage"
-            headers = {
-                "Authorization": f"Bearer {SLACK_BOT_TOKEN}",
-                "Content-Type": "application/json; charset=utf-8",
-            }
-            # Construct the payload with the channel ID and the message to be sent.
-            payload = {
-                "channel": channel_id,
-                "text": msg,
-            }
-            response = requests.post(self.slack_url, headers=headers, json=payload)
+            # Send the channel ID and the message to be sent.
+            response = await self.slack.post_message(channel=channel_id, text=msg or PROCESSING_MESSAGE)
+            return response.get("ts")
         except Exception as e:
             self.logger.info(f"Error occured at sending slack response --- {e}")
+            return None
+
+    def load_source(self, source):
+        """
+            Loads the current version of a registered dataset (called by the dataset registry).
+
+            Arguments:
+                source (DatasetSource): The configured dataset.
+
+            Returns:
+                Dataset: The current dataset snapshot, or None if it could not be loaded.
+        """
+        import_pandas()
+        if source.is_s3:
+            return self.load_data_from_s3(source.s3_bucket or S3_BUCKET_NAME, source.s3_key)
+        return self.load_data_from_csv(source.path, schema=source.schema)
 
-    def load_data_from_s3(self):
+    def evict_source(self, source, dataset):
+        """
+            Drops a dataset evicted by the registry from memory: its cache and the agents built on it.
+            It is loaded again the next time a question is asked about it.
+
+            Arguments:
+                source (DatasetSource): The configured dataset.
+                dataset (Dataset): The evicted dataset snapshot.
+        """
+        name = f"s3://{source.s3_bucket or S3_BUCKET_NAME}/{source.s3_key}" if source.is_s3 else source.path
+        with self._dataset_caches_lock:
+            self.dataset_caches.pop(name, None)
+        self.agent_pool.invalidate(dataset.fingerprint)
+        if self.sandbox is not None:
+            self.sandbox.invalidate(dataset.fingerprint)
+
+    def load_data_from_s3(self, bucket=S3_BUCKET_NAME, key=S3_FILE_NAME):
         """
             Loads data from an S3 bucket into a pandas DataFrame.
             
             This method fetches a CSV file from a specified S3 bucket, reads its content,
             and loads it into a pandas DataFrame for further processing.
-            
+            The object is only downloaded again when its ETag/LastModified changed since the last load;
+            the body is parsed in chunks as it streams in and snapshotted locally (see `s3_loader.py`).
+
+            Arguments:
+                bucket (str): The S3 bucket.
+                key (str): Key of the CSV object.
+
             Returns:
-                None: The DataFrame is stored in the `self.learner_data` attribute.
-        """
-        # Define data types for specific columns to optimize memory usage and ensure data consistency.
-        dtype = {
-            "Learner ID": str,             # Learner ID as a string to preserve leading zeros
-            "Course Prefix": str,          # Course prefix as string
-            "Platform": str,               # Platform name as string
-            "Course Name": str,            # Course name as string
-            "Term": str,                   # Academic term as string
-            "AY": str,                     # Academic Year as string
-            "Verified": int,               # Binary indicator (0 or 1) for verification
-            "Passed": int,                 # Binary indicator (0 or 1) for course completion
-            "Credit Converted": int,       # Indicates if credit was converted (0 or 1)
-            "Grade": int                   # Numerical grade
-        }
+                Dataset: The current dataset snapshot, or None if it could not be loaded.
+        """
+        from rollup_cube import RollupCube
+        from s3_loader import S3DatasetLoader
 
         try:
-            # Step 1: Fetch the CSV file from the S3 bucket.
-            obj = self.s3.get_object(Bucket=S3_BUCKET_NAME, Key=S3_FILE_NAME)
-            data = obj["Body"].read().decode("utf-8")
-
-            # Step 2: Load the CSV data into a pandas DataFrame using the specified column types.
-            self.learner_data = pd.read_csv(StringIO(data), dtype=dtype)
+            with self._dataset_caches_lock:
+                if (bucket, key) not in self.s3_loaders:
+                    self.s3_loaders[(bucket, key)] = S3DatasetLoader(self.s3, bucket, key)
+                s3_loader = self.s3_loaders[(bucket, key)]
+            cache = self._get_dataset_cache(
+                f"s3://{bucket}/{key}",
+                probe=lambda: s3_object_version(self.s3, bucket, key),
+                loader=s3_loader.load,
+                cube_builder=RollupCube.build,
+            )
+            return cache.get()
         except Exception as e:
             self.logger.info(f"Error at loading data from S3 --- {e}")
+            return None
 
-    def load_data_from_csv(self, file_path: str):
+    def load_data_from_csv(self, file_path: str, schema: str = "learner"):
         """
             Loads data from a local CSV file into a pandas DataFrame.
             
             This method reads the content of a CSV file located on the local filesystem
-            and stores it in the `self.learner_data` attribute for further processing.
+            and returns it as an immutable `Dataset` snapshot for further processing.
+            The file is only parsed again when its modification time or size changed since the last load.
 
             Arguments:
                 file_path (str): The full path to the CSV file to be loaded.
+                schema (str): "learner" to enforce the learner data column types, "generic" for any CSV.
 
             Returns:
-                None: The loaded data is stored in the `self.learner_data` attribute.
-        """
-        dtype = {
-            "Learner ID": str,             # Learner ID as a string to preserve leading zeros
-            "Course Prefix": str,          # Course prefix as string
-            "Platform": str,               # Platform name as string
-            "Course Name": str,            # Course name as string
-            "Term": str,                   # Academic term as string
-            "AY": str,                     # Academic Year as string
-            "Verified": int,               # Binary indicator (0 or 1) for verification
-            "Passed": int,                 # Binary indicator (0 or 1) for course completion
-            "Credit Converted": int,       # Indicates if credit was converted (0 or 1)
-            "Grade": int                   # Numerical grade
-        }
+                Dataset: The current dataset snapshot, or None if it could not be loaded.
+        """
+        pd = import_pandas()
+        from learner_data import read_learner_csv
+        from rollup_cube import RollupCube
 
         try:
-            # Read the CSV file using pandas and enforce the defined column data types
-            self.learner_data = pd.read_csv(file_path, dtype=dtype)
-            self.logger.info(f"Data successfully loaded from {file_path}.")
+            # Read the CSV file using pandas and enforce the defined column data types (learner data only)
+            learner = schema == "learner"
+            cache = self._get_dataset_cache(
+                file_path,
+                probe=lambda: file_version(file_path),
+                loader=(lambda: read_learner_csv(file_path)) if learner else (lambda: pd.read_csv(file_path)),
+                cube_builder=RollupCube.build if learner else None,
+            )
+            return cache.get()
         except Exception as e:
             self.logger.error(f"Error loading data from CSV file --- {e}")
+            return None
+
+    def _get_dataset_cache(self, name, probe, loader, cube_builder=None):
+        """
+            Returns the DatasetCache for a given source, creating it on first use.
+
+            Arguments:
+                name (str): Unique name of the source (file path or s3 url).
+                probe (callable): Returns the current version of the source.
+                loader (callable): Loads the source into a DataFrame.
+                cube_builder (callable): Builds the rollup cube of every loaded version (None for non-learner data).
+
+            Returns:
+                DatasetCache: The cache shared by every request reading this source.
+        """
+        with self._dataset_caches_lock:
+            if name not in self.dataset_caches:
+                # Every loaded version also gets a rollup cube, so aggregate answers do not rescan the raw rows.
+                cache = DatasetCache(name=name, probe=probe, loader=loader, cube_builder=cube_builder)
+                # Answers and agents built for a previous version of the source are no longer valid.
+                cache.add_listener(lambda previous, current: self.answer_cache.invalidate(previous.fingerprint))
+                cache.add_listener(lambda previous, current: self.agent_pool.invalidate(previous.fingerprint))
+                if self.sandbox is not None:
+                    cache.add_listener(lambda previous, current: self.sandbox.invalidate(previous.fingerprint))
+                self.dataset_caches[name] = cache
+            return self.dataset_caches[name]
 
     def url_verification_handler(self, slack_event):
         """
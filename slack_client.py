@@ -0,0 +1,320 @@
+"""
+    Async client for Slack's Web API.
+
+    Replaces the blocking `requests.post` calls that opened a new TLS connection for every message
+    and held a worker thread while waiting on Slack. One `httpx.AsyncClient` (and therefore one
+    keep-alive connection pool) is shared per process and awaited directly from the Quart event loop.
+
+    Failed calls are retried with exponential backoff; on HTTP 429 Slack's `Retry-After` header is honoured.
+    `chat.update` calls share one rate budget per process, so concurrent streamed responses together stay
+    under Slack's limit instead of each of them being throttled on its own.
+"""
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+
+# Slack client configuration:
+# 1. SLACK_API_BASE_URL:
+#    - Base URL of Slack's Web API; methods such as `chat.postMessage` are appended to it.
+# 2. SLACK_HTTP_TIMEOUT_SECONDS:
+#    - Total timeout for one HTTP call to Slack.
+# 3. SLACK_HTTP_MAX_RETRIES:
+#    - How many times a failed call (network error, 429 or 5xx) is retried.
+# 4. SLACK_UPDATE_INTERVAL_SECONDS:
+#    - Minimum time between two `chat.update` calls on the same message while a response streams in.
+#      `chat.update` is a Tier 3 method (~50 calls per minute), 1.5s keeps one stream at 40 per minute.
+# 5. SLACK_UPDATE_RATE_PER_MINUTE:
+#    - `chat.update` calls per minute shared by all the responses streaming in this process (0 disables the
+#      budget). Intermediate updates are skipped when it is used up. With `hypercorn -w N`, divide it by N.
+SLACK_API_BASE_URL = os.environ.get("SLACK_API_BASE_URL", "https://slack.com/api")
+SLACK_HTTP_TIMEOUT_SECONDS = float(os.environ.get("SLACK_HTTP_TIMEOUT_SECONDS", "10"))
+SLACK_HTTP_MAX_RETRIES = int(os.environ.get("SLACK_HTTP_MAX_RETRIES", "3"))
+SLACK_UPDATE_INTERVAL_SECONDS = float(os.environ.get("SLACK_UPDATE_INTERVAL_SECONDS", "1.5"))
+SLACK_UPDATE_RATE_PER_MINUTE = float(os.environ.get("SLACK_UPDATE_RATE_PER_MINUTE", "45"))
+
+# Methods that must not be repeated once Slack may have received them: a retried `chat.postMessage` after a
+# read timeout or a 5xx response may post the message twice. They are only retried on errors raised before
+# the request was sent and on 429 (Slack rejected the call without running it).
+NON_IDEMPOTENT_METHODS = {"chat.postMessage", "chat.postEphemeral", "chat.scheduleMessage"}
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RateBudget:
+    def __init__(self, per_minute: float, burst: int = 3) -> None:
+        """
+            Initializes the RateBudget, a token bucket shared by all the calls of one Slack method.
+
+            Arguments:
+                per_minute (float): Calls allowed per minute (0 or less: unlimited).
+                burst (int): Calls that can be made at once after a quiet period.
+        """
+        self.interval = 60 / per_minute if per_minute > 0 else 0.0
+        self.burst = burst
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        if self.interval:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) / self.interval)
+        self._refilled = now
+        return now
+
+    def available(self) -> bool:
+        """
+            Returns:
+                bool: True if a call can be made right away.
+        """
+        if not self.interval:
+            return True
+        now = self._refill()
+        return now >= self._paused_until and self._tokens >= 1
+
+    def try_take(self) -> bool:
+        """
+            Uses one call of the budget if one is available right away.
+
+            Returns:
+                bool: True if the call may be made.
+        """
+        if not self.available():
+            return False
+        if self.interval:
+            self._tokens -= 1
+        return True
+
+    async def take(self):
+        """
+            Waits until a call is available and uses it.
+        """
+        while not self.try_take():
+            now = time.monotonic()
+            await asyncio.sleep(max(self._paused_until - now, (1 - self._tokens) * self.interval, 0.01))
+
+    def pause(self, seconds: float):
+        """
+            Stops handing out calls for `seconds` (Slack answered 429 with this Retry-After).
+        """
+        self._paused_until = max(self._paused_until, self._refill() + seconds)
+        self._tokens = 0.0
+
+
+class AsyncSlackClient:
+    def __init__(
+        self,
+        token: str,
+        base_url: str = SLACK_API_BASE_URL,
+        timeout: float = SLACK_HTTP_TIMEOUT_SECONDS,
+        max_retries: int = SLACK_HTTP_MAX_RETRIES,
+        backoff_seconds: float = 0.5,
+        update_rate_per_minute: float = SLACK_UPDATE_RATE_PER_MINUTE,
+    ) -> None:
+        """
+            Initializes the AsyncSlackClient.
+
+            The underlying `httpx.AsyncClient` is created lazily on first use, so it is bound to the
+            event loop that actually serves requests rather than the one (if any) active at import time.
+
+            Arguments:
+                token (str): The Slack bot OAuth token.
+                base_url (str): Base URL of Slack's Web API.
+                timeout (float): Timeout in seconds for one HTTP call.
+                max_retries (int): Number of retries for failed calls.
+                backoff_seconds (float): Initial backoff between retries, doubled after every attempt.
+                update_rate_per_minute (float): `chat.update` calls per minute shared by all messages.
+        """
+        self.logger = logging.getLogger()
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json; charset=utf-8",
+        }
+        self._client = None
+        # Rate budgets per method, shared by every caller of this client.
+        self.rate_budgets = {"chat.update": RateBudget(update_rate_per_minute)}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+            Returns the shared HTTP client, creating its connection pool on first use.
+
+            Returns:
+                httpx.AsyncClient: The pooled keep-alive client.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._client
+
+    async def api_call(self, method: str, payload: dict, wait_on_rate_limit: bool = True) -> dict:
+        """
+            Calls a Slack Web API method, retrying on network errors, 429 and 5xx responses.
+            Methods in NON_IDEMPOTENT_METHODS are only retried on 429 and on network errors raised before the
+            request was sent.
+
+            Arguments:
+                method (str): The API method, e.g. "chat.postMessage".
+                payload (dict): JSON body of the call.
+                wait_on_rate_limit (bool): On 429, wait for Retry-After and retry. Otherwise the call gives up
+                    right away.
+
+            Returns:
+                dict: The decoded Slack response (check its "ok" field). A call still rate limited after its
+                    retries (or right away without `wait_on_rate_limit`) returns `{"ok": False, "error": "ratelimited"}`.
+        """
+        client = self._get_client()
+        delay = self.backoff_seconds
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = await client.post(f"/{method}", json=payload)
+            except httpx.TransportError as e:
+                if last_attempt or (method in NON_IDEMPOTENT_METHODS and not isinstance(e, NOT_SENT_ERRORS)):
+                    raise
+                self.logger.info(f"Slack {method} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay *= 2
+                continue
+
+            if response.status_code == 429:
+                # Slack tells us how long to wait before calling this method again.
+                retry_after = float(response.headers.get("Retry-After", delay))
+                if method in self.rate_budgets:
+                    self.rate_budgets[method].pause(retry_after)
+                if last_attempt or not wait_on_rate_limit:
+                    self.logger.info(f"Slack {method} rate limited, skipped")
+                    return {"ok": False, "error": "ratelimited"}
+                self.logger.info(f"Slack {method} rate limited, retrying in {retry_after:.1f}s")
+                await asyncio.sleep(retry_after)
+                continue
+
+            if response.status_code >= 500 and not last_attempt and method not in NON_IDEMPOTENT_METHODS:
+                self.logger.info(f"Slack {method} returned {response.status_code}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay *= 2
+                continue
+
+            response.raise_for_status()
+            data = response.json()
+            if not data.get("ok", False):
+                self.logger.info(f"Slack {method} returned an error --- {data.get('error')}")
+            return data
+
+    async def post_message(self, channel: str, text: str, **extra) -> dict:
+        """
+            Posts a message to a Slack channel using `chat.postMessage`.
+
+            Arguments:
+                channel (str): The channel ID.
+                text (str): The message text.
+                **extra: Any other `chat.postMessage` arguments (e.g. thread_ts, blocks).
+
+            Returns:
+                dict: The decoded Slack response.
+        """
+        return await self.api_call("chat.postMessage", {"channel": channel, "text": text, **extra})
+
+    async def update_message(self, channel: str, ts: str, text: str, wait: bool = True, **extra) -> dict:
+        """
+            Replaces the text of a message posted earlier, using `chat.update`, within the shared rate budget.
+
+            Arguments:
+                channel (str): The channel ID.
+                ts (str): Timestamp (ID) of the message to update.
+                text (str): The new message text.
+                wait (bool): Wait for the rate budget (and on 429). Otherwise the update is skipped when the
+                    budget is used up or Slack rate limits it, and `{"ok": False, "error": "ratelimited"}` returned.
+                **extra: Any other `chat.update` arguments (e.g. blocks).
+
+            Returns:
+                dict: The decoded Slack response.
+        """
+        budget = self.rate_budgets["chat.update"]
+        if wait:
+            await budget.take()
+        elif not budget.try_take():
+            return {"ok": False, "error": "ratelimited"}
+        payload = {"channel": channel, "ts": ts, "text": text, **extra}
+        return await self.api_call("chat.update", payload, wait_on_rate_limit=wait)
+
+    async def aclose(self):
+        """
+            Closes the connection pool. Called when the server shuts down.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class ThrottledMessageUpdater:
+    def __init__(
+        self,
+        client: AsyncSlackClient,
+        channel: str,
+        ts: str,
+        min_interval: float = SLACK_UPDATE_INTERVAL_SECONDS,
+    ) -> None:
+        """
+            Initializes the ThrottledMessageUpdater, which updates one Slack message in place while
+            a response is streamed, without exceeding Slack's rate limits.
+
+            Arguments:
+                client (AsyncSlackClient): The Slack client.
+                channel (str): The channel ID of the message.
+                ts (str): Timestamp (ID) of the message to update.
+                min_interval (float): Minimum number of seconds between two updates.
+        """
+        self.client = client
+        self.channel = channel
+        self.ts = ts
+        self.min_interval = min_interval
+        self._last_update = float("-inf")
+        self._last_text = None
+        self.updates = 0
+
+    def due(self, final: bool = False) -> bool:
+        """
+            Tells whether an update made now would be sent, so the caller can skip building its text.
+
+            Arguments:
+                final (bool): The update is always sent.
+
+            Returns:
+                bool: False if the previous update was less than `min_interval` ago or the client's
+                    `chat.update` budget is used up.
+        """
+        if final:
+            return True
+        now = asyncio.get_running_loop().time()
+        return now - self._last_update >= self.min_interval and self.client.rate_budgets["chat.update"].available()
+
+    async def update(self, text: str, final: bool = False, **extra):
+        """
+            Updates the message, unless it is not `due()`. Skipped intermediate texts are simply superseded
+            by the next update; a final update waits for the rate budget instead.
+
+            Arguments:
+                text (str): The full new text of the message.
+                final (bool): Always send this update (the last one of a stream, or the first one to show).
+                **extra: Any other `chat.update` arguments (e.g. blocks).
+        """
+        if text == self._last_text or not self.due(final):
+            return
+        self._last_update = asyncio.get_running_loop().time()
+        self._last_text = text
+        response = await self.client.update_message(channel=self.channel, ts=self.ts, text=text, wait=final, **extra)
+        if response.get("error") == "ratelimited":
+            self._last_text = None  # Not shown: the final update must still send this text.
+        else:
+            self.updates += 1
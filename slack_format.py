@@ -0,0 +1,273 @@
+"""
+    Markdown to Slack mrkdwn conversion.
+
+    `format_for_slack` used to chain six `str.replace` passes and two `splitlines` / join passes over every
+    response (and every streamed update). It also deleted every `|`, which destroyed markdown tables, and
+    turned every "1." into a bullet. `markdown_to_mrkdwn` converts a response in a single pass over its lines:
+        - inline markup (bold, italics, strike-through, links, code) and Slack's `& < >` escaping are handled
+          by one combined regular expression per line;
+        - headers, bullet lists, quotes and code fences are recognised at the start of the line;
+        - markdown tables are rendered as aligned fixed-width tables in a code block.
+
+    `to_messages` splits a long response into messages that fit Slack's text limit (never inside a code block
+    without closing and re-opening it), optionally as Block Kit sections.
+
+    This is not cheaper than the chained replaces: on table-heavy responses it takes about 4x the time
+    (e.g. 36 ms instead of 8 ms for a 5,000-row table, see `benchmarks/format_report.py`). Nearly all of it
+    is parsing and aligning the table cells, which the old code did not do; the inline regular expression
+    is under a tenth of it.
+"""
+import os
+import re
+from functools import lru_cache
+
+
+# Slack formatting configuration:
+# 1. SLACK_MESSAGE_MAX_CHARS:
+#    - Longest text sent in one message; longer responses are split into several messages.
+#      Slack recommends staying under 4,000 characters (and truncates messages over 40,000).
+# 2. SLACK_MESSAGE_FORMAT:
+#    - "text" sends plain mrkdwn text, "blocks" sends the same content as Block Kit sections (with the text as fallback).
+SLACK_MESSAGE_MAX_CHARS = int(os.environ.get("SLACK_MESSAGE_MAX_CHARS", "3900"))
+SLACK_MESSAGE_FORMAT = os.environ.get("SLACK_MESSAGE_FORMAT", "text")
+
+# Block Kit limits: a section's text is at most 3,000 characters, a message has at most 50 blocks.
+SECTION_MAX_CHARS = 3000
+MAX_BLOCKS = 50
+
+# One alternation for everything converted inside a line, so each line is scanned once.
+_INLINE = re.compile(
+    r"(?P<code>`[^`\n]+`)"
+    r"|\*\*(?P<bold>.+?)\*\*"
+    r"|__(?P<bold2>.+?)__"
+    r"|(?<![\w*])\*(?![\s*])(?P<italic>[^*\n]+?)(?<![\s*])\*(?![\w*])"
+    r"|~~(?P<strike>.+?)~~"
+    r"|\[(?P<label>[^\]\n]+)\]\((?P<url>https?://[^)\s]+)\)"
+    r"|(?P<escape>[&<>])"
+)
+_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+_ESCAPE_TABLE = str.maketrans(_ESCAPES)
+
+_HEADER = re.compile(r"^\s*#{1,6}\s+(.*?)\s*#*\s*$")
+_BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+_QUOTE = re.compile(r"^\s*>\s?(.*)$")
+_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+# A column of numbers (empty cells allowed), matched on the newline-joined column in one call.
+_NUMBER = r"(?:[-+]?[\d,]*\.?\d+(?:e[-+]?\d+)?%?)?"
+_NUMERIC_COLUMN = re.compile(rf"{_NUMBER}(?:\n{_NUMBER})*", re.IGNORECASE)
+
+
+def _inline(match: re.Match) -> str:
+    kind = match.lastgroup
+    if kind == "code":
+        return match.group("code").translate(_ESCAPE_TABLE)
+    if kind == "escape":
+        return _ESCAPES[match.group("escape")]
+    text = match.group(kind)
+    if kind in ("bold", "bold2"):
+        return f"*{_INLINE.sub(_inline, text)}*"
+    if kind == "italic":
+        return f"_{_INLINE.sub(_inline, text)}_"
+    if kind == "strike":
+        return f"~{_INLINE.sub(_inline, text)}~"
+    return f"<{match.group('url')}|{match.group('label').translate(_ESCAPE_TABLE)}>"
+
+
+def _table_rows(lines: list) -> list:
+    # Markup is meaningless in a code block: keep the cell text only (stripped once for the whole table).
+    text = "\n".join(lines).replace("**", "").replace("__", "").replace("`", "")
+    return [[cell.strip() for cell in line.strip("|").split("|")] for line in text.split("\n")]
+
+
+def render_table(rows: list) -> list:
+    """
+        Renders table rows as an aligned fixed-width table in a code block.
+        Numeric columns are right-aligned, the others left-aligned.
+
+        Arguments:
+            rows (list): Rows of cell strings; the first row is the header.
+
+        Returns:
+            list: The lines of the rendered code block (the table itself as one string).
+    """
+    width = max(len(row) for row in rows)
+    if any(len(row) != width for row in rows):
+        rows = [row + [""] * (width - len(row)) for row in rows]
+    columns = list(zip(*rows))
+    widths = [max(map(len, column)) for column in columns]
+    numeric = [any(column[1:]) and bool(_NUMERIC_COLUMN.fullmatch("\n".join(column[1:]))) for column in columns]
+    # One format string for every row: numeric columns right-aligned, the others left-aligned.
+    row_format = "  ".join(f"{{:{'>' if numeric[i] else '<'}{widths[i]}}}" for i in range(width))
+    header = row_format.format(*rows[0]).rstrip()
+    body = "\n".join(row_format.format(*row).rstrip() for row in rows[1:])
+    table = f"{header}\n{'  '.join('-' * w for w in widths)}\n{body}" if body else header
+    return ["```", table.translate(_ESCAPE_TABLE), "```"]
+
+
+def markdown_to_mrkdwn(text: str) -> str:
+    """
+        Converts markdown (as written by the LLM) into Slack mrkdwn in a single pass.
+
+        Arguments:
+            text (str): The markdown text.
+
+        Returns:
+            str: The mrkdwn text.
+    """
+    out = []
+    table = []  # lines of the markdown table being read
+    in_code = False
+
+    def flush_table():
+        if table:
+            out.extend(render_table(_table_rows(table)))
+            table.clear()
+
+    for line in text.split("\n"):
+        stripped = line.strip()
+
+        if stripped.startswith("```"):
+            flush_table()
+            in_code = not in_code
+            out.append("```")  # Slack shows a language tag ("```python") as text, so it is dropped.
+            continue
+        if in_code:
+            out.append(line.translate(_ESCAPE_TABLE))
+            continue
+
+        if stripped.startswith("|"):
+            # The separator row ("|:---|--:|") only carries alignment, which is derived from the values.
+            if stripped.strip("|:- "):
+                table.append(stripped)
+            continue
+        flush_table()
+
+        if not stripped:
+            # Collapse runs of blank lines into one.
+            if out and out[-1]:
+                out.append("")
+            continue
+
+        header = _HEADER.match(line)
+        if header:
+            title = header.group(1).replace("**", "").replace("__", "")
+            out.append(f"*{_INLINE.sub(_inline, title)}*")
+            continue
+        if _RULE.match(line):
+            out.append("———")
+            continue
+        bullet = _BULLET.match(line)
+        if bullet:
+            out.append(f"{bullet.group(1)}• {_INLINE.sub(_inline, bullet.group(2))}")
+            continue
+        quote = _QUOTE.match(line)
+        if quote:
+            out.append(f"> {_INLINE.sub(_inline, quote.group(1))}")
+            continue
+        out.append(_INLINE.sub(_inline, line.rstrip()))
+
+    flush_table()
+    if in_code:
+        out.append("```")  # Close a code block left open (e.g. a response still streaming in).
+    while out and not out[-1]:
+        out.pop()
+    return "\n".join(out)
+
+
+@lru_cache(maxsize=64)
+def format_data(data: str) -> str:
+    """
+        Formats the relevant data shown above the insights: markdown tables become aligned fixed-width tables,
+        any other output (e.g. a printed DataFrame) is shown as is in a code block.
+        Cached, since a streamed response shows the same data with every update.
+
+        Arguments:
+            data (str): The fast path or agent output.
+
+        Returns:
+            str: The mrkdwn text.
+    """
+    data = str(data).strip("\n")
+    if any(line.lstrip().startswith(("|", "```")) for line in data.split("\n")):
+        return markdown_to_mrkdwn(data)
+    return f"```\n{data.translate(_ESCAPE_TABLE)}\n```"
+
+
+def split_message(text: str, limit: int = SLACK_MESSAGE_MAX_CHARS) -> list:
+    """
+        Splits text into parts of at most `limit` characters, on line boundaries. A code block cut in two is
+        closed at the end of one part and re-opened at the start of the next.
+
+        Arguments:
+            text (str): The mrkdwn text.
+            limit (int): Maximum length of a part.
+
+        Returns:
+            list: The parts (a single one if the text fits).
+    """
+    if len(text) <= limit:
+        return [text]
+
+    parts, current, size, in_code = [], [], 0, False
+    lines = text.split("\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        reserve = 4 if in_code else 0  # room for the closing "\n```"
+        # A line must fit a part that also holds an opening "```\n" and a closing "\n```".
+        width = limit - 9
+        if len(line) > width:
+            # A single line longer than a message: cut it into pieces that fit.
+            lines[i:i + 1] = [line[j:j + width] for j in range(0, len(line), width)]
+            continue
+        if current and size + len(line) + 1 > limit - reserve:
+            if in_code:
+                current.append("```")
+            parts.append("\n".join(current))
+            current, size = (["```"], 4) if in_code else ([], 0)
+        current.append(line)
+        size += len(line) + 1
+        if line.strip().startswith("```"):
+            in_code = not in_code
+        i += 1
+    if current:
+        parts.append("\n".join(current))
+    return parts
+
+
+def to_blocks(text: str) -> list:
+    """
+        Builds Block Kit section blocks holding a message text.
+
+        Arguments:
+            text (str): The mrkdwn text of one message.
+
+        Returns:
+            list: Section blocks (each within the section text limit).
+    """
+    return [
+        {"type": "section", "text": {"type": "mrkdwn", "text": part}}
+        for part in split_message(text, SECTION_MAX_CHARS)[:MAX_BLOCKS]
+        if part.strip()
+    ]
+
+
+def to_messages(text: str, message_format: str = None) -> list:
+    """
+        Splits a response into the arguments of the Slack messages carrying it.
+
+        Arguments:
+            text (str): The mrkdwn response.
+            message_format (str): "text" or "blocks". Defaults to SLACK_MESSAGE_FORMAT.
+
+        Returns:
+            list: One dict per message, with "text" (and "blocks" in blocks format).
+    """
+    message_format = message_format or SLACK_MESSAGE_FORMAT
+    messages = []
+    for part in split_message(text):
+        message = {"text": part}
+        if message_format == "blocks":
+            message["blocks"] = to_blocks(part)
+        messages.append(message)
+    return messages
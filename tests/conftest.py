@@ -0,0 +1,14 @@
+import os
+import sys
+
+# The modules live at the top of the repository.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings the bot reads at import time; the tests never reach Slack, OpenAI or S3.
+for name, value in {
+    "SLACK_BOT_TOKEN": "xoxb-test",
+    "SLACK_BOT_USER_ID": "UTEST",
+    "OPEN_AI_API_KEY": "sk-test",
+    "SANDBOX_WORKERS": "0",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,41 @@
+import sqlite3
+
+from event_store import InMemoryEventStore, SQLiteEventStore
+
+
+def test_duplicate_does_not_outlive_its_ttl(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("event_store.time.monotonic", lambda: clock[0])
+    store = InMemoryEventStore(ttl_seconds=10)
+    assert store.mark_seen("E1")
+    clock[0] = 5
+    assert store.mark_seen("E2")
+    assert not store.mark_seen("E1")  # A duplicate does not move E1 behind E2...
+    clock[0] = 12
+    assert store.mark_seen("E3")  # ...so E1 still expires first, and E2 is kept.
+    assert list(store._seen) == ["E2", "E3"]
+    assert store.mark_seen("E1")
+
+
+def test_sqlite_store_drops_duplicates_and_forgets_expired_events(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("event_store.time.time", lambda: clock[0])
+    store = SQLiteEventStore(str(tmp_path / "events.sqlite3"), ttl_seconds=10)
+    assert store.mark_seen("E1")
+    assert not store.mark_seen("E1")
+    clock[0] += 11
+    assert store.mark_seen("E1")
+    store.close()
+
+
+def test_sqlite_store_does_not_block_on_a_locked_file(tmp_path):
+    path = str(tmp_path / "events.sqlite3")
+    store = SQLiteEventStore(path, timeout=0.1)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")  # Another worker holds the write lock.
+    try:
+        assert store.mark_seen("E1")
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+        store.close()
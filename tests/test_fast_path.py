@@ -0,0 +1,67 @@
+import pytest
+
+from fast_path import match_intent
+
+
+FILTER_VALUES = {
+    "AY": ["AY23", "AY24"],
+    "Term": ["2234C", "2244C"],
+    "Platform": ["Inclass", "Online"],
+    "Course Prefix": ["CHM-300", "BIO-210"],
+    "Course Name": ["CHM", "BIO"],
+}
+
+
+@pytest.mark.parametrize("question", [
+    # Qualifiers the matcher does not understand must send the question to the agent.
+    "count of learners who passed by platform",
+    "how many learners failed by platform",
+    "pass rate by platform in 2024",
+    "pass rate by platform for Fall term",
+    "pass rate by platform for first generation learners",
+    "average grade by course for learners older than 30",
+    "Which courses improved the most between academic years?",
+    "pass rate for AY23 and AY24",
+    "tell me a joke",
+])
+def test_unsupported_questions_fall_back(question):
+    assert match_intent(question, FILTER_VALUES) is None
+
+
+@pytest.mark.parametrize("question, metrics, dimensions, filters", [
+    ("What is the pass rate by platform?", ["pass_rate"], ["Platform"], {}),
+    ("Average grade by course", ["avg_grade"], ["Course Name"], {}),
+    ("How many verified learners per term?", ["verified"], ["Term"], {}),
+    ("total learners per AY", ["learners"], ["AY"], {}),
+    ("number of learners by course prefix", ["learners"], ["Course Prefix"], {}),
+    ("platform wise pass rate", ["pass_rate"], ["Platform"], {}),
+    ("Show me the average grade by platform and AY", ["avg_grade"], ["Platform", "AY"], {}),
+    ("pass rate for AY24 by platform", ["pass_rate"], ["Platform"], {"AY": "AY24"}),
+    ("pass rate on the Online platform", ["pass_rate"], [], {"Platform": "Online"}),
+    ("pass rate of CHM by term", ["pass_rate"], ["Term"], {"Course Name": "CHM"}),
+    ("credit converted by platform", ["credit_converted"], ["Platform"], {}),
+    ("credits converted by AY", ["credit_converted"], ["AY"], {}),
+    ("number of credit conversions by course prefix", ["credit_converted"], ["Course Prefix"], {}),
+])
+def test_simple_aggregates_match(question, metrics, dimensions, filters):
+    intent = match_intent(question, FILTER_VALUES)
+    assert intent is not None
+    assert (intent.metrics, intent.dimensions, intent.filters) == (metrics, dimensions, filters)
+
+
+def test_pivot_answer_names_its_metric():
+    import numpy as np
+    import pandas as pd
+    from types import SimpleNamespace
+
+    from fast_path import FastPath
+
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "Course Prefix": rng.choice(["CHM-300", "BIO-210"], 200),
+        "AY": rng.choice(["2022-23", "2023-24"], 200),
+        "Passed": rng.integers(0, 2, 200),
+    })
+    dataset = SimpleNamespace(fingerprint="v1", frame=frame, cube=None)
+    answer = FastPath().answer("pass rate by course prefix and AY", dataset)
+    assert answer.startswith("**Pass Rate (%)** by Course Prefix (rows) and AY (columns)")
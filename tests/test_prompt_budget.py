@@ -0,0 +1,54 @@
+from prompt_budget import compact_table
+
+
+def table(rows, total=None):
+    lines = ["| Course | Learners | Pass Rate (%) | Average Grade |", "|:---|---:|---:|---:|"]
+    lines += [f"| C{i} | {learners} | {rate} | {grade} |" for i, (learners, rate, grade) in enumerate(rows)]
+    if total is not None:
+        lines.append(f"| **Total** | {total} | 50 | 70 |")
+    return lines
+
+
+def cells(line):
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def test_short_table_is_unchanged():
+    lines = table([(10, 50, 70)] * 3)
+    assert compact_table(lines, top_rows=5) == (lines, 0)
+
+
+def test_total_only_adds_additive_columns():
+    lines = table([(10, 40, 60), (30, 60, 80), (20, 50, 70)])
+    compacted, omitted = compact_table(lines, top_rows=1, additive_columns={"Learners"})
+    assert omitted == 2
+    total, mean = (cells(line) for line in compacted[3:5])
+    assert total == ["**Total**", "60", "", ""]
+    assert mean == ["**Mean**", "20", "50", "70"]
+
+
+def test_no_total_without_additive_columns():
+    lines = table([(10, 40, 60), (30, 60, 80), (20, 50, 70)])
+    compacted, _ = compact_table(lines, top_rows=1)
+    assert [cells(line)[0] for line in compacted[3:-1]] == ["**Mean**"]
+
+
+def test_pivot_columns_named_after_dimension_values_are_not_totalled():
+    lines = ["| Course Prefix | 2022-23 | 2023-24 | Total |", "|:---|---:|---:|---:|"]
+    lines += [f"| CRS-{i} | 40.5 | 50.5 | 45.5 |" for i in range(5)]
+    compacted, _ = compact_table(lines, top_rows=2, additive_columns={"Learners", "Verified"})
+    assert not any(line.startswith("| **Total**") for line in compacted)
+
+
+def test_existing_total_row_is_kept_and_not_counted():
+    lines = table([(10, 40, 60), (30, 60, 80), (20, 50, 70)], total=60)
+    compacted, omitted = compact_table(lines, top_rows=1, additive_columns={"Learners"})
+    assert omitted == 2
+    assert cells(compacted[3]) == ["**Total**", "60", "50", "70"]
+    assert cells(compacted[4]) == ["**Mean**", "20", "50", "70"]
+    assert "3 rows" in compacted[-1]
+
+
+def test_total_row_alone_does_not_trigger_compaction():
+    lines = table([(10, 40, 60), (30, 60, 80)], total=40)
+    assert compact_table(lines, top_rows=2) == (lines, 0)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rollup_cube import CUBE_MEASURES, RollupCube
+
+
+def learners(categorical):
+    rng = np.random.default_rng(0)
+    n = 1000
+    frame = pd.DataFrame({
+        "Platform": rng.choice(["Inclass", "Online", "Hybrid"], n),
+        "Course Name": rng.choice(["CHM", "BIO"], n),
+        "Course Prefix": rng.choice(["CHM-300", "BIO-210"], n),
+        "Term": rng.choice(["2234C", "2244C"], n).astype(object),
+        "AY": rng.choice(["AY23", "AY24"], n),
+        "Grade": rng.integers(0, 100, n).astype(float),
+        "Passed": rng.integers(0, 2, n),
+        "Verified": rng.integers(0, 2, n),
+        "Credit Converted": rng.integers(0, 2, n),
+    })
+    frame.loc[rng.choice(n, 100, replace=False), "Term"] = np.nan
+    if categorical:
+        for column in ["Platform", "Course Name", "Course Prefix", "Term", "AY"]:
+            frame[column] = frame[column].astype("category")
+    return frame
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_missing_dimension_values_are_kept(categorical):
+    frame = learners(categorical)
+    cube = RollupCube.build(frame)
+
+    by_platform = cube.rollup(["Platform"])
+    expected = frame.groupby("Platform", observed=True)[CUBE_MEASURES].sum()
+    pd.testing.assert_frame_equal(by_platform[CUBE_MEASURES], expected, check_dtype=False)
+    assert by_platform["count"].tolist() == frame.groupby("Platform", observed=True).size().tolist()
+
+    by_term = cube.rollup(["Term"])
+    assert by_term["count"].sum() == len(frame)
+    assert by_term["count"].iloc[-1] == 100  # The missing Term group.
+
+
+def test_filters_keep_rows_with_missing_dimensions():
+    frame = learners(False)
+    cube = RollupCube.build(frame)
+    total = cube.rollup([], filters={"AY": "AY24"})
+    assert total["count"].iloc[0] == (frame["AY"] == "AY24").sum()
+    assert total["Passed"].iloc[0] == frame.loc[frame["AY"] == "AY24", "Passed"].sum()
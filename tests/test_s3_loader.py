@@ -0,0 +1,98 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+from botocore.exceptions import ClientError
+
+from learner_data import read_learner_csv
+from s3_loader import S3DatasetLoader
+
+
+DATA_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data.csv")
+
+
+class StreamingBody(io.BytesIO):
+    """
+        Stand-in for botocore's StreamingBody: a binary stream whose closing is recorded.
+    """
+
+    def close(self):
+        self.was_closed = True
+        super().close()
+
+
+class FakeS3:
+    """
+        Stub of the boto3 S3 client: one object, answering conditional GETs with 304 like S3 does.
+    """
+
+    def __init__(self, body: bytes, etag: str) -> None:
+        self.body = body
+        self.etag = etag
+        self.requests = []
+        self.bodies = []
+
+    def get_object(self, **request):
+        self.requests.append(request)
+        if request.get("IfNoneMatch") == f'"{self.etag}"':
+            raise ClientError(
+                {"Error": {"Code": "304", "Message": "Not Modified"}, "ResponseMetadata": {"HTTPStatusCode": 304}},
+                "GetObject",
+            )
+        body = StreamingBody(self.body)
+        self.bodies.append(body)
+        return {"ETag": f'"{self.etag}"', "Body": body}
+
+
+@pytest.fixture
+def csv_bytes():
+    with open(DATA_CSV, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("mode", ["standard", "compact"])
+def test_chunked_parse_matches_a_single_read(csv_bytes, mode):
+    s3 = FakeS3(csv_bytes, "etag-1")
+    loader = S3DatasetLoader(s3, "bucket", "learners.csv", snapshot_dir="", chunk_rows=128, mode=mode)
+    frame = loader.load()
+    pd.testing.assert_frame_equal(frame, read_learner_csv(DATA_CSV, mode=mode, engine="c"))
+    assert s3.bodies[0].was_closed
+    assert "IfNoneMatch" not in s3.requests[0]
+
+
+def test_snapshot_is_reused_while_the_object_is_unchanged(csv_bytes, tmp_path):
+    s3 = FakeS3(csv_bytes, "etag-1")
+    first = S3DatasetLoader(s3, "bucket", "learners.csv", snapshot_dir=str(tmp_path), chunk_rows=500).load()
+    # A new loader (e.g. after a restart) only sends a conditional GET and reads the snapshot.
+    loader = S3DatasetLoader(s3, "bucket", "learners.csv", snapshot_dir=str(tmp_path), chunk_rows=500)
+    second = loader.load()
+    assert s3.requests[1]["IfNoneMatch"] == '"etag-1"'
+    assert len(s3.bodies) == 1
+    pd.testing.assert_frame_equal(second, first)
+
+
+def test_changed_etag_replaces_the_snapshot(csv_bytes, tmp_path):
+    s3 = FakeS3(csv_bytes, "etag-1")
+    loader = S3DatasetLoader(s3, "bucket", "learners.csv", snapshot_dir=str(tmp_path), chunk_rows=500)
+    loader.load()
+
+    header, *rows = csv_bytes.decode("utf-8").splitlines()
+    s3.body, s3.etag = "\n".join([header] + rows[:100]).encode("utf-8"), "etag-2"
+    frame = loader.load()
+    assert len(frame) == 100
+    assert s3.requests[1]["IfNoneMatch"] == '"etag-1"'
+    assert loader.latest_snapshot_etag() == "etag-2"
+    assert [os.path.basename(path) for path in tmp_path.iterdir()] == [os.path.basename(loader.snapshot_path("etag-2"))]
+    assert len(loader.load()) == 100
+    assert len(s3.bodies) == 2
+
+
+def test_other_errors_are_raised(csv_bytes, tmp_path):
+    class MissingObject(FakeS3):
+        def get_object(self, **request):
+            raise ClientError({"Error": {"Code": "NoSuchKey"}, "ResponseMetadata": {"HTTPStatusCode": 404}}, "GetObject")
+
+    loader = S3DatasetLoader(MissingObject(csv_bytes, "etag-1"), "bucket", "missing.csv", snapshot_dir=str(tmp_path))
+    with pytest.raises(ClientError):
+        loader.load()
@@ -0,0 +1,90 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+
+from benchmarks.fakes import FakeChatModel
+from request_context import RequestContext
+from slack_bot_handler import SlackBotHandler
+from tests.test_slack_client import client_with
+
+
+def table(rows):
+    lines = ["| Course Prefix | Learners |", "|:---|---:|"]
+    return "\n".join(lines + [f"| CRS-{i:04d} | {i} |" for i in range(rows)])
+
+
+def test_streamed_answer_posts_follow_up_messages_once():
+    calls = []
+
+    def handler(request):
+        calls.append((request.url.path.rsplit("/", 1)[-1], json.loads(request.content)))
+        return httpx.Response(200, json={"ok": True, "ts": str(len(calls))})
+
+    async def stream():
+        bot = SlackBotHandler(llm=FakeChatModel(latency=0, chunk_delay=0))
+        bot.slack = client_with(handler, update_rate_per_minute=0)
+        ctx = RequestContext(
+            body={"event": {"channel": "C1"}}, event_id="E1", client_msg_id="m1", channel_id="C1",
+            text="number of learners by course prefix", dataset=SimpleNamespace(fingerprint="v1"),
+        )
+        await bot.stream_insight(ctx, table(600), ts="1")
+
+    asyncio.run(stream())
+    posts = [payload["text"] for method, payload in calls if method == "chat.postMessage"]
+    assert posts, "the 600 row table should not fit one message"
+    assert len(posts) == len(set(posts))
+    assert "CRS-0599" in posts[-1]
+    assert calls[-1][0] == "chat.postMessage"
+
+
+def mention(client_msg_id, text):
+    return RequestContext(body={}, event_id=client_msg_id, client_msg_id=client_msg_id, channel_id="C1", text=text, user_id="U1")
+
+
+def test_only_the_same_question_supersedes():
+    first = mention("m1", "Which courses improved the most?")
+    assert SlackBotHandler.supersedes(mention("m2", "which courses  improved the most"), first)
+    assert SlackBotHandler.supersedes(mention("m1", "Which courses improved most?"), first)  # Edited message.
+    assert not SlackBotHandler.supersedes(mention("m2", "What is the pass rate by platform?"), first)
+
+
+def test_queued_mention_reuses_its_queued_message():
+    from job_queue import JobQueue
+
+    calls = []
+
+    def handler(request):
+        calls.append((request.url.path.rsplit("/", 1)[-1], json.loads(request.content)))
+        return httpx.Response(200, json={"ok": True, "ts": str(len(calls))})
+
+    async def run():
+        bot = SlackBotHandler(llm=FakeChatModel(latency=0, chunk_delay=0))
+        bot.slack = client_with(handler, update_rate_per_minute=0)
+        bot.get_cached_answer = lambda ctx: None
+        answered = {}
+
+        async def get_relevant_data(ctx):
+            await asyncio.sleep(0.05)
+            return "data"
+
+        async def stream_insight(ctx, relevant_data, ts=None):
+            answered[ctx.event_id] = ts
+
+        bot.get_relevant_data = get_relevant_data
+        bot.stream_insight = stream_insight
+        queue = JobQueue(bot.handle_app_mention, on_queued=bot.notify_queued, workers=1)
+        queue.start()
+        for i in (1, 2):
+            body = {"event_id": f"E{i}", "event": {"type": "app_mention", "channel": "C1", "user": f"U{i}", "text": "hi"}}
+            queue.submit(body)
+        await queue.drain()
+        return answered
+
+    answered = asyncio.run(run())
+    posts = [payload["text"] for method, payload in calls if method == "chat.postMessage"]
+    assert len(posts) == 2  # One processing message for E1, one "queued" message for E2.
+    queued_ts = next(str(i + 1) for i, (method, payload) in enumerate(calls) if "queued" in payload["text"])
+    assert answered["E2"] == queued_ts and answered["E1"] not in (None, queued_ts)
+    assert ("chat.update", {"channel": "C1", "ts": queued_ts, "text": "Working on your data request..."}) in calls
@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+import httpx
+
+from slack_client import AsyncSlackClient, ThrottledMessageUpdater
+
+
+def client_with(handler, **kwargs):
+    client = AsyncSlackClient("xoxb-test", base_url="https://slack.test/api", backoff_seconds=0.01, **kwargs)
+    client._client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_streams_share_the_update_budget():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"ok": True})
+
+    async def stream():
+        client = client_with(handler, update_rate_per_minute=60)
+        updaters = [ThrottledMessageUpdater(client, channel="C1", ts=str(i), min_interval=0) for i in range(4)]
+        for token in range(20):
+            for updater in updaters:
+                await updater.update(f"text {token}")
+        for updater in updaters:
+            await updater.update("done", final=True)
+        return updaters
+
+    started = time.monotonic()
+    updaters = asyncio.run(stream())
+    # 3 intermediate updates fit the burst, the rest were skipped; each final update waited for the budget.
+    assert sum(updater.updates for updater in updaters) == len(calls) == 3 + 4
+    assert time.monotonic() - started >= 3
+
+
+def test_due_reflects_interval_and_budget():
+    async def check():
+        client = client_with(lambda request: httpx.Response(200, json={"ok": True}), update_rate_per_minute=60)
+        updater = ThrottledMessageUpdater(client, channel="C1", ts="1", min_interval=10)
+        assert updater.due()
+        await updater.update("first")
+        assert not updater.due()
+        assert updater.due(final=True)
+
+    asyncio.run(check())
+
+
+def test_intermediate_update_does_not_wait_on_429():
+    def handler(request):
+        return httpx.Response(429, headers={"Retry-After": "30"}, json={"ok": False, "error": "ratelimited"})
+
+    async def update():
+        client = client_with(handler)
+        updater = ThrottledMessageUpdater(client, channel="C1", ts="1", min_interval=0)
+        await updater.update("partial")
+        return client, updater
+
+    started = time.monotonic()
+    client, updater = asyncio.run(update())
+    assert time.monotonic() - started < 1
+    assert updater.updates == 0
+    assert not client.rate_budgets["chat.update"].available()
+
+
+def test_post_message_is_not_retried_after_a_read_timeout():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    async def post():
+        await client_with(handler).post_message(channel="C1", text="hello")
+
+    try:
+        asyncio.run(post())
+    except httpx.ReadTimeout:
+        pass
+    else:
+        raise AssertionError("the read timeout was not raised")
+    assert len(calls) == 1
+
+
+def test_post_message_is_retried_when_not_sent():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        if len(calls) == 2:
+            return httpx.Response(429, headers={"Retry-After": "0"}, json={"ok": False, "error": "ratelimited"})
+        return httpx.Response(200, json={"ok": True})
+
+    async def post():
+        return await client_with(handler).post_message(channel="C1", text="hello")
+
+    assert asyncio.run(post()) == {"ok": True}
+    assert len(calls) == 3
+
+
+def test_post_message_is_not_retried_after_a_server_error():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    async def post():
+        await client_with(handler).post_message(channel="C1", text="hello")
+
+    try:
+        asyncio.run(post())
+    except httpx.HTTPStatusError:
+        pass
+    else:
+        raise AssertionError("the server error was not raised")
+    assert len(calls) == 1
+
+
+def test_rate_limited_on_the_last_attempt_returns_a_result():
+    def handler(request):
+        return httpx.Response(429, headers={"Retry-After": "0"}, json={"ok": False, "error": "ratelimited"})
+
+    async def update(wait):
+        client = client_with(handler, max_retries=0, update_rate_per_minute=0)
+        updater = ThrottledMessageUpdater(client, channel="C1", ts="1", min_interval=0)
+        await updater.update("partial", final=wait)
+        return updater, await client.update_message(channel="C1", ts="1", text="final", wait=wait)
+
+    for wait in (False, True):
+        updater, response = asyncio.run(update(wait))
+        assert response == {"ok": False, "error": "ratelimited"}
+        assert updater.updates == 0
+
+
+def test_update_is_retried_after_a_read_timeout():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(200, json={"ok": True})
+
+    async def update():
+        return await client_with(handler).update_message(channel="C1", ts="1", text="hello")
+
+    assert asyncio.run(update()) == {"ok": True}
+    assert len(calls) == 2
@@ -0,0 +1,37 @@
+import pytest
+
+from slack_format import split_message, to_blocks, to_messages, SECTION_MAX_CHARS
+
+
+def assert_parts(parts, limit):
+    assert all(len(part) <= limit for part in parts)
+    # Every part opens and closes its code blocks.
+    assert all(sum(line.strip().startswith("```") for line in part.split("\n")) % 2 == 0 for part in parts)
+
+
+def test_split_long_line():
+    text = "x" * 5000
+    parts = split_message(text, 3900)
+    assert_parts(parts, 3900)
+    assert "".join(parts) == text
+
+
+def test_split_long_line_in_code_block():
+    text = "intro\n```\n" + "y" * 10000 + "\nshort\n```\noutro"
+    parts = split_message(text, 3900)
+    assert_parts(parts, 3900)
+    assert "".join(part.replace("```", "").replace("\n", "") for part in parts) == "intro" + "y" * 10000 + "short" + "outro"
+
+
+@pytest.mark.parametrize("length", [3890, 3891, 3892, 3899, 3900, 3901, 7800])
+def test_split_line_near_limit(length):
+    assert_parts(split_message("a\n" + "z" * length, 3900), 3900)
+
+
+def test_blocks_of_long_line():
+    blocks = to_blocks("w" * 7000)
+    assert all(len(block["text"]["text"]) <= SECTION_MAX_CHARS for block in blocks)
+
+
+def test_short_text_is_one_message():
+    assert to_messages("hello", "text") == [{"text": "hello"}]